@@ -16,6 +16,8 @@ CONFIG_SCHEMA = [
              "desc": "Sub-divides hourly prices into slots of this size; 15 matches quarter-hourly prices."},
             {"key": "OPTIMIZER_SOC_STEP_PCT", "label": "SoC step (%)", "type": "float",
              "desc": "DP discretization step. Smaller = finer control, more compute."},
+            {"key": "OPTIMIZER_WARM_START", "label": "Warm-start re-plans", "type": "int",
+             "desc": "1 = reuse the previous cycle's cost-to-go for unchanged slots (faster re-plans); 0 = solve every cycle from scratch."},
             {"key": "ESS_TERMINAL_VALUE_FACTOR", "label": "Terminal value factor", "type": "float",
              "desc": "Value of end-of-horizon stored energy on multi-day horizons as a multiple of mean buy price. Same-day-only horizons ignore it so late Tibber prices do not cause evening over-retain."},
             {"key": "ESS_EXPECTED_PEAK_PRICE", "label": "Expected peak price (€/kWh)", "type": "float",
@@ -177,6 +179,7 @@ CONFIG_SCHEMA = [
 _NUMERIC_BOUNDS = {
     "OPTIMIZER_SLOT_MINUTES": (5, 60),
     "OPTIMIZER_SOC_STEP_PCT": (0.25, 10),
+    "OPTIMIZER_WARM_START": (0, 1),
     "ESS_TERMINAL_VALUE_FACTOR": (0, 5),
     "ESS_EXPECTED_PEAK_PRICE": (0, 2),
     "ESS_MIN_SELL_PRICE": (0, 2),
@@ -96,6 +96,9 @@ def _day_totals_from_records(records):
             "import_kwh": imp_kwh, "export_kwh": exp_kwh}
 
 
+_DAY_TOTAL_FIELDS = ("day_import_cost", "day_export_reward", "day_import_kwh", "day_export_kwh")
+
+
 def _day_totals(path: str):
     """Back-compat path-based wrapper around :func:`_day_totals_from_records`."""
     return _day_totals_from_records(_records_from_path(path))
@@ -109,8 +112,13 @@ def monthly_history() -> list:
     d = today.replace(day=1)
     out = []
     today_projection = projected_today_net_eur()
+    # One history_store.query over the month instead of a read_day per day.
+    cols = _hist.query(d, today, kinds=("cycle",), columns=_DAY_TOTAL_FIELDS, hist_dir=history_dir())
+    by_day = {}
+    for i, day in enumerate(cols["day"]):
+        by_day.setdefault(day, []).append({k: cols[k][i] for k in _DAY_TOTAL_FIELDS})
     while d <= today:
-        t = _day_totals_from_records(_hist.read_day(d, history_dir()))
+        t = _day_totals_from_records(by_day.get(d.isoformat(), []))
         if t is not None:
             imp_cost = t["import_cost"] or 0.0
             exp_rev = t["export_reward"] or 0.0
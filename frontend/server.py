@@ -4,6 +4,7 @@ Runs standalone (own process / container sidecar) via ``python -m frontend`` or
 can be started as a daemon thread from the main service via ``run_in_thread()``.
 """
 import os
+import sys
 import json
 import logging
 import threading
@@ -426,6 +427,25 @@ def healthz():
     return jsonify({"ok": True})
 
 
+@app.route("/api/metrics")
+def api_metrics():
+    """Runtime counters of the in-process service layers (meaningful in-process only)."""
+    from lib.clients.control_publisher import control_publish_stats
+    from lib.domoticz_updater import domoticz_stats
+    from lib.event_dispatcher import dispatch_stats
+    from lib.global_state import publish_stats
+    from lib.history_store import day_cache_stats, duckdb_pool_stats, writer_stats
+    from lib.victron_schedule import charge_schedule_stats
+    # Importing tibber_api connects to Tibber and MQTT; only report it when the service loaded it.
+    tibber_api = sys.modules.get("lib.tibber_api")
+    return jsonify({"global_state_publish": publish_stats(), "mqtt_dispatch": dispatch_stats(),
+                    "domoticz": domoticz_stats(), "history_day_cache": day_cache_stats(),
+                    "history_duckdb": duckdb_pool_stats(), "history_writer": writer_stats(),
+                    "tibber_prices": tibber_api.price_fetch_stats() if tibber_api else {},
+                    "victron_control": control_publish_stats(),
+                    "victron_charge_schedule": charge_schedule_stats()})
+
+
 def _host_port():
     env = data._env()
     host = env.get("FRONTEND_HOST") or os.environ.get("FRONTEND_HOST") or "0.0.0.0"
@@ -12,6 +12,18 @@ Design notes
   charge/discharge efficiency, PV and load forecasts into account), enforces
   power and SoC-reserve limits, and accumulates the monetary cost using the
   per-slot *buy* price for imports and *sell* price for exports.
+* The slot-independent part of every transition is precomputed once per engine
+  as a band of SoC offsets reachable within the battery power limits, and each
+  slot is solved as a NumPy broadcast + min-reduction over that band
+  (``_dp_vectorized``, O(states x band) per slot). The pure-Python loop (``_dp_reference``) is kept as the
+  specification and is what the vectorized kernel is tested against.
+* The live service solves backward instead (cost-to-go per SoC state, then a
+  forward rollout from the live SoC). Cost-to-go does not depend on the start
+  SoC, so ``CostToGoCache`` lets the next quarter-hour cycle reuse the tail of
+  the previous table and only re-solve the slots whose inputs changed. The
+  daily-policy candidates (full horizon, today-only, tomorrow-from-today's-end)
+  are all cut from one prepared horizon, and the tomorrow leg rolls out the
+  full-horizon table whenever both share a terminal price.
 * Stored energy at the end of a multi-day horizon is given a terminal value so
   the optimizer does not simply dump the battery to the grid at the end of the
   window. This is what lets a 48h (today + tomorrow) plan defer cheap charging
@@ -28,13 +40,17 @@ All energy is in kWh, power in kW, prices in currency/kWh, durations in hours
 unless otherwise noted.
 """
 import logging
-import json
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
 from dateutil import parser as date_parser
 
+from lib import history_store
 from lib.config_retrieval import retrieve_setting
+from lib.price_horizon import PriceHorizon
 
 # Defaults for tunables that can be overridden via .env (see OptimizationEngine).
 # Seasonal SoC reserve (percentage) kept in the battery at all times.
@@ -48,6 +64,12 @@ SOC_STEP = 5.0
 # Numerical tolerance used for float comparisons.
 EPS = 1e-6
 
+# Warm-start tolerances: how far a slot's net load (kWh) and the terminal
+# stored-energy price (€/kWh) may drift between cycles before the previous
+# cycle's cost-to-go for that part of the horizon is recomputed.
+WARM_START_LOAD_TOLERANCE_KWH = 0.02
+WARM_START_TERMINAL_TOLERANCE_EUR = 0.002
+
 # Canonical CONTROL ACTION (what we COMMAND) — the single label shown by the
 # console, web UI, plan JSON and history so every surface agrees. Labelled by the
 # commanded setpoint, not the predicted energy flow.
@@ -189,12 +211,119 @@ def _policy_round(value, digits=3):
         return value
 
 
+_OPPORTUNITY_COLUMNS = ('price_buy', 'predicted_net_eur', 'actual_net_eur',
+                        'day_import_cost', 'day_export_reward')
+_DAY_ROLLUPS = {}   # (history dir, day) -> (history_store.day_source_stamp, rollup)
+_DAY_ROLLUPS_LOCK = threading.Lock()
+
+
+def _weighted_percentile(counts, q):
+    """:func:`_percentile` of the multiset ``{value: count}`` without expanding it."""
+    vals = sorted(counts.items())
+    n = sum(c for _, c in vals)
+    if not n:
+        return None
+    if n == 1:
+        return float(vals[0][0])
+    pos = (n - 1) * _clamp(float(q), 0.0, 1.0)
+    lower = int(pos)
+    upper = min(lower + 1, n - 1)
+
+    def _nth(k):
+        seen = 0
+        for v, c in vals:
+            seen += c
+            if k < seen:
+                return float(v)
+        return float(vals[-1][0])
+
+    if lower == upper:
+        return _nth(lower)
+    frac = pos - lower
+    return _nth(lower) * (1.0 - frac) + _nth(upper) * frac
+
+
+def _day_rollup(cols, rows):
+    """Opportunity-model inputs contributed by one stored day's records.
+
+    ``latest``: per record date, the (timestamp, net €) of its latest cycle record;
+    ``errors``: per record date, the summed |actual - predicted| settlement error;
+    ``prices``: a {price_buy: count} histogram (exact, and far smaller than the
+    list of samples since a price holds for a whole slot).
+    """
+    latest, errors, prices = {}, {}, Counter()
+    for i in rows:
+        file_day = cols['day'][i]
+        ts = cols['ts'][i]
+        try:
+            when = _coerce_datetime(ts) if ts else None
+        except Exception:
+            when = None
+        rec_day = when.date() if when else datetime.strptime(file_day, '%Y-%m-%d').date()
+
+        price = _as_float(cols['price_buy'][i])
+        if price is not None:
+            prices[price] += 1
+
+        if cols['kind'][i] == 'settlement':
+            pred = _as_float(cols['predicted_net_eur'][i])
+            actual = _as_float(cols['actual_net_eur'][i])
+            if pred is not None and actual is not None:
+                errors[rec_day] = errors.get(rec_day, 0.0) + abs(actual - pred)
+            continue
+
+        imp_cost = _as_float(cols['day_import_cost'][i])
+        exp_reward = _as_float(cols['day_export_reward'][i])
+        if imp_cost is None or exp_reward is None:
+            continue
+        net = exp_reward - imp_cost
+        prev = latest.get(rec_day)
+        if prev is None or (when is not None and when > prev[0]):
+            latest[rec_day] = (when or datetime.min, net)
+    return {'latest': latest, 'errors': errors, 'prices': prices}
+
+
+def _closed_day_rollups(root, days):
+    """Rollups for ``days`` (closed, oldest first), computing only the uncached ones.
+
+    A rollup is reused while its day's source file keeps the same identity, so a
+    closed day is read once — and once more after its month is compacted. All the
+    missing days are read in a single history_store.query.
+    """
+    stamps = {d: history_store.day_source_stamp(d, root) for d in days}
+    rollups = {}
+    with _DAY_ROLLUPS_LOCK:
+        for d in days:
+            entry = _DAY_ROLLUPS.get((root, d))
+            if entry is not None and entry[0] == stamps[d]:
+                rollups[d] = entry[1]
+    missing = [d for d in days if d not in rollups]
+    if missing:
+        wanted = set(missing)
+        cols = history_store.query(missing[0], missing[-1], hist_dir=root, columns=_OPPORTUNITY_COLUMNS)
+        rows_by_day = {d: [] for d in missing}
+        for i, file_day in enumerate(cols['day']):
+            if file_day in wanted:
+                rows_by_day[file_day].append(i)
+        with _DAY_ROLLUPS_LOCK:
+            for d in missing:
+                rollups[d] = _day_rollup(cols, rows_by_day[d])
+                _DAY_ROLLUPS[(root, d)] = (stamps[d], rollups[d])
+            for key in [k for k in _DAY_ROLLUPS if k[0] == root and k[1] not in stamps]:
+                del _DAY_ROLLUPS[key]
+    return [rollups[d] for d in days]
+
+
 def _opportunity_model_from_history(history_dir=None, days=DAILY_POLICY_HISTORY_DAYS):
     """Infer what counts as a large future opportunity from local history.
 
     Uses completed-day net outcomes as the "normal win" distribution, settlement
-    prediction errors as forecast risk, and observed prices for spike detection.
-    Falls back to conservative defaults when history is absent or too sparse.
+    prediction errors as forecast risk, and observed prices for spike detection,
+    over the most recent ``days`` stored days before today (hot NDJSON and
+    Parquet-compacted months alike). Each closed day is reduced once to a small
+    rollup (see _day_rollup) that is cached until its file changes, so a run only
+    merges rollups. Falls back to conservative defaults when history is absent or
+    too sparse.
     """
     model = {
         'source': 'fallback',
@@ -211,60 +340,21 @@ def _opportunity_model_from_history(history_dir=None, days=DAILY_POLICY_HISTORY_
         if not root.exists():
             return model
 
-        today = datetime.now().date()
+        today = datetime.now().date().isoformat()
+        past_days = [d for d in history_store.available_days(str(root)) if d < today]
+        past_days = past_days[-max(1, int(days)):]
+        considered = len(past_days)
         daily_latest = {}
         settlement_error_by_day = {}
-        prices = []
-        files = sorted(root.glob('ess-*.ndjson'), reverse=True)
-        considered = 0
-        for path in files:
-            if considered >= max(1, int(days)):
-                break
-            try:
-                file_day = datetime.strptime(path.stem.replace('ess-', ''), '%Y-%m-%d').date()
-            except ValueError:
-                file_day = None
-            if file_day is not None and file_day >= today:
-                continue
-            considered += 1
-            with path.open() as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        rec = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-
-                    ts = rec.get('ts')
-                    try:
-                        when = _coerce_datetime(ts) if ts else None
-                    except Exception:
-                        when = None
-                    rec_day = when.date() if when else file_day
-
-                    price = _as_float(rec.get('price_buy'))
-                    if price is not None:
-                        prices.append(price)
-
-                    if rec.get('kind') == 'settlement':
-                        pred = _as_float(rec.get('predicted_net_eur'))
-                        actual = _as_float(rec.get('actual_net_eur'))
-                        if pred is not None and actual is not None and rec_day is not None:
-                            settlement_error_by_day[rec_day] = (
-                                settlement_error_by_day.get(rec_day, 0.0) + abs(actual - pred)
-                            )
-                        continue
-
-                    imp_cost = _as_float(rec.get('day_import_cost'))
-                    exp_reward = _as_float(rec.get('day_export_reward'))
-                    if imp_cost is None or exp_reward is None or rec_day is None:
-                        continue
-                    net = exp_reward - imp_cost
-                    prev = daily_latest.get(rec_day)
-                    if prev is None or (when is not None and when > prev[0]):
-                        daily_latest[rec_day] = (when or datetime.min, net)
+        prices = Counter()
+        for rollup in _closed_day_rollups(str(root), past_days):
+            for rec_day, (when, net) in rollup['latest'].items():
+                prev = daily_latest.get(rec_day)
+                if prev is None or (when is not datetime.min and when > prev[0]):
+                    daily_latest[rec_day] = (when, net)
+            for rec_day, err in rollup['errors'].items():
+                settlement_error_by_day[rec_day] = settlement_error_by_day.get(rec_day, 0.0) + err
+            prices.update(rollup['prices'])
 
         profits = [net for _, net in daily_latest.values() if net > EPS]
         exceptional = _percentile(profits, 0.75)
@@ -282,7 +372,7 @@ def _opportunity_model_from_history(history_dir=None, days=DAILY_POLICY_HISTORY_
             risk = DAILY_POLICY_FALLBACK_RISK_EUR
         risk = _clamp(risk, 0.0, DAILY_POLICY_MAX_RISK_EUR)
 
-        p95 = _percentile(prices, 0.95)
+        p95 = _weighted_percentile(prices, 0.95)
         if p95 is None:
             p95 = model['historical_price_p95']
 
@@ -291,7 +381,7 @@ def _opportunity_model_from_history(history_dir=None, days=DAILY_POLICY_HISTORY_
             'history_days': considered,
             'daily_profit_samples': len(profits),
             'settlement_error_samples': len(daily_errors),
-            'price_samples': len(prices),
+            'price_samples': sum(prices.values()),
             'exceptional_threshold_eur': _policy_round(exceptional),
             'forecast_risk_eur': _policy_round(risk),
             'historical_price_p95': _policy_round(p95, 4),
@@ -410,15 +500,6 @@ def _select_daily_settlement_candidate(full_horizon, today_first, opportunity_mo
     return selected, policy
 
 
-def _filter_forecast_for_indices(forecast, indices):
-    if forecast is None or isinstance(forecast, dict):
-        return forecast
-    try:
-        return [forecast[i] for i in indices if i < len(forecast)]
-    except TypeError:
-        return forecast
-
-
 def _combine_today_first_plans(today_plan, future_plan):
     combined = dict(today_plan)
     combined['schedule'] = list(today_plan.get('schedule', [])) + list(future_plan.get('schedule', []))
@@ -428,6 +509,150 @@ def _combine_today_first_plans(today_plan, future_plan):
     return combined
 
 
+def _eps_argmin(cand):
+    """Column-wise min/argmin of ``cand`` with the reference DP's tie-breaking.
+
+    The reference kernel scans candidates in row order and only replaces the
+    incumbent when a candidate is more than ``EPS`` cheaper. A plain argmin
+    agrees with that scan unless some other candidate sits within a few ``EPS``
+    of the minimum; those columns are re-resolved with the exact scan so the
+    chosen transition is identical, not merely equally cheap.
+    """
+    best = cand.min(axis=0)
+    arg = cand.argmin(axis=0)
+    near = (cand > best) & (cand <= best + 4 * EPS)
+    ambiguous = np.flatnonzero(near.any(axis=0))
+    if ambiguous.size:
+        sub = cand[:, ambiguous]
+        sub_best = np.full(ambiguous.size, np.inf)
+        sub_arg = np.zeros(ambiguous.size, dtype=np.intp)
+        for r in np.flatnonzero(np.isfinite(sub).any(axis=1)):
+            better = sub[r] < sub_best - EPS
+            sub_best[better] = sub[r][better]
+            sub_arg[better] = r
+        best[ambiguous] = sub_best
+        arg[ambiguous] = sub_arg
+    return best, arg
+
+
+class CostToGoCache:
+    """Cost-to-go tables from previous optimizer cycles, for warm-started re-plans.
+
+    Entries are keyed by the horizon's first day and last slot start, so a new
+    Tibber horizon (tomorrow's prices published) never reuses an older table.
+    Within an entry, a lookup walks back from the end of the horizon while the
+    slots still match the cached ones (same start and prices, net load within
+    ``load_tolerance_kwh``) and hands back the cost-to-go from that boundary
+    on; the optimizer then only re-solves the slots in front of it. A changed
+    engine configuration (battery model, limits, sell floor) clears the cache.
+    """
+
+    def __init__(self, max_entries=4, load_tolerance_kwh=WARM_START_LOAD_TOLERANCE_KWH,
+                 terminal_tolerance=WARM_START_TERMINAL_TOLERANCE_EUR):
+        self.max_entries = max_entries
+        self.load_tolerance_kwh = load_tolerance_kwh
+        self.terminal_tolerance = terminal_tolerance
+        self._entries = OrderedDict()
+        self._config_key = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.reused_slots = 0
+        self.solved_slots = 0
+
+    @staticmethod
+    def _entry_key(starts):
+        return (starts[0].date(), starts[-1])
+
+    def lookup(self, config_key, starts, buy_prices, sell_prices, net_loads, terminal_price):
+        """Return ``(resume, suffix)``: reusable values for boundaries ``resume..T``.
+
+        ``suffix`` is None (and ``resume == T``) on a miss.
+        """
+        steps = len(starts)
+        with self._lock:
+            if config_key != self._config_key:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._config_key = config_key
+            entry = self._entries.get(self._entry_key(starts)) if steps else None
+            resume = steps
+            if entry is not None and abs(entry['terminal_price'] - terminal_price) <= self.terminal_tolerance:
+                offset = len(entry['starts']) - steps
+                t = steps - 1
+                while t >= 0 and t + offset >= 0:
+                    o = t + offset
+                    if (entry['starts'][o] != starts[t]
+                            or entry['buy'][o] != buy_prices[t]
+                            or entry['sell'][o] != sell_prices[t]
+                            or abs(entry['net_loads'][o] - net_loads[t]) > self.load_tolerance_kwh):
+                        break
+                    t -= 1
+                resume = t + 1
+            if resume >= steps:
+                self.misses += 1
+                return steps, None
+            self.hits += 1
+            self._entries.move_to_end(self._entry_key(starts))
+            return resume, entry['values'][resume + offset:]
+
+    def store(self, config_key, starts, buy_prices, sell_prices, net_loads, terminal_price,
+              values, solved):
+        """Remember this solve; ``solved`` is how many slots had to be computed."""
+        if not starts:
+            return
+        with self._lock:
+            self.solved_slots += solved
+            self.reused_slots += len(starts) - solved
+            if config_key != self._config_key:
+                return
+            key = self._entry_key(starts)
+            self._entries[key] = {
+                'starts': list(starts),
+                'buy': list(buy_prices),
+                'sell': list(sell_prices),
+                'net_loads': list(net_loads),
+                'terminal_price': terminal_price,
+                'values': values,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, starts):
+        with self._lock:
+            self._entries.pop(self._entry_key(starts), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._config_key = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'invalidations': self.invalidations,
+                'reused_slots': self.reused_slots,
+                'solved_slots': self.solved_slots,
+                'entries': len(self._entries),
+            }
+
+
+# Process-wide warm-start cache used by optimize_schedule() across cycles.
+_COST_TO_GO_CACHE = CostToGoCache()
+
+
+def cost_to_go_cache_stats():
+    """Hit/miss counters of the optimizer's cross-cycle warm-start cache."""
+    return _COST_TO_GO_CACHE.stats()
+
+
 class OptimizationEngine:
     def __init__(self):
         self.battery_capacity = _safe_float('BATTERY_CAPACITY_KWH', 45.0)
@@ -508,6 +733,17 @@ class OptimizationEngine:
             self.soc_step = SOC_STEP
         self.soc_states = [i * self.soc_step for i in range(int(100 / self.soc_step) + 1)]
 
+        # DP kernel: 'vectorized' (NumPy, default) or 'reference' (pure Python,
+        # kept as the specification the vectorized kernel is tested against).
+        self.dp_kernel = 'vectorized'
+        self._transitions = None
+        self._backward_transitions = None
+
+        # Optional CostToGoCache shared across optimizer cycles. When attached
+        # the engine solves backward (cost-to-go) so the unchanged tail of the
+        # previous cycle's table can be reused; see optimize_schedule().
+        self.cost_to_go_cache = None
+
     # ------------------------------------------------------------------ #
     # Helpers
     # ------------------------------------------------------------------ #
@@ -569,90 +805,22 @@ class OptimizationEngine:
         return max(0.0, min(snapped, 100.0))
 
     # ------------------------------------------------------------------ #
-    # Optimization
+    # DP kernels
     # ------------------------------------------------------------------ #
-    def optimize(self, current_soc_percent, price_data, load_forecast=None, pv_forecast=None):
-        """Compute the optimal plan.
+    def _dp_reference(self, start_soc, buy_prices, sell_prices, net_loads, slot_duration_h):
+        """Pure-Python forward DP over ``soc_states`` (reference implementation).
 
-        :param current_soc_percent: current battery SoC (0-100)
-        :param price_data: list of {'start': datetime|str, 'total': float, ...}
-        :param load_forecast: optional list of per-slot load (kWh)
-        :param pv_forecast: optional list of per-slot PV generation (kWh)
-        :return: dict with schedule, victron_slots, setpoint, limit_feed_in,
-                 current_price - or None when no feasible plan exists.
+        Kept as the readable specification of the transition rules and as the
+        oracle for the vectorized kernel's equivalence tests. Returns
+        ``(final_costs, parent_idx, parent_grid)`` indexed by SoC state.
         """
-        if not price_data:
-            logging.warning("AI_ESS: No price data available for optimization.")
-            return None
-
-        # Normalise timestamps and sort chronologically.
-        normalised = []
-        for p in price_data:
-            try:
-                normalised.append({
-                    'start': _coerce_datetime(p['start']),
-                    'total': float(p['total']),
-                    'level': p.get('level'),
-                })
-            except (KeyError, TypeError, ValueError) as e:
-                logging.warning("AI_ESS: Skipping malformed price point %s (%s).", p, e)
-        if not normalised:
-            logging.warning("AI_ESS: No usable price points after normalisation.")
-            return None
-
-        normalised.sort(key=lambda x: x['start'])
-
-        tzinfo = normalised[0]['start'].tzinfo
-        now = datetime.now(tzinfo)
-
-        native_slot_h = self._detect_slot_duration_h(normalised) if len(normalised) > 1 else 1.0
-
-        # Planning resolution: sub-divide each native price slot when a finer
-        # target resolution is configured (e.g. 15-min planning over hourly
-        # prices). When native data is already finer, k == 1.
-        target_h = max(self.slot_minutes, 1.0) / 60.0
-        k = max(1, int(round(native_slot_h / target_h))) if target_h > 0 else 1
-        slot_duration_h = native_slot_h / k
-        slot_seconds = int(round(slot_duration_h * 3600))
-
-        # Expand native price slots into (optionally finer) planning slots,
-        # distributing per-slot forecasts evenly across the sub-slots.
-        avg_native_load = self.daily_load_kwh * (native_slot_h / 24.0)
-        expanded = []
-        for idx, p in enumerate(normalised):
-            native_load = self._lookup_forecast(load_forecast, idx, p['start'], avg_native_load)
-            native_pv = self._lookup_forecast(pv_forecast, idx, p['start'], 0.0)
-            for j in range(k):
-                sub_start = p['start'] + timedelta(hours=slot_duration_h * j)
-                expanded.append({
-                    'start': sub_start,
-                    'buy': p['total'],
-                    'load': native_load / k,
-                    'pv': native_pv / k,
-                })
-
-        # Keep the slot whose window still contains "now" plus all future slots.
-        keep_after = now - timedelta(hours=slot_duration_h)
-        future_prices = [p for p in expanded if p['start'] > keep_after]
-
-        if not future_prices:
-            logging.warning("AI_ESS: No future price data.")
-            return None
-
-        steps = len(future_prices)
-
-        # Precompute buy/sell prices and net AC load per slot.
-        buy_prices = [p['buy'] for p in future_prices]
-        sell_prices = [self._sell_price(b) for b in buy_prices]
-        net_loads = [p['load'] - p['pv'] for p in future_prices]
-
+        steps = len(buy_prices)
         grid_charge_soc_cap = max(self.min_soc, min(100.0, self.max_grid_charge_soc))
 
         # DP tables. dp[t][soc] = minimum cost to reach soc at slot boundary t.
         dp = [{s: float('inf') for s in self.soc_states} for _ in range(steps + 1)]
         parent = [{s: None for s in self.soc_states} for _ in range(steps + 1)]
 
-        start_soc = self._snap_soc(current_soc_percent)
         dp[0][start_soc] = 0.0
 
         cap = self.battery_capacity
@@ -728,61 +896,464 @@ class OptimizationEngine:
                         dp[t + 1][nsoc] = total
                         parent[t + 1][nsoc] = (soc, grid_energy)
 
-        # Terminal valuation: value usable stored energy only when the known
-        # horizon crosses a day boundary. If Tibber has not published tomorrow
-        # yet, a same-day-only evening horizon should still sell profitable
-        # energy instead of retaining it through midnight for an unknown day.
-        horizon_dates = {p['start'].date() for p in future_prices}
-        terminal_price = 0.0
-        if len(horizon_dates) > 1:
-            mean_buy = sum(buy_prices) / len(buy_prices)
-            terminal_price = mean_buy * self.terminal_value_factor
-            if self.expected_peak_price > 0:
-                terminal_price = max(terminal_price, self.expected_peak_price)
-
-        best_end_soc = None
+        index = {s: i for i, s in enumerate(self.soc_states)}
+        final_costs = [dp[steps][s] for s in self.soc_states]
+        parent_idx = [[-1] * len(self.soc_states) for _ in range(steps + 1)]
+        parent_grid = [[0.0] * len(self.soc_states) for _ in range(steps + 1)]
+        for t in range(1, steps + 1):
+            for s, prev in parent[t].items():
+                if prev is not None:
+                    parent_idx[t][index[s]] = index[prev[0]]
+                    parent_grid[t][index[s]] = prev[1]
+        return final_costs, parent_idx, parent_grid
+
+    def _transition_tables(self, slot_duration_h, backward=False):
+        """Slot-independent SoC transition terms in banded form.
+
+        Within one slot the battery power limits only allow SoC to move a few
+        states up or down, so transitions are stored per offset ``d`` rather
+        than as a dense ``S x S`` matrix. Forward tables are laid out
+        ``(offset, dst)``: row ``r`` holds, for every destination ``j``, the
+        move from ``src = j - d``, with rows running from the largest charge
+        offset down to the largest discharge offset, i.e. ascending source SoC
+        per destination — the order the reference kernel scans in. Backward
+        tables are ``(offset, src)`` with rows in ascending destination SoC.
+
+        Everything that depends only on the battery model (SoC delta, AC energy
+        the battery draws/produces, power and reserve feasibility, wear hurdle)
+        is computed once and cached on the engine. Keyed on the inputs so
+        tests/callers that tweak engine attributes after construction still get
+        fresh tables.
+        """
+        key = self._transition_key(slot_duration_h)
+        attr = '_backward_transitions' if backward else '_transitions'
+        cached = getattr(self, attr)
+        if cached is not None and cached['key'] == key:
+            return cached
+
+        states = np.asarray(self.soc_states, dtype=float)
+        n = len(states)
+        up, down = self._band_offsets(slot_duration_h)
+        idx = np.arange(n)
+        if backward:
+            offsets = np.arange(-down, up + 1)
+            src = np.broadcast_to(idx[None, :], (len(offsets), n))
+            dst = idx[None, :] + offsets[:, None]
+        else:
+            offsets = np.arange(up, -down - 1, -1)
+            dst = np.broadcast_to(idx[None, :], (len(offsets), n))
+            src = idx[None, :] - offsets[:, None]
+        in_range = (src >= 0) & (src < n) & (dst >= 0) & (dst < n)
+        src = np.clip(src, 0, n - 1)
+        dst = np.clip(dst, 0, n - 1)
+
+        dc = (states[dst] - states[src]) / 100.0 * self.battery_capacity
+        batt_kw = np.abs(dc) / slot_duration_h
+        charge = dc >= 0
+        feasible = in_range & np.where(
+            charge,
+            ~(batt_kw > self.max_charge_power + EPS),
+            ~(batt_kw > self.max_discharge_power + EPS),
+        )
+        feasible &= ~(states[dst] < self.min_soc - EPS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ac = np.where(charge, dc / self.charge_efficiency, dc * self.discharge_efficiency)
+
+        discharging = dc < -EPS
+        grid_charge_soc_cap = max(self.min_soc, min(100.0, self.max_grid_charge_soc))
+        discharge_hurdle = self.cycle_cost + self.arbitrage_margin
+        tables = {
+            'key': key,
+            'src': src,
+            'dst': dst,
+            'ac': ac,
+            'feasible': feasible,
+            'discharging': discharging,
+            'grid_charging_above_cap': (dc > EPS) & (states[dst] > grid_charge_soc_cap + EPS),
+            'hurdle_mask': discharging if discharge_hurdle > 0 else np.zeros_like(discharging),
+            'hurdle_cost': (-dc) * discharge_hurdle,
+        }
+        setattr(self, attr, tables)
+        return tables
+
+    def _transition_key(self, slot_duration_h):
+        return (
+            tuple(self.soc_states), slot_duration_h, self.battery_capacity,
+            self.charge_efficiency, self.discharge_efficiency,
+            self.max_charge_power, self.max_discharge_power, self.min_soc,
+            self.max_grid_charge_soc, self.cycle_cost, self.arbitrage_margin,
+        )
+
+    def _band_offsets(self, slot_duration_h):
+        """Largest reachable (charge, discharge) SoC-state offsets in one slot.
+
+        Padded by one state so float rounding at the power limit can never
+        drop a feasible move; the exact limit is still enforced per transition.
+        """
+        last = len(self.soc_states) - 1
+        spacing = self.soc_states[1] - self.soc_states[0] if last > 0 else 0.0
+        if self.battery_capacity <= 0 or slot_duration_h <= 0 or spacing <= 0:
+            return last, last
+
+        def _states_for(power_kw):
+            pct = (max(0.0, power_kw) + EPS) * slot_duration_h / self.battery_capacity * 100.0
+            return min(last, int(pct / spacing) + 1)
+
+        return _states_for(self.max_charge_power), _states_for(self.max_discharge_power)
+
+    def _slot_costs(self, tables, buy, sell, net_load, slot_duration_h, col=slice(None)):
+        """Grid energy and step cost of every banded transition for one slot.
+
+        Infeasible transitions (grid limits, sell floor, grid-charge SoC cap on
+        top of the precomputed battery limits) cost ``inf``. ``col`` restricts
+        the evaluation to one column (a single source state when rolling out a
+        backward solution).
+        """
+        ac = tables['ac'][:, col]
+        discharging = tables['discharging'][:, col]
+        grid = net_load + ac
+        ok = (tables['feasible'][:, col]
+              & ~(grid > self.max_power_import * slot_duration_h + EPS)
+              & ~(-grid > self.max_power_export * slot_duration_h + EPS))
+        import_kwh = np.where(grid > 0, grid, 0.0)
+        export_kwh = np.where(grid < 0, -grid, 0.0)
+        if sell < self._effective_sell_floor() - EPS:
+            ok &= ~((export_kwh > EPS) & discharging)
+        ok &= ~(tables['grid_charging_above_cap'][:, col] & (import_kwh > EPS))
+
+        step_cost = import_kwh * buy - export_kwh * sell
+        step_cost = np.where(tables['hurdle_mask'][:, col],
+                             step_cost + tables['hurdle_cost'][:, col], step_cost)
+        return grid, np.where(ok, step_cost, np.inf)
+
+    def _dp_vectorized(self, start_soc, buy_prices, sell_prices, net_loads, slot_duration_h):
+        """Banded NumPy forward DP; same transitions and tie-breaking as ``_dp_reference``.
+
+        Each slot evaluates every reachable (offset, dst) transition as one
+        broadcast and takes a min-reduction per destination, so the per-slot
+        cost is O(S x band) instead of O(S^2).
+        """
+        steps = len(buy_prices)
+        n = len(self.soc_states)
+        tables = self._transition_tables(slot_duration_h)
+        src = tables['src']
+        cols = np.arange(n)
+
+        cost = np.full(n, np.inf)
+        try:
+            cost[self.soc_states.index(start_soc)] = 0.0
+        except ValueError:
+            pass
+        parent_idx = np.full((steps + 1, n), -1, dtype=np.intp)
+        parent_grid = np.zeros((steps + 1, n))
+
+        for t in range(steps):
+            grid, step_cost = self._slot_costs(
+                tables, buy_prices[t], sell_prices[t], net_loads[t], slot_duration_h)
+            best, arg = _eps_argmin(cost[src] + step_cost)
+            parent_idx[t + 1] = np.where(np.isfinite(best), src[arg, cols], -1)
+            parent_grid[t + 1] = grid[arg, cols]
+            cost = best
+
+        return cost.tolist(), parent_idx, parent_grid
+
+    def _backtrack(self, final_costs, parent_idx, parent_grid, terminal_price):
+        """Pick the best end state of a forward DP and walk its parents back.
+
+        Returns ``[(slot_index, src_idx, dst_idx, grid_energy), ...]`` in time
+        order, or None when no end state is reachable.
+        """
+        best_end = None
         best_objective = float('inf')
-        for s in self.soc_states:
-            if dp[steps][s] == float('inf'):
+        for i, s in enumerate(self.soc_states):
+            if final_costs[i] == float('inf'):
                 continue
-            usable_kwh = max(0.0, (s - self.min_soc) / 100.0 * cap) * self.discharge_efficiency
-            objective = dp[steps][s] - usable_kwh * terminal_price
+            usable_kwh = max(0.0, (s - self.min_soc) / 100.0 * self.battery_capacity) * self.discharge_efficiency
+            objective = final_costs[i] - usable_kwh * terminal_price
             if objective < best_objective:
                 best_objective = objective
-                best_end_soc = s
+                best_end = i
 
-        if best_end_soc is None:
-            logging.error("AI_ESS: No feasible schedule found.")
+        if best_end is None:
             return None
 
-        # Backtrack to build the per-slot schedule.
-        schedule = []
-        curr_soc = best_end_soc
-        for t in range(steps, 0, -1):
-            prev = parent[t][curr_soc]
-            if not prev:
+        path = []
+        curr = best_end
+        for t in range(len(parent_idx) - 1, 0, -1):
+            prev = int(parent_idx[t][curr])
+            if prev < 0:
                 break
-            prev_soc, grid_energy = prev
-            buy = future_prices[t - 1]['buy']
+            path.insert(0, (t - 1, prev, curr, float(parent_grid[t][curr])))
+            curr = prev
+        return path
+
+    def _cost_to_go(self, buy_prices, sell_prices, net_loads, slot_duration_h,
+                    terminal_price, starts=None):
+        """Backward DP: cheapest cost from each SoC state to the end of the horizon.
+
+        ``values[t][s]`` is the cost from SoC ``s`` at slot boundary ``t`` to
+        the end of the horizon, terminal valuation included, so it does not
+        depend on the starting SoC. That is what makes it reusable across
+        optimizer cycles: with ``cost_to_go_cache`` attached (and ``starts``
+        given) the unchanged suffix of the previous cycle's table is reused and
+        only the slots in front of it are re-solved.
+
+        Returns ``(values, exact)``; ``exact`` is False when a cached suffix
+        solved for slightly different inputs was reused.
+        """
+        steps = len(buy_prices)
+        tables = self._transition_tables(slot_duration_h, backward=True)
+        dst = tables['dst']
+        states = np.asarray(self.soc_states, dtype=float)
+        usable = np.maximum(0.0, (states - self.min_soc) / 100.0 * self.battery_capacity)
+        values = np.empty((steps + 1, len(states)))
+        values[steps] = -(usable * self.discharge_efficiency) * terminal_price
+
+        cache = self.cost_to_go_cache if starts is not None else None
+        resume = steps
+        if cache is not None:
+            config_key = (self._transition_key(slot_duration_h), self.max_power_import,
+                          self.max_power_export, self._effective_sell_floor())
+            resume, suffix = cache.lookup(config_key, starts, buy_prices, sell_prices,
+                                          net_loads, terminal_price)
+            if suffix is not None:
+                values[resume:] = suffix
+
+        for t in range(resume - 1, -1, -1):
+            _, step_cost = self._slot_costs(
+                tables, buy_prices[t], sell_prices[t], net_loads[t], slot_duration_h)
+            values[t], _ = _eps_argmin(step_cost + values[t + 1][dst])
+
+        if cache is not None:
+            cache.store(config_key, starts, buy_prices, sell_prices, net_loads,
+                        terminal_price, values, solved=resume)
+        return values, resume == steps
+
+    def _rollout(self, values, start_soc, buy_prices, sell_prices, net_loads, slot_duration_h):
+        """Follow a cost-to-go table forward from ``start_soc``.
+
+        Returns ``[(slot_index, src_idx, dst_idx, grid_energy), ...]`` or None
+        when the start SoC cannot reach the end of the horizon.
+        """
+        try:
+            curr = self.soc_states.index(start_soc)
+        except ValueError:
+            return None
+        if not np.isfinite(values[0][curr]):
+            return None
+
+        tables = self._transition_tables(slot_duration_h, backward=True)
+        dst = tables['dst']
+        path = []
+        for t in range(len(buy_prices)):
+            grid, step_cost = self._slot_costs(
+                tables, buy_prices[t], sell_prices[t], net_loads[t], slot_duration_h, col=curr)
+            best, arg = _eps_argmin((step_cost + values[t + 1][dst[:, curr]])[:, None])
+            if not np.isfinite(best[0]):
+                return None
+            nxt = int(dst[arg[0], curr])
+            path.append((t, curr, nxt, float(grid[arg[0]])))
+            curr = nxt
+        return path
+
+    def _solve_backward(self, start_soc, horizon, lo, hi, terminal_price, values=None):
+        """Backward solve of horizon slots ``lo..hi-1`` from ``start_soc``.
+
+        Pass ``values`` to roll out an already-solved cost-to-go table (e.g. the
+        tail of a longer horizon with the same terminal price) instead of
+        solving it again. Returns ``(path, values)``; ``path`` uses horizon slot
+        indices and is None when no feasible plan exists.
+        """
+        buy, sell, net = horizon['buy'][lo:hi], horizon['sell'][lo:hi], horizon['net_load'][lo:hi]
+        slot_h = horizon['slot_duration_h']
+        starts = horizon['starts'][lo:hi] if self.cost_to_go_cache is not None else None
+        exact = values is None
+        if values is None:
+            values, exact = self._cost_to_go(buy, sell, net, slot_h, terminal_price, starts)
+        path = self._rollout(values, start_soc, buy, sell, net, slot_h)
+        if path is None and not exact:
+            # A reused table was solved for slightly different inputs and this
+            # start can't connect to it; fall back to a cold solve.
+            if starts is not None:
+                self.cost_to_go_cache.discard(starts)
+            values, _ = self._cost_to_go(buy, sell, net, slot_h, terminal_price, starts)
+            path = self._rollout(values, start_soc, buy, sell, net, slot_h)
+        if path is None:
+            return None, values
+        return [(lo + t, src, dst, grid) for t, src, dst, grid in path], values
+
+    # ------------------------------------------------------------------ #
+    # Optimization
+    # ------------------------------------------------------------------ #
+    def _prepare_horizon(self, price_data, load_forecast=None, pv_forecast=None):
+        """Normalise, expand and future-filter the price horizon.
+
+        Returns a dict of per-slot arrays shared by every candidate plan
+        (``slots``, ``starts``, ``buy``, ``sell``, ``net_load``) plus
+        ``slot_duration_h``/``slot_seconds``, or None when nothing is plannable.
+        """
+        if not price_data:
+            logging.warning("AI_ESS: No price data available for optimization.")
+            return None
+
+        if isinstance(price_data, PriceHorizon):
+            # Already parsed, sorted and its slot length measured once per fetch.
+            normalised = [{'start': s, 'total': t, 'level': lv}
+                          for s, t, lv in zip(price_data.starts, price_data.totals, price_data.levels)]
+            native_slot_h = price_data.slot_seconds / 3600.0 if len(normalised) > 1 else 1.0
+        else:
+            # Normalise timestamps and sort chronologically.
+            normalised = []
+            for p in price_data:
+                try:
+                    normalised.append({
+                        'start': _coerce_datetime(p['start']),
+                        'total': float(p['total']),
+                        'level': p.get('level'),
+                    })
+                except (KeyError, TypeError, ValueError) as e:
+                    logging.warning("AI_ESS: Skipping malformed price point %s (%s).", p, e)
+            normalised.sort(key=lambda x: x['start'])
+            native_slot_h = self._detect_slot_duration_h(normalised) if len(normalised) > 1 else 1.0
+        if not normalised:
+            logging.warning("AI_ESS: No usable price points after normalisation.")
+            return None
+
+        tzinfo = normalised[0]['start'].tzinfo
+        now = datetime.now(tzinfo)
+
+        # Planning resolution: sub-divide each native price slot when a finer
+        # target resolution is configured (e.g. 15-min planning over hourly
+        # prices). When native data is already finer, k == 1.
+        target_h = max(self.slot_minutes, 1.0) / 60.0
+        k = max(1, int(round(native_slot_h / target_h))) if target_h > 0 else 1
+        slot_duration_h = native_slot_h / k
+        slot_seconds = int(round(slot_duration_h * 3600))
+
+        # Expand native price slots into (optionally finer) planning slots,
+        # distributing per-slot forecasts evenly across the sub-slots.
+        avg_native_load = self.daily_load_kwh * (native_slot_h / 24.0)
+        expanded = []
+        for idx, p in enumerate(normalised):
+            native_load = self._lookup_forecast(load_forecast, idx, p['start'], avg_native_load)
+            native_pv = self._lookup_forecast(pv_forecast, idx, p['start'], 0.0)
+            for j in range(k):
+                sub_start = p['start'] + timedelta(hours=slot_duration_h * j)
+                expanded.append({
+                    'start': sub_start,
+                    'buy': p['total'],
+                    'load': native_load / k,
+                    'pv': native_pv / k,
+                })
+
+        # Keep the slot whose window still contains "now" plus all future slots.
+        keep_after = now - timedelta(hours=slot_duration_h)
+        future_prices = [p for p in expanded if p['start'] > keep_after]
+
+        if not future_prices:
+            logging.warning("AI_ESS: No future price data.")
+            return None
+
+        # Precompute buy/sell prices and net AC load per slot.
+        buy_prices = [p['buy'] for p in future_prices]
+        return {
+            'slots': future_prices,
+            'starts': [p['start'] for p in future_prices],
+            'buy': buy_prices,
+            'sell': [self._sell_price(b) for b in buy_prices],
+            'net_load': [p['load'] - p['pv'] for p in future_prices],
+            'slot_duration_h': slot_duration_h,
+            'slot_seconds': slot_seconds,
+        }
+
+    def _terminal_price(self, horizon, lo, hi):
+        """Value per usable kWh left in the battery after slot ``hi - 1``.
+
+        Stored energy is valued only when the known horizon crosses a day
+        boundary. If Tibber has not published tomorrow yet, a same-day-only
+        evening horizon should still sell profitable energy instead of
+        retaining it through midnight for an unknown day.
+        """
+        horizon_dates = {s.date() for s in horizon['starts'][lo:hi]}
+        if len(horizon_dates) <= 1:
+            return 0.0
+        buy_prices = horizon['buy'][lo:hi]
+        terminal_price = sum(buy_prices) / len(buy_prices) * self.terminal_value_factor
+        if self.expected_peak_price > 0:
+            terminal_price = max(terminal_price, self.expected_peak_price)
+        return terminal_price
+
+    def _plan_from_path(self, horizon, path):
+        """Build the per-slot schedule from the optimal transitions and post-process it."""
+        schedule = []
+        for t, prev, curr, grid_energy in path:
+            slot = horizon['slots'][t]
+            prev_soc, curr_soc = self.soc_states[prev], self.soc_states[curr]
+            buy = slot['buy']
             action = self._classify_action(prev_soc, curr_soc, grid_energy)
-            schedule.insert(0, {
-                'time': future_prices[t - 1]['start'],
+            schedule.append({
+                'time': slot['start'],
                 'action': action,
                 'soc_start': prev_soc,
                 'soc_end': curr_soc,
                 'grid_energy': round(grid_energy, 4),       # + import / − export (kWh)
-                'pv': round(future_prices[t - 1].get('pv', 0.0), 4),     # production (kWh)
-                'load': round(future_prices[t - 1].get('load', 0.0), 4), # consumption (kWh)
+                'pv': round(slot.get('pv', 0.0), 4),     # production (kWh)
+                'load': round(slot.get('load', 0.0), 4), # consumption (kWh)
                 'price': buy,
                 'sell': round(self._sell_price(buy), 4),
             })
-            curr_soc = prev_soc
 
         if not schedule:
             logging.warning("AI_ESS: Backtrack produced an empty schedule.")
             return None
 
-        return self._post_process(schedule, slot_seconds)
+        return self._post_process(schedule, horizon['slot_seconds'])
+
+    def optimize(self, current_soc_percent, price_data, load_forecast=None, pv_forecast=None):
+        """Compute the optimal plan.
+
+        :param current_soc_percent: current battery SoC (0-100)
+        :param price_data: a PriceHorizon, or a list of {'start': datetime|str, 'total': float, ...}
+        :param load_forecast: optional list of per-slot load (kWh)
+        :param pv_forecast: optional list of per-slot PV generation (kWh)
+        :return: dict with schedule, victron_slots, setpoint, limit_feed_in,
+                 current_price - or None when no feasible plan exists.
+        """
+        horizon = self._prepare_horizon(price_data, load_forecast, pv_forecast)
+        if horizon is None:
+            return None
+
+        buy_prices, sell_prices = horizon['buy'], horizon['sell']
+        net_loads, slot_duration_h = horizon['net_load'], horizon['slot_duration_h']
+        terminal_price = self._terminal_price(horizon, 0, len(buy_prices))
+        start_soc = self._snap_soc(current_soc_percent)
+
+        if self.dp_kernel == 'reference':
+            path = self._backtrack(*self._dp_reference(
+                start_soc, buy_prices, sell_prices, net_loads, slot_duration_h), terminal_price)
+        elif self.cost_to_go_cache is not None:
+            # Same optimal cost as the forward kernels; an exact cost tie may be
+            # settled on a different, equally cheap schedule.
+            path, _ = self._solve_backward(start_soc, horizon, 0, len(buy_prices), terminal_price)
+        else:
+            path = self._backtrack(*self._dp_vectorized(
+                start_soc, buy_prices, sell_prices, net_loads, slot_duration_h), terminal_price)
+
+        if path is None:
+            logging.error("AI_ESS: No feasible schedule found.")
+            return None
+
+        return self._plan_from_path(horizon, path)
+
+    def _solve_segment(self, start_soc, horizon, lo, hi, terminal_price):
+        """Forward solve of horizon slots ``lo..hi-1`` with the configured ``dp_kernel``."""
+        solve = self._dp_reference if self.dp_kernel == 'reference' else self._dp_vectorized
+        path = self._backtrack(*solve(
+            start_soc, horizon['buy'][lo:hi], horizon['sell'][lo:hi],
+            horizon['net_load'][lo:hi], horizon['slot_duration_h']), terminal_price)
+        if path is None:
+            return None
+        return [(lo + t, src, dst, grid) for t, src, dst, grid in path]
 
     def optimize_with_daily_policy(self, current_soc_percent, price_data,
                                    load_forecast=None, pv_forecast=None,
@@ -795,68 +1366,65 @@ class OptimizationEngine:
         the projected end SoC. The selector chooses full-horizon only when its
         future advantage is large relative to today's sacrifice, learned history,
         and forecast risk.
+
+        All candidates share one normalised/expanded horizon. Without a warm-start
+        cache each is a forward solve, so plans match ``dp_kernel='reference'``
+        exactly. With one (``cost_to_go_cache``) they are solved backwards and the
+        future leg reuses the full-horizon cost-to-go whenever its terminal price
+        matches; only today's short segment needs its own pass. As in ``optimize``,
+        a backward solve may settle an exact cost tie on a different, equally cheap
+        schedule than the forward kernels.
         """
-        full = self.optimize(current_soc_percent, price_data, load_forecast, pv_forecast)
+        horizon = self._prepare_horizon(price_data, load_forecast, pv_forecast)
+        if horizon is None:
+            return None
+
+        steps = len(horizon['buy'])
+        start_soc = self._snap_soc(current_soc_percent)
+        full_terminal = self._terminal_price(horizon, 0, steps)
+        backward = self.dp_kernel != 'reference' and self.cost_to_go_cache is not None
+        if not backward:
+            full_path = self._solve_segment(start_soc, horizon, 0, steps, full_terminal)
+            full_values = None
+        else:
+            full_path, full_values = self._solve_backward(
+                start_soc, horizon, 0, steps, full_terminal)
+        if full_path is None:
+            logging.error("AI_ESS: No feasible schedule found.")
+            return None
+        full = self._plan_from_path(horizon, full_path)
         if not full:
             return full
 
         model = opportunity_model or _opportunity_model_from_history()
-        schedule = full.get('schedule') or []
-        horizon_days = sorted({
-            d for d in (_date_key(s.get('time')) for s in schedule)
-            if d is not None
-        })
-        if len(horizon_days) <= 1:
+        first_day = horizon['starts'][0].date()
+        split = next((t for t, s in enumerate(horizon['starts']) if s.date() > first_day), steps)
+        if split == steps:
             _, policy = _select_daily_settlement_candidate(full, full, model)
             out = dict(full)
             out['planning_policy'] = policy
             return out
 
-        first_day = horizon_days[0]
-        normalised = []
-        for idx, p in enumerate(price_data or []):
-            try:
-                normalised.append((idx, {
-                    'start': _coerce_datetime(p['start']),
-                    'total': float(p['total']),
-                    'level': p.get('level'),
-                }))
-            except (KeyError, TypeError, ValueError) as e:
-                logging.debug("AI_ESS: Skipping malformed policy price point %s (%s).", p, e)
-        normalised.sort(key=lambda item: item[1]['start'])
-
-        today_items = [(idx, p) for idx, p in normalised if p['start'].date() == first_day]
-        future_items = [(idx, p) for idx, p in normalised if p['start'].date() > first_day]
-        if not today_items or not future_items:
-            _, policy = _select_daily_settlement_candidate(full, None, model)
-            out = dict(full)
-            out['planning_policy'] = policy
-            return out
-
-        today_indices = [idx for idx, _ in today_items]
-        future_indices = [idx for idx, _ in future_items]
-        today_prices = [p for _, p in today_items]
-        future_prices = [p for _, p in future_items]
-
-        today_plan = self.optimize(
-            current_soc_percent,
-            today_prices,
-            _filter_forecast_for_indices(load_forecast, today_indices),
-            _filter_forecast_for_indices(pv_forecast, today_indices),
-        )
+        future_terminal = self._terminal_price(horizon, split, steps)
+        if not backward:
+            today_path = self._solve_segment(start_soc, horizon, 0, split, 0.0)
+        else:
+            today_path, _ = self._solve_backward(start_soc, horizon, 0, split, 0.0)
+        today_plan = self._plan_from_path(horizon, today_path) if today_path else None
         if not today_plan or not today_plan.get('schedule'):
             _, policy = _select_daily_settlement_candidate(full, None, model)
             out = dict(full)
             out['planning_policy'] = policy
             return out
 
-        future_start_soc = today_plan['schedule'][-1]['soc_end']
-        future_plan = self.optimize(
-            future_start_soc,
-            future_prices,
-            _filter_forecast_for_indices(load_forecast, future_indices),
-            _filter_forecast_for_indices(pv_forecast, future_indices),
-        )
+        future_start_soc = self.soc_states[today_path[-1][2]]
+        if not backward:
+            future_path = self._solve_segment(future_start_soc, horizon, split, steps, future_terminal)
+        else:
+            shared = full_values[split:] if future_terminal == full_terminal else None
+            future_path, _ = self._solve_backward(
+                future_start_soc, horizon, split, steps, future_terminal, values=shared)
+        future_plan = self._plan_from_path(horizon, future_path) if future_path else None
         if not future_plan or not future_plan.get('schedule'):
             _, policy = _select_daily_settlement_candidate(full, None, model)
             out = dict(full)
@@ -1147,6 +1715,9 @@ class OptimizationEngine:
 
 def optimize_schedule(current_soc, price_data, load_forecast=None, pv_forecast=None):
     engine = OptimizationEngine()
+    # Warm-start from the previous cycle's cost-to-go (on by default).
+    if _safe_float('OPTIMIZER_WARM_START', 1.0) != 0:
+        engine.cost_to_go_cache = _COST_TO_GO_CACHE
     # Refuse to plan a sale of stored energy below what it cost to store it. The
     # basis is persisted across re-plans/restarts (best-effort; never blocks).
     try:
@@ -1154,7 +1725,10 @@ def optimize_schedule(current_soc, price_data, load_forecast=None, pv_forecast=N
         engine.set_cost_basis_floor(ess_cost_basis.current_basis())
     except Exception as e:  # pragma: no cover - defensive
         logging.warning("AI_ESS: cost-basis floor unavailable (%s); planning without it.", e)
-    return engine.optimize_with_daily_policy(current_soc, price_data, load_forecast, pv_forecast)
+    result = engine.optimize_with_daily_policy(current_soc, price_data, load_forecast, pv_forecast)
+    if result and engine.cost_to_go_cache is not None:
+        result['optimizer_cache'] = engine.cost_to_go_cache.stats()
+    return result
 
 
 def format_plan_summary(result, *, batt_soc=None, source="", price_points=None,
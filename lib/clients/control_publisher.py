@@ -0,0 +1,190 @@
+"""
+Long-lived QoS1 control-plane connection to the Cerbo GX broker.
+
+Victron writes (W/ setpoints, ESS limits, inverter mode, charge voltage) used
+``paho.mqtt.publish.single``, which opens a TCP connection and MQTT session per
+message. Setpoint tracking can write on every ``ac_out_power`` event, so that
+churned connections on the Cerbo's small CPU. :class:`ControlPublisher` keeps one
+session open instead:
+
+* paho's network thread (``loop_start``) reconnects with backoff.
+* Writes made while the link is down are held per topic, latest value wins, and
+  sent once the session is back, so an outage during setpoint tracking replays
+  one current value per topic instead of a backlog of stale setpoints. paho's own
+  queue (messages it accepted before the drop was noticed) is capped as well.
+* Every QoS1 publish is tracked by message id until its PUBACK, so the number of
+  writes in flight and the publish-to-ack latency can be reported.
+"""
+import random
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from lib.constants import logging, cerboGxEndpoint
+
+
+class ControlPublisher:
+    """One persistent publisher session to the Cerbo GX (see module docstring)."""
+
+    def __init__(self, host=cerboGxEndpoint, port=1883, keepalive=60,
+                 client_id=f"cerbomoticzgx_control-{random.randint(100000, 999999)}", client=None,
+                 max_queued=32):
+        self.host = host
+        self.port = port
+        self._lock = threading.RLock()
+        self._inflight = {}     # mid -> (topic, published_at)
+        self._early_acks = {}   # mid -> acked_at, for PUBACKs that beat the bookkeeping
+        self._pending = {}      # topic -> (payload, qos, retain, held_at), held while disconnected
+        self.connected = False
+        self.connects = 0
+        self.published = 0
+        self.acked = 0
+        self.superseded = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        self.client = client or mqtt.Client(client_id=client_id, reconnect_on_failure=True)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        if client is None:
+            self.client.max_queued_messages_set(max_queued)
+            self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+            self.client.connect_async(host=host, port=port, keepalive=keepalive)
+            self.client.loop_start()
+
+    def _on_connect(self, _client, _userdata, _flags, rc):
+        if rc == 0:
+            # Flip to connected and send the held writes under the lock, so a write made
+            # meanwhile cannot overtake the older held value for its topic.
+            with self._lock:
+                self.connected = True
+                self.connects += 1
+                pending, self._pending = self._pending, {}
+                for topic, (payload, qos, retain, held_at) in pending.items():
+                    self._send(topic, payload, qos, retain, held_at)
+            logging.info(f"ControlPublisher: connected to {self.host}:{self.port} (connect #{self.connects}"
+                         f"{f', sent {len(pending)} held write(s)' if pending else ''}).")
+        else:
+            logging.warning(f"ControlPublisher: connect to {self.host} refused: {mqtt.connack_string(rc)}")
+
+    def _on_disconnect(self, _client, _userdata, rc):
+        self.connected = False
+        if rc != 0:
+            logging.info(f"ControlPublisher: disconnected unexpectedly ({mqtt.error_string(rc)}); reconnecting.")
+
+    def _record_ack(self, published_at, acked_at):
+        elapsed = acked_at - published_at
+        self.acked += 1
+        self._latency_total += elapsed
+        self._latency_max = max(self._latency_max, elapsed)
+
+    def _on_publish(self, _client, _userdata, mid):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._inflight.pop(mid, None)
+            if entry is None:
+                self._early_acks[mid] = now
+            else:
+                self._record_ack(entry[1], now)
+
+    def publish(self, topic, payload, qos=1, retain=False) -> bool:
+        """Send ``payload`` on ``topic``; False only when the write was rejected.
+
+        While disconnected a QoS1 write is held (replacing any held write for the same
+        topic) and sent on reconnect, so that is not an error.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self.published += 1
+            if not self.connected and qos > 0:
+                self.superseded += topic in self._pending
+                self._pending[topic] = (payload, qos, retain, started)
+                return True
+        return self._send(topic, payload, qos, retain, started)
+
+    def _send(self, topic, payload, qos, retain, started) -> bool:
+        info = self.client.publish(topic, payload=payload, qos=qos, retain=retain)
+        # paho queues a QoS1 message if the link dropped before on_disconnect ran.
+        ok = info.rc == mqtt.MQTT_ERR_SUCCESS or (info.rc == mqtt.MQTT_ERR_NO_CONN and qos > 0)
+        # paho's network thread calls _on_publish while holding its own message lock,
+        # so from other threads the id is recorded after publish() returns, never around it.
+        with self._lock:
+            if not ok:
+                self.errors += 1
+                logging.error(f"ControlPublisher: publish to {topic} failed: {mqtt.error_string(info.rc)}")
+                return False
+            acked_at = self._early_acks.pop(info.mid, None)
+            if acked_at is not None:
+                self._record_ack(started, acked_at)
+            else:
+                self._inflight[info.mid] = (topic, started)
+        return True
+
+    def flush(self, timeout=5.0) -> bool:
+        """Wait up to ``timeout`` seconds for every in-flight write to be acknowledged."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._inflight:
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def close(self, timeout=5.0):
+        """Flush in-flight writes, then disconnect and stop the network thread."""
+        if not self.flush(timeout):
+            logging.warning(f"ControlPublisher: closing with {len(self._inflight)} unacknowledged write(s).")
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            oldest = min((t for _topic, t in self._inflight.values()), default=None)
+            return {
+                'connected': self.connected,
+                'connects': self.connects,
+                'published': self.published,
+                'acked': self.acked,
+                'held': len(self._pending),
+                'superseded': self.superseded,
+                'in_flight': len(self._inflight),
+                'oldest_in_flight_s': round(now - oldest, 3) if oldest is not None else None,
+                'errors': self.errors,
+                'ack_ms_avg': round(self._latency_total / (self.acked or 1) * 1000.0, 3),
+                'ack_ms_max': round(self._latency_max * 1000.0, 3),
+            }
+
+
+_PUBLISHER = None
+_PUBLISHER_LOCK = threading.Lock()
+
+
+def get_control_publisher():
+    """The process-wide ControlPublisher, connected to CERBOGX_IP on first use."""
+    global _PUBLISHER
+    with _PUBLISHER_LOCK:
+        if _PUBLISHER is None:
+            _PUBLISHER = ControlPublisher()
+        return _PUBLISHER
+
+
+def control_publish(topic, payload, qos=1, retain=False) -> bool:
+    """Publish one write to the Cerbo GX over the shared control session."""
+    return get_control_publisher().publish(topic, payload, qos=qos, retain=retain)
+
+
+def close_control_publisher(timeout=5.0):
+    global _PUBLISHER
+    with _PUBLISHER_LOCK:
+        publisher, _PUBLISHER = _PUBLISHER, None
+    if publisher is not None:
+        publisher.close(timeout)
+
+
+def control_publish_stats():
+    return _PUBLISHER.stats() if _PUBLISHER is not None else {}
@@ -4,8 +4,9 @@ import time
 import random
 import paho.mqtt.client as mqtt
 
-from lib.constants import retrieve_mqtt_subcribed_topics, logging, DzEndpoints, mosquittoEndpoint, systemId0
-from lib.domoticz_updater import domoticz_update
+from lib.constants import retrieve_mqtt_subcribed_topics, logging, mosquittoEndpoint, systemId0
+from lib.domoticz_updater import domoticz_push
+from lib.event_dispatcher import get_dispatcher
 
 class VictronClient:
     """
@@ -29,6 +30,9 @@ class VictronClient:
         self.keepalive = keepalive
         self.port = port
         self.ka_thread = None
+        self.events = None
+        self.routes = None
+        self.dispatcher = None
         self.client = self._configure_client()
 
     def get_client(self):
@@ -75,6 +79,9 @@ class VictronClient:
 
         self._start_keepalive()
 
+        if self.routes is None:
+            self._build_routes()
+
         for topic in retrieve_mqtt_subcribed_topics():
             if _client.subscribe(topic):
                 logging.info(f"MQTT Client Subscribed to: {topic}")
@@ -86,10 +93,19 @@ class VictronClient:
         else:
             logging.info(f"MQTT Client disconnected unexpectedly. Return code: {_rc}, Reason: {mqtt.error_string(_rc)}")
 
-    @staticmethod
-    def _on_message(_client, _userdata, msg):
+    def _build_routes(self):
+        """Compile the topic routing table once (see Event.routes)."""
         from lib.event_handler import Event
 
+        self.events = Event()
+        self.routes = self.events.routes()
+        self.dispatcher = get_dispatcher()
+
+    def stop_dispatcher(self):
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+
+    def _on_message(self, _client, _userdata, msg):
         if msg and msg.payload:
             try:
                 # grab topic and payload from message
@@ -99,17 +115,30 @@ class VictronClient:
                 # Attempt to extract 'value', fall back to entire payload if 'value' is not present
                 value = payload.get('value', payload)
 
-                # format a  logging message
-                logmsg = f"{' '.join(topic.rsplit('/', 3)[1:3])}: {value}"
-                logging.debug(logmsg)
-
-                if topic and value is not None:
-                    # capture and dispatch events which should update Domoticz
-                    if topic in DzEndpoints['system0']:
-                        domoticz_update(topic, value, logmsg)
-
-                    # capture and dispatch all events to the event handler
-                    Event(topic, value, logmsg).dispatch()
+                if not topic or value is None:
+                    return
+
+                if self.routes is None:
+                    self._build_routes()
+                route = self.routes.get(topic)
+                if route is None:
+                    logging.debug(f"mqtt_client_factory: no route for topic '{topic}'")
+                    return
+
+                logmsg = None
+                if route.dz_endpoint or logging.getLogger().isEnabledFor(logging.DEBUG):
+                    # format a  logging message
+                    logmsg = f"{' '.join(topic.rsplit('/', 3)[1:3])}: {value}"
+                    logging.debug(logmsg)
+
+                # capture and queue events which should update Domoticz (sent in the background)
+                if route.dz_endpoint:
+                    domoticz_push(route.dz_endpoint, route.converter, value, logmsg, topic)
+
+                # record the value now; the handler runs off the network thread
+                self.events.record(route, value)
+                if route.handler is not None:
+                    self.dispatcher.submit(route.key, self.events.handle, route, value)
 
             except Exception as E:
                 logging.info(f"mqtt_client_factory: error processing new message: {E}")
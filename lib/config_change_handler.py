@@ -5,6 +5,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from dotenv import dotenv_values
 from lib.config_paths import env_path as runtime_env_path
+from lib.config_retrieval import invalidate_settings_cache
 from lib.helpers import publish_message
 from lib.constants import logging
 
@@ -63,6 +64,8 @@ class ConfigWatcher(FileSystemEventHandler):
             self._debounced_check()
 
     def check_changes(self):
+        invalidate_settings_cache()
+
         current_values = dotenv_values(str(self.env_path))
         for key, original_value in self._cache.items():
             current_value = current_values.get(key)
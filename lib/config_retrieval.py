@@ -1,3 +1,5 @@
+import os
+
 from dotenv import dotenv_values
 
 from lib.config_paths import env_path, secrets_path
@@ -7,6 +9,30 @@ from lib.helpers import publish_message
 STATE = GlobalStateClient()
 
 
+def _env_stamp(path):
+    try:
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return path, None, None
+
+
+def _env_values():
+    """Parsed .env, re-read only when the file's path, mtime or size changes."""
+    current_env_path = env_path()
+    stamp = _env_stamp(current_env_path)
+    cached = getattr(retrieve_setting, "_env", None)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, dotenv_values(current_env_path))
+        retrieve_setting._env = cached
+    return cached[1]
+
+
+def invalidate_settings_cache():
+    """Force the next lookup to re-read .env (e.g. after ConfigWatcher saw an edit)."""
+    retrieve_setting._env = None
+
+
 def retrieve_setting(env_variable):
     # Load secret values once and cache them
     current_secrets_path = secrets_path()
@@ -27,9 +53,11 @@ def retrieve_setting(env_variable):
     except Exception:
         pass
 
-    # Dynamically fetch the latest value from .env and update config topic
-    current_env_values = dotenv_values(env_path())
-    requested_value = current_env_values.get(env_variable)
+    # Fetch the latest value from .env and update the config topic when it changed
+    requested_value = _env_values().get(env_variable)
     if requested_value is not None:
-        publish_message(topic=f"Cerbomoticzgx/config/{env_variable}", message=requested_value, retain=True)
+        published = retrieve_setting.__dict__.setdefault("_published", {})
+        if published.get(env_variable) != requested_value:
+            publish_message(topic=f"Cerbomoticzgx/config/{env_variable}", message=requested_value, retain=True)
+            published[env_variable] = requested_value
     return requested_value
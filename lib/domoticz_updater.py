@@ -1,9 +1,10 @@
 import json
 import re
+import threading
+import time
 import urllib3
 
-from lib.helpers import get_topic_key
-from lib.constants import DzEndpoints, logging, mqtt_msg_value_conversion, systemId0
+from lib.constants import Topics, DzEndpoints, logging, mqtt_msg_value_conversion
 from lib.config_retrieval import retrieve_setting
 
 http = urllib3.PoolManager(num_pools=10, maxsize=25)
@@ -80,25 +81,147 @@ def handle_response(response, logmsg, topic):
         logging.info(f"Timeout while attempting to update Domoticz with data from {topic}. (HTTP: {code})")
 
 
+def _compile_routes():
+    """topic -> (Domoticz endpoint, value converter) for every Domoticz-fed topic."""
+    topic_keys = {topic: key for key, topic in Topics['system0'].items()}
+    routes = {}
+    for system_id in ('system0', 'vehicle0'):
+        for topic, endpoint in DzEndpoints[system_id].items():
+            routes[topic] = (endpoint, mqtt_msg_value_conversion.get(topic_keys.get(topic)))
+    return routes
+
+
+_routes = _compile_routes()
+
+
 def domoticz_update(topic, value, logmsg):
-    # apply value conversions for domoticz if needed
-    if mqtt_msg_value_conversion.get(get_topic_key(topic)):
-        value = mqtt_msg_value_conversion.get(get_topic_key(topic))(value=value)
+    endpoint, converter = _routes.get(topic, (None, None))
+    if endpoint is None:
+        logging.info(f"dz_updater (ERROR): no Domoticz endpoint for {topic}")
+        return
+    domoticz_push(endpoint, converter, value, logmsg, topic)
 
-    # It's an update from the victron integration
-    if systemId0 in topic:
-        try:
-            _response = http.request('GET', f"{DzEndpoints['system0'][topic]}{value}")
-            handle_response(_response, logmsg, topic)
 
-        except Exception as E:
-            logging.info(f"dz_updater (ERROR): {E}")
+def domoticz_push(endpoint, converter, value, logmsg, topic):
+    """Queue one value for a resolved Domoticz endpoint (see Event.routes); DomoticzSink sends it."""
+    try:
+        # apply value conversions for domoticz if needed
+        if converter:
+            value = converter(value=value)
+        get_sink().push(endpoint, value, logmsg, topic)
 
-    # It's an update from the Tesla integration
-    else:
+    except Exception as E:
+        logging.info(f"dz_updater (ERROR): {E}")
+
+
+class DomoticzSink:
+    """
+    Background Domoticz writer. Updates are keyed on the device endpoint (one idx
+    per endpoint) and only the latest value per device is kept: a value arriving
+    while one is pending replaces it (merged). Every ``interval`` seconds the
+    pending values are sent over the pooled keep-alive connections with a timeout,
+    so a slow or unreachable Domoticz delays its own updates, never the MQTT
+    thread. Beyond ``max_pending`` devices new ones are dropped. With an interval
+    of 0 every update is sent inline, as before.
+    """
+
+    def __init__(self, interval=5.0, max_pending=256, timeout=5.0):
+        self.interval = max(0.0, float(interval))
+        self.max_pending = max(1, int(max_pending))
+        self.timeout = urllib3.Timeout(connect=min(2.0, timeout), read=timeout)
+        self._lock = threading.Lock()
+        self._pending = {}  # endpoint -> (value, logmsg, topic)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._last_flush_s = 0.0
+
+    def push(self, endpoint, value, logmsg, topic):
+        if self.interval == 0:
+            self._send(endpoint, value, logmsg, topic)
+            return
+        with self._lock:
+            if endpoint in self._pending:
+                self.merged += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending[endpoint] = (value, logmsg, topic)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="DomoticzSink", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        started = time.monotonic()
+        for endpoint, (value, logmsg, topic) in pending.items():
+            self._send(endpoint, value, logmsg, topic)
+        self._last_flush_s = time.monotonic() - started
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout.read_timeout + 1.0)
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.info(f"dz_updater (ERROR): flush failed: {e}")
+
+    def _send(self, endpoint, value, logmsg, topic):
+        started = time.monotonic()
         try:
-            _response = http.request('GET', f"{DzEndpoints['vehicle0'][topic]}{value}")
+            _response = http.request('GET', f"{endpoint}{value}", timeout=self.timeout, retries=False)
             handle_response(_response, logmsg, topic)
-
+            failed = _response.status != 200
         except Exception as E:
+            failed = True
             logging.info(f"dz_updater (ERROR): {E}")
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.sent += 1
+            self.errors += failed
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_s': self.interval,
+                'pending': len(self._pending),
+                'sent': self.sent,
+                'merged': self.merged,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'latency_ms_avg': round(self._latency_total / (self.sent or 1) * 1000.0, 3),
+                'latency_ms_max': round(self._latency_max * 1000.0, 3),
+                'last_flush_ms': round(self._last_flush_s * 1000.0, 3),
+            }
+
+
+_SINK = None
+
+
+def get_sink():
+    """The process-wide DomoticzSink, flushing every DZ_FLUSH_INTERVAL_S seconds (default 5)."""
+    global _SINK
+    if _SINK is None:
+        try:
+            interval = float(retrieve_setting('DZ_FLUSH_INTERVAL_S') or 5.0)
+        except (TypeError, ValueError):
+            interval = 5.0
+        _SINK = DomoticzSink(interval=interval)
+    return _SINK
+
+
+def domoticz_stats():
+    return _SINK.stats() if _SINK is not None else {}
@@ -2,18 +2,20 @@ import time
 import threading
 import schedule as scheduler
 
-from paho.mqtt import publish
+from lib.clients.control_publisher import control_publish
 from lib.config_retrieval import retrieve_setting
-from lib.constants import cerboGxEndpoint, systemId0
+from lib.constants import systemId0
 from lib.constants import logging, PythonToVictronWeekdayNumberConversion
-from lib.helpers import get_seasonally_adjusted_max_charge_slots, calculate_max_discharge_slots_needed, publish_message, round_up_to_nearest_10, remove_message, current_min_soc_reserve, clear_victron_schedules as _clear_victron_schedules_helper
+from lib.helpers import get_seasonally_adjusted_max_charge_slots, calculate_max_discharge_slots_needed, publish_message, round_up_to_nearest_10, remove_message, current_min_soc_reserve
 from lib.tibber_api import lowest_48h_prices, lowest_24h_prices
 from lib.notifications import pushover_notification
-from lib.tibber_api import publish_pricing_data, get_all_price_points
+from lib.tibber_api import publish_pricing_data, get_price_horizon
 from lib.global_state import GlobalStateClient
 from lib.victron_integration import ac_power_setpoint, limit_grid_feed_in, set_minimum_ess_soc
+from lib.victron_schedule import charge_slot_fields, get_schedule_sync
 from lib.ai_powered_ess import optimize_schedule
 from lib import history_store as _hist
+from lib import slot_profile as _slot_profile
 
 STATE = GlobalStateClient()
 
@@ -590,19 +592,15 @@ def schedule_victron_ess_charging(hour, schedule=0, duration=3600, day=0):
     if hour > 23:
         raise Exception("OoBError: hour must be an integer between 0 and 23")
 
-    topic_stub = f"W/{systemId0}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/{schedule}/"
     soc = 100
     start = hour * 3600
 
-    publish_message(f"{topic_stub}Duration", payload=f"{{\"value\": {duration}}}", retain=True)
-    publish_message(f"{topic_stub}Soc", payload=f"{{\"value\": {soc}}}", retain=True)
-    publish_message(f"{topic_stub}Start", payload=f"{{\"value\": {start}}}", retain=True)
-    publish_message(f"{topic_stub}Day", payload=f"{{\"value\": {weekday}}}", retain=True)
+    get_schedule_sync().program_slot(schedule, {"Duration": duration, "Soc": soc, "Start": start, "Day": weekday})
 
     logging.info(f"EnergyBroker: Adding schedule entry for day:{weekday}, duration:{duration}, start: {start}")
 
 def clear_victron_schedules():
-    _clear_victron_schedules_helper()
+    get_schedule_sync().clear()
 
 def push_notification(hour, day, price):
     topic = f"Energy Broker Alert"
@@ -637,31 +635,11 @@ def _pv_shape_by_slot(days: int = 3) -> dict:
     absolute generation. Returns {} when no usable history (caller falls back to
     an even spread).
     """
-    import os
-    import json
-    from datetime import datetime as _dt, timedelta as _td
-
     try:
         history_dir = retrieve_setting('HISTORY_DIR') or 'data/history'
-        buckets = {}
-        today = _dt.now().date()
-        for i in range(max(1, days)):
-            d = today - _td(days=i)
-            for r in _hist.read_day(d, history_dir):   # NDJSON hot + Parquet cold
-                if r.get('kind') == 'settlement':
-                    continue
-                pv, ts = r.get('pv_w'), r.get('ts')
-                if pv is None or ts is None:
-                    continue
-                try:
-                    when = _dt.fromisoformat(ts)
-                    if not (PV_DAYLIGHT_START_H <= when.hour < PV_DAYLIGHT_END_H):
-                        continue   # daylight only — exclude night/evening
-                    key = f"{when.hour:02d}:{(when.minute // 15) * 15:02d}"
-                    buckets.setdefault(key, []).append(max(0.0, float(pv)) / 1000.0)
-                except (TypeError, ValueError):
-                    continue
-        return {k: sum(v) / len(v) for k, v in buckets.items() if v}
+        # Per-day slot samples kept current by _append_history (lib/slot_profile).
+        return _slot_profile.slot_means(history_dir, days, 'pv',
+                                        daylight=(PV_DAYLIGHT_START_H, PV_DAYLIGHT_END_H))
     except Exception as e:
         logging.debug(f"EnergyBroker: PV shape read failed: {e}")
         return {}
@@ -1375,31 +1353,11 @@ def _historical_load_by_slot(days: int = 3) -> dict:
     during heavy battery activity (|batt_w| > 4 kW) are excluded because the
     AC-out reading is unreliable then. Returns {} when there's no usable history.
     """
-    import os
-    import json
-    from datetime import datetime as _dt, timedelta as _td
-
     try:
         history_dir = retrieve_setting('HISTORY_DIR') or 'data/history'
-        buckets = {}  # "HH:MM" -> [load_kw, ...]
-        today = _dt.now().date()
-        for i in range(max(1, days)):
-            d = today - _td(days=i)
-            for r in _hist.read_day(d, history_dir):   # NDJSON hot + Parquet cold
-                if r.get('kind') == 'settlement':
-                    continue
-                load, batt, ts = r.get('load_w'), r.get('batt_w'), r.get('ts')
-                if load is None or ts is None:
-                    continue
-                try:
-                    if batt is not None and abs(float(batt)) > 4000:
-                        continue
-                    when = _dt.fromisoformat(ts)
-                    key = f"{when.hour:02d}:{(when.minute // 15) * 15:02d}"
-                    buckets.setdefault(key, []).append(float(load) / 1000.0)
-                except (TypeError, ValueError):
-                    continue
-        return {k: sum(v) / len(v) for k, v in buckets.items() if v}
+        # Per-day slot samples kept current by _append_history (lib/slot_profile).
+        return _slot_profile.slot_means(history_dir, days, 'load',
+                                        daylight=(PV_DAYLIGHT_START_H, PV_DAYLIGHT_END_H))
     except Exception as e:
         logging.debug(f"EnergyBroker: historical load read failed: {e}")
         return {}
@@ -1622,6 +1580,7 @@ def _publish_plan_json(result, *, batt_soc, price_points, pv_remaining,
                 result.get('optimizer_guardrails') or _optimizer_guardrails_snapshot()
             ),
             'planning_policy': _json_safe(result.get('planning_policy')),
+            'optimizer_cache': result.get('optimizer_cache'),
             'victron_slots': victron_slots,
             'schedule': schedule,
         }
@@ -1663,6 +1622,11 @@ def _realized_action(grid_w, batt_w, deadband_w: int = 200) -> str:
     return "IDLE"                # PV-driven / neutral
 
 
+def _history_writer(history_dir):
+    """The open-handle NDJSON writer for ``history_dir`` (fsync policy: HISTORY_FSYNC_INTERVAL_S)."""
+    return _hist.get_writer(history_dir, _get_float_setting('HISTORY_FSYNC_INTERVAL_S', 0.0))
+
+
 def _append_history(result, *, batt_soc, applied_setpoint, today_actuals, realized_power=None) -> None:
     """Append one analytics-ready record per optimizer cycle to a per-day NDJSON
     file (one JSON object per line) under HISTORY_DIR.
@@ -1674,7 +1638,6 @@ def _append_history(result, *, batt_soc, applied_setpoint, today_actuals, realiz
     it can never affect ESS control.
     """
     import os
-    import json
     from datetime import datetime as _dt
 
     try:
@@ -1787,11 +1750,25 @@ def _append_history(result, *, batt_soc, applied_setpoint, today_actuals, realiz
                 "weather_pv_shadow_abs_delta_kwh": weather_summary.get("pv_shadow_abs_delta_kwh"),
             })
 
-        path = os.path.join(history_dir, f"ess-{now.strftime('%Y-%m-%d')}.ndjson")
-        with open(path, "a") as fh:
-            fh.write(json.dumps(record) + "\n")
+        size_before, size_after = _history_writer(history_dir).write(record, now.date())
     except Exception as e:
         logging.warning(f"AI_ESS: Failed to append history record: {e}")
+        return
+
+    _note_history_append(history_dir, now, record, size_before, size_after)
+
+
+def _note_history_append(history_dir, now, record, size_before, size_after) -> None:
+    """Advance today's slot profile past a record just appended to the history.
+
+    Every append goes through here, settlements included (they add no samples), so the
+    profile keeps covering the whole file and is not rebuilt on the next cycle.
+    """
+    try:
+        _slot_profile.add_record(history_dir, now.strftime('%Y-%m-%d'), record, size_before, size_after,
+                                 daylight=(PV_DAYLIGHT_START_H, PV_DAYLIGHT_END_H))
+    except Exception as e:
+        logging.debug(f"AI_ESS: slot profile update failed: {e}")
 
 
 # Snapshot of the previous cycle (prediction + counters) used to settle each slot.
@@ -1965,9 +1942,8 @@ def _settle_prior_slot(result, *, batt_soc, today_actuals, now=None) -> None:
                 'price_sell': pred.get('price_sell'),
                 'cost_basis_eur_per_kwh': round(cost_basis_now, 4) if cost_basis_now is not None else None,
             }
-            path = os.path.join(history_dir, f"ess-{now.strftime('%Y-%m-%d')}.ndjson")
-            with open(path, "a") as fh:
-                fh.write(json.dumps(settlement) + "\n")
+            size_before, size_after = _history_writer(history_dir).write(settlement, now.date())
+            _note_history_append(history_dir, now, settlement, size_before, size_after)
 
         # Persist this cycle's snapshot for the next settlement (atomic).
         tmp = _LAST_SLOT_PATH + '.tmp'
@@ -2024,30 +2000,15 @@ def _run_ai_optimizer_once():
             'batt_w': STATE.get('batt_power'),
         }
 
-        prices = get_all_price_points()
+        prices = get_price_horizon()
         if not prices:
             logging.warning("AI_ESS: No prices available.")
             return
 
         # 2. Build forecasts from available system data.
-        # Normalise price slot starts for the PV forecast distribution.
-        from lib.ai_powered_ess import _coerce_datetime
-        normalised_slots = []
-        for p in prices:
-            try:
-                normalised_slots.append({'start': _coerce_datetime(p['start'])})
-            except (KeyError, TypeError, ValueError):
-                continue
-        slot_duration_h = 1.0
-        if len(normalised_slots) > 1:
-            normalised_slots.sort(key=lambda x: x['start'])
-            gaps = [
-                (normalised_slots[i]['start'] - normalised_slots[i - 1]['start']).total_seconds()
-                for i in range(1, len(normalised_slots))
-            ]
-            positive_gaps = [g for g in gaps if g > 0]
-            if positive_gaps:
-                slot_duration_h = min(positive_gaps) / 3600.0
+        # The horizon's starts are already parsed and in time order.
+        normalised_slots = [{'start': start} for start in prices.starts]
+        slot_duration_h = prices.slot_seconds / 3600.0 if len(prices) > 1 else 1.0
 
         forecast_slots = _forecast_slots_for_optimizer(normalised_slots, slot_duration_h)
         pv_forecast = _build_pv_forecast_by_slot(forecast_slots, slot_duration_h)
@@ -2175,28 +2136,12 @@ def _run_ai_optimizer_once():
             batt_soc,
         )
         result['victron_slots'] = victron_slots
-        # Clear-then-program leaves a brief empty-slot window; missing a grid charge
-        # is the safe failure mode, and the next optimizer cycle self-heals it.
-        clear_victron_schedules()
-
-        for i, slot in enumerate(victron_slots):
-            if i >= 5:
-                break
-            start_dt = slot['start']
-            seconds_from_midnight = start_dt.hour * 3600 + start_dt.minute * 60
-            weekday = PythonToVictronWeekdayNumberConversion[start_dt.weekday()]
-            target_soc = int(slot.get('target_soc', 100))
-            topic_stub = f"W/{systemId0}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/{i}/"
-
-            publish_message(f"{topic_stub}Duration", payload=f"{{\"value\": {slot['duration']}}}", retain=True)
-            publish_message(f"{topic_stub}Soc", payload=f"{{\"value\": {target_soc}}}", retain=True)
-            publish_message(f"{topic_stub}Start", payload=f"{{\"value\": {seconds_from_midnight}}}", retain=True)
-            publish_message(f"{topic_stub}Day", payload=f"{{\"value\": {weekday}}}", retain=True)
-
-            logging.debug(
-                f"AI_ESS: Scheduled charge slot {i}: weekday={weekday} at {start_dt.strftime('%H:%M')} "
-                f"for {slot['duration']}s to {target_soc}% SoC"
-            )
+        # Only the fields that differ from what the slots already hold are written, and
+        # slots the plan no longer uses are disabled after the new ones are programmed.
+        schedule_writes = get_schedule_sync().sync(
+            charge_slot_fields(slot['start'], slot['duration'], slot.get('target_soc', 100))
+            for slot in victron_slots
+        )
 
         # Snapshot today's actuals once, reused by history + plan publish.
         pv_remaining = STATE.get('pv_projected_remaining')
@@ -2223,7 +2168,8 @@ def _run_ai_optimizer_once():
         # The full plan view is available via the web UI and scripts/ai_ess_dryrun.py,
         # so we keep the service log clean with a one-line summary instead of the
         # multi-line plan table.
-        charge_slot_note = ". Victron charge slots scheduled." if victron_slots else ""
+        charge_slot_note = (f". Victron charge slots scheduled ({schedule_writes} write(s))."
+                            if victron_slots else "")
         logging.info(
             "AI_ESS: Optimization complete — action=%s setpoint=%sW SoC=%.0f%% price=%.3f%s",
             result.get('control_action'), applied_setpoint,
@@ -2249,7 +2195,7 @@ class Utils:
         topic = f"W/{systemId0}/vebus/276/Mode"  # TODO: move to constants.py
 
         if mode and mode == 1 or mode == 3:
-            publish.single(topic, payload=f"{{\"value\": {mode}}}", qos=1, retain=False, hostname=cerboGxEndpoint, port=1883)
+            control_publish(topic, payload=f"{{\"value\": {mode}}}", qos=1, retain=False)
             logging.info(f"EnergyBroker.Utils.set_inverter_mode: {__name__} has set Multiplus-II's mode to {mode_name.get(mode)}")
         else:
             logging.info(f"EnergyBroker.Utils.set_inverter_mode: {__name__} Error setting mode to {mode_name.get(mode)}. This is not a valid mode.")
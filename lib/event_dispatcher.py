@@ -0,0 +1,266 @@
+"""
+Off-loop execution of MQTT topic handlers.
+
+The paho network thread only decodes a message, records it in the global state
+and queues the handler here; a small bounded pool of worker threads runs the handlers so
+a slow one (a Victron setpoint write, the energy broker, Domoticz) can no longer
+stall receipt of other topics or trip the MQTT keepalive.
+
+* Ordering: every topic runs in a serial lane, so its handler invocations never
+  overlap or reorder. Topics whose handlers drive the same control logic share
+  a lane (LANES) and keep the strict ordering they had on one thread.
+* Telemetry topics (LATEST_VALUE_WINS) collapse: while one is queued, a newer
+  message replaces its value instead of queueing another handler run. The
+  collapsed entry moves to the back of its lane, so the newer value still runs
+  after every message that arrived before it; only the superseded value is skipped.
+* Lanes are bounded (``max_lane_depth``). An overflowing lane drops its oldest
+  queued telemetry message, never a command. A command that finds its lane full
+  of commands waits up to ``command_wait_s`` for room and is then rejected
+  with an error; dropped and rejected messages are counted.
+"""
+import threading
+import time
+from collections import deque
+
+from lib.constants import logging
+
+# High-rate Victron telemetry: only the newest value matters to its handler.
+LATEST_VALUE_WINS = frozenset({
+    "batt_soc", "batt_current", "batt_voltage", "batt_power",
+    "pv_power", "pv_current", "ac_out_power", "ac_in_power",
+    "tesla_power", "tesla_l1_current", "tesla_l2_current", "tesla_l3_current",
+})
+
+# Handlers that share derived state or drive the same controls run serially with
+# respect to each other, exactly as they did on the network thread. Every other
+# topic gets a lane of its own.
+LANES = {
+    **dict.fromkeys((
+        "batt_soc", "ac_out_power", "ac_in_power", "tesla_power", "tibber_price_now",
+        "grid_charging_enabled", "ess_net_metering_enabled", "ess_net_metering_batt_min_soc",
+        "trigger_ess_charge_scheduling", "clear_ess_charge_schedule", "system_shutdown",
+        "dryer_state", "dishwasher_state",
+    ), "control"),
+    **dict.fromkeys(("batt_power", "pv_power"), "surplus"),
+    **dict.fromkeys(("tesla_l1_current", "tesla_l2_current", "tesla_l3_current"), "charging_amps"),
+}
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_LANE_DEPTH = 256
+DEFAULT_COMMAND_WAIT_S = 5.0
+
+
+def _lane(key):
+    return LANES.get(key, key)
+
+
+class EventDispatcher:
+    """Bounded worker pool with per-lane serial queues (see module docstring)."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_lane_depth=DEFAULT_MAX_LANE_DEPTH,
+                 command_wait_s=DEFAULT_COMMAND_WAIT_S):
+        self.workers = max(0, int(workers))
+        self.max_lane_depth = max(1, int(max_lane_depth))
+        self.command_wait_s = command_wait_s
+        self._lock = threading.Lock()
+        self._lanes = {}        # lane -> deque of [key, fn, args, enqueued_at]
+        self._collapsible = {}  # key -> its queued entry, for LATEST_VALUE_WINS keys
+        self._scheduled = set()
+        self._ready = deque()
+        self._wakeup = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)     # a lane gave up an entry
+        self._threads = []
+        self._stopping = False
+        self.submitted = 0
+        self.collapsed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.handled = 0
+        self.errors = 0
+        self.max_queued = 0
+        self._queued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+        self._run_max_by_key = {}
+
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers == 0:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"EventDispatcher-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        logging.info(f"EventDispatcher: started {self.workers} handler workers.")
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            self._wakeup.notify_all()
+            self._space.notify_all()
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def submit(self, key, fn, *args) -> bool:
+        """Queue ``fn(*args)`` in ``key``'s lane; runs inline when there are no workers.
+
+        Returns False when the message was not queued: telemetry dropped because its
+        lane is full of commands, or a command rejected after waiting for room.
+        """
+        if self.workers == 0:
+            self._run(key, fn, args, time.monotonic())
+            return True
+        if not self._threads:
+            self.start()
+
+        now = time.monotonic()
+        with self._lock:
+            self.submitted += 1
+            lane = _lane(key)
+            queue = self._lanes.setdefault(lane, deque())
+            if key in LATEST_VALUE_WINS:
+                entry = self._collapsible.get(key)
+                if entry is not None:
+                    entry[1], entry[2] = fn, args
+                    self.collapsed += 1
+                    if queue[-1] is not entry:
+                        # Behind anything queued since the stale value, as the new message arrived.
+                        queue.remove(entry)
+                        queue.append(entry)
+                    return True
+
+            if len(queue) >= self.max_lane_depth and not self._make_room(lane, queue, key):
+                return False
+            self._queued += 1
+            self.max_queued = max(self.max_queued, self._queued)
+
+            entry = [key, fn, args, now]
+            queue.append(entry)
+            if key in LATEST_VALUE_WINS:
+                self._collapsible[key] = entry
+            if lane not in self._scheduled:
+                self._scheduled.add(lane)
+                self._ready.append(lane)
+                self._wakeup.notify()
+        return True
+
+    def _make_room(self, lane, queue, key):
+        """Free a slot in a full lane for ``key``; called with the lock held."""
+        victim = next((entry for entry in queue if entry[0] in LATEST_VALUE_WINS), None)
+        if victim is not None or key in LATEST_VALUE_WINS:
+            if victim is not None:
+                queue.remove(victim)
+                self._forget(victim)
+                self._queued -= 1
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logging.warning(f"EventDispatcher: lane '{lane}' full; dropped {self.dropped} telemetry message(s) so far.")
+            return victim is not None
+
+        # Only commands queued: wait for the lane to drain rather than lose one.
+        deadline = time.monotonic() + self.command_wait_s
+        while len(queue) >= self.max_lane_depth and not self._stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._space.wait(remaining)
+        if len(queue) < self.max_lane_depth:
+            return True
+        self.rejected += 1
+        logging.error(f"EventDispatcher: lane '{lane}' full of commands; rejected '{key}'.")
+        return False
+
+    def _forget(self, entry):
+        if self._collapsible.get(entry[0]) is entry:
+            del self._collapsible[entry[0]]
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._ready and not self._stopping:
+                    self._wakeup.wait()
+                if self._stopping:
+                    return
+                lane = self._ready.popleft()
+                entry = self._lanes[lane].popleft()
+                self._forget(entry)
+                self._queued -= 1
+                self._space.notify_all()
+
+            key, fn, args, enqueued_at = entry
+            self._run(key, fn, args, enqueued_at)
+
+            with self._lock:
+                if self._lanes[lane]:
+                    self._ready.append(lane)
+                    self._wakeup.notify()
+                else:
+                    self._scheduled.discard(lane)
+
+    def _run(self, key, fn, args, enqueued_at):
+        started = time.monotonic()
+        try:
+            fn(*args)
+            failed = False
+        except Exception as e:
+            failed = True
+            logging.info(f"EventDispatcher: handler for '{key}' failed: {e}")
+        elapsed = time.monotonic() - started
+        waited = started - enqueued_at
+
+        with self._lock:
+            self.handled += 1
+            self.errors += failed
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._run_total += elapsed
+            self._run_max = max(self._run_max, elapsed)
+            if elapsed > self._run_max_by_key.get(key, 0.0):
+                self._run_max_by_key[key] = elapsed
+
+    def stats(self):
+        with self._lock:
+            handled = self.handled or 1
+            slowest = sorted(self._run_max_by_key.items(), key=lambda kv: kv[1], reverse=True)[:5]
+            return {
+                'workers': self.workers,
+                'queued': self._queued,
+                'max_queued': self.max_queued,
+                'queued_by_lane': {lane: len(q) for lane, q in self._lanes.items() if q},
+                'submitted': self.submitted,
+                'handled': self.handled,
+                'collapsed': self.collapsed,
+                'dropped': self.dropped,
+                'rejected': self.rejected,
+                'errors': self.errors,
+                'wait_ms_avg': round(self._wait_total / handled * 1000.0, 3),
+                'wait_ms_max': round(self._wait_max * 1000.0, 3),
+                'handler_ms_avg': round(self._run_total / handled * 1000.0, 3),
+                'handler_ms_max': round(self._run_max * 1000.0, 3),
+                'slowest_handlers_ms': {key: round(t * 1000.0, 3) for key, t in slowest},
+            }
+
+
+_DISPATCHER = None
+
+
+def get_dispatcher():
+    """The process-wide dispatcher, sized from MQTT_HANDLER_WORKERS (0 runs handlers inline)."""
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        from lib.config_retrieval import retrieve_setting
+
+        try:
+            workers = int(retrieve_setting('MQTT_HANDLER_WORKERS') or DEFAULT_WORKERS)
+        except (TypeError, ValueError):
+            workers = DEFAULT_WORKERS
+        _DISPATCHER = EventDispatcher(workers=workers)
+    return _DISPATCHER
+
+
+def dispatch_stats():
+    return _DISPATCHER.stats() if _DISPATCHER is not None else {}
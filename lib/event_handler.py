@@ -1,9 +1,10 @@
 import os
 import math
 import signal
+from collections import namedtuple
 
-from lib.helpers import get_topic_key, publish_message, is_truthy
-from lib.constants import logging
+from lib.helpers import publish_message, is_truthy
+from lib.constants import logging, Topics, DzEndpoints, mqtt_msg_value_conversion
 from lib.config_retrieval import retrieve_setting
 from lib.victron_integration import regulate_battery_max_voltage, ac_power_setpoint
 from lib.global_state import GlobalStateClient
@@ -26,39 +27,48 @@ LOAD_RESERVATION_REDUCTION_FACTOR = float(retrieve_setting("LOAD_REDUCTION_FACTO
 MINIMUM_ESS_SOC = int(float(retrieve_setting("MINIMUM_ESS_SOC") or 0)) or 100
 HOME_CONNECT_APPLIANCE_SCHEDULING = is_truthy(retrieve_setting("HOME_CONNECT_APPLIANCE_SCHEDULING"))
 
+Route = namedtuple("Route", "key handler dz_endpoint converter")
+
+
 class Event:
+    """Topic handlers. One instance serves every message: handlers receive the
+    message value as their argument and keep no per-message state."""
 
-    def __init__(self, mqtt_topic, value, logging_msg=None):
-        # map mqqt topic to a shorter friendly  name which will match the class method name as well
-        self.topic_key = get_topic_key(topic=mqtt_topic)
-        self.mqtt_topic = mqtt_topic
-        self.value = value
-        self.logging_msg = logging_msg
+    def __init__(self):
         self.gs_client = GlobalStateClient()
 
-        logging.debug(f"{self.topic_key} = {self.value}")
-
-    def dispatch(self):
-        try:
-            if self.topic_key:
-                # Update the Global State db even if we do not have an explicit method defined for this topic_key
-                self.gs_client.set(self.topic_key, self.value)
-
-                # if a method is defined, call it. Otherwise, call _unhandled_method()
-                getattr(self, self.topic_key, self._unhandled_method)()
-                logging.debug(f"{self.topic_key} method")
-            else:
-                self._unhandled_method()
-        except TypeError as e:
-            logging.info(e)
-
-    def _unhandled_method(self):
-        # if a specific handle method is not specified here for a topic, it will still get written to the
-        # global state db but will just be uncaught in this event handler.
-        logging.debug(f"{__name__}: Invalid method or nothing implemented for topic: '{self.mqtt_topic}'")
-
-    def ac_in_connected(self):
-        event = int(self.value)
+    def routes(self, system_id="system0"):
+        """Compile the MQTT routing table once: topic -> Route(key, bound handler,
+        Domoticz endpoint, Domoticz value converter). Topics without a handler
+        method are still routed so their value lands in the global state."""
+        endpoints = DzEndpoints.get(system_id, {})
+        table = {}
+        for key, topic in Topics[system_id].items():
+            # if a specific handle method is not specified here for a topic, it will still get written to the
+            # global state db but will just be uncaught in this event handler.
+            table[topic] = Route(key, getattr(self, key, None), endpoints.get(topic),
+                                 mqtt_msg_value_conversion.get(key))
+        return table
+
+    def dispatch(self, route, value):
+        self.record(route, value)
+        self.handle(route, value)
+
+    def record(self, route, value):
+        # Update the Global State db even if we do not have an explicit method defined for this topic_key
+        self.gs_client.set(route.key, value)
+
+    @staticmethod
+    def handle(route, value):
+        # if a method is defined, call it.
+        if route.handler is not None:
+            try:
+                route.handler(value)
+            except TypeError as e:
+                logging.info(e)
+
+    def ac_in_connected(self, value):
+        event = int(value)
         if event == 0:
             logging.info("AC Input: Grid is offline! This should not happen!")
             # Ensure Ac Loads are powered by ensuring Inverters on are
@@ -73,26 +83,26 @@ class Event:
         elif event == 1:
             logging.debug("AC Input: Grid is online.")
 
-    def dryer_state(self):
+    def dryer_state(self, value):
         if HOME_CONNECT_APPLIANCE_SCHEDULING:
-            handle_dryer_event(self.value)
+            handle_dryer_event(value)
 
-    def dishwasher_state(self):
+    def dishwasher_state(self, value):
         if HOME_CONNECT_APPLIANCE_SCHEDULING:
-            handle_dishwasher_event(self.value)
+            handle_dishwasher_event(value)
 
-    def ac_power_setpoint(self):
-        if float(self.value) > 0 or float(self.value) < 0:
-            logging.debug(f"AC Power Setpoint changed to {self.value}")
+    def ac_power_setpoint(self, value):
+        if float(value) > 0 or float(value) < 0:
+            logging.debug(f"AC Power Setpoint changed to {value}")
         else:
-            logging.debug(f"AC Power Setpoint reset to {self.value}")
+            logging.debug(f"AC Power Setpoint reset to {value}")
 
-    def ess_net_metering_batt_min_soc(self):
+    def ess_net_metering_batt_min_soc(self, value):
         if self.gs_client.get('ess_net_metering_batt_min_soc'):
-            logging.info(f"ESS Net Metering Min Batt SOC set to {self.value}")
+            logging.info(f"ESS Net Metering Min Batt SOC set to {value}")
             manage_sale_of_stored_energy_to_the_grid()
 
-    def ess_net_metering_enabled(self):
+    def ess_net_metering_enabled(self, value):
         if self.gs_client.get('ess_net_metering_enabled') is None:
             pass
         if self.gs_client.get('ess_net_metering_enabled'):
@@ -100,17 +110,17 @@ class Event:
         else:
             logging.info(f"ESS Net Metering is DISABLED.")
 
-    def tibber_price_now(self):
-        if self.value:
+    def tibber_price_now(self, value):
+        if value:
             try:
-                _value = float(self.value)
+                _value = float(value)
                 manage_grid_usage_based_on_current_price(_value)
                 manage_sale_of_stored_energy_to_the_grid()
             except (ValueError, TypeError) as e:
-                logging.info(f"{__name__}: Invalid tibber_price_now value '{self.value}' - {e}")
+                logging.info(f"{__name__}: Invalid tibber_price_now value '{value}' - {e}")
 
-    def system_shutdown(self):
-        _value = self.value
+    def system_shutdown(self, value):
+        _value = value
 
         if _value == "False":
             return True
@@ -123,12 +133,12 @@ class Event:
         else:
             logging.info(f"lib.event_handler: received invalid message \"{_value}\" from broker on shutdown topic. Ignoring.")
 
-    def batt_voltage(self):
-        _value = round(self.value, 2)
+    def batt_voltage(self, value):
+        _value = round(value, 2)
         publish_message("Tesla/vehicle0/solar/ess_volts", message=f"{_value}", retain=True)
 
-    def batt_soc(self):
-        _value = round(self.value, 2)
+    def batt_soc(self, value):
+        _value = round(value, 2)
         publish_message("Tesla/vehicle0/solar/ess_soc", message=f"{_value}", retain=True)
 
         if retrieve_setting('VICTRON_OPTIMIZED_CHARGING') == '1':
@@ -136,41 +146,41 @@ class Event:
         if retrieve_setting('TIBBER_UPDATES_ENABLED') == '1':
             manage_sale_of_stored_energy_to_the_grid()
 
-    def batt_power(self):
-        _value = round(self.value)
+    def batt_power(self, value):
+        _value = round(value)
         publish_message("Tesla/vehicle0/solar/ess_watts", message=f"{_value}", retain=True)
         self.calculate_surplus_watts()
 
-    def pv_power(self):
-        _value = round(self.value)
+    def pv_power(self, value):
+        _value = round(value)
         publish_message("Tesla/vehicle0/solar/pv_watts", message=f"{_value}", retain=True)
         self.calculate_surplus_watts()
 
-    def pv_current(self):
-        _value = round(self.value)
+    def pv_current(self, value):
+        _value = round(value)
         publish_message("Tesla/vehicle0/solar/pv_amps", message=f"{_value}", retain=True)
 
-    def tesla_power(self):
-        _value = round(self.value)
+    def tesla_power(self, value):
+        _value = round(value)
         self.adjust_ac_out_power()
         publish_message("Tesla/vehicle0/charging_watts", message=f"{_value}", retain=True)
         publish_message("Tesla/vehicle0/Ac/tesla_load", message=f"{_value}", retain=True)
 
-    def ac_out_power(self):
-        manage_grid_usage_based_on_current_price(price=self.gs_client.get('tibber_price_now'), power=int(self.value))
+    def ac_out_power(self, value):
+        manage_grid_usage_based_on_current_price(price=self.gs_client.get('tibber_price_now'), power=int(value))
         self.adjust_ac_out_power()
 
-    def ac_in_power(self):
-        _value = round(self.value)
+    def ac_in_power(self, value):
+        _value = round(value)
         self.adjust_ac_out_power()
         publish_message("Tesla/vehicle0/Ac/ac_in", message=f"{_value}", retain=True)
 
-    def max_charge_voltage(self):
-        _value = float(self.value)
+    def max_charge_voltage(self, value):
+        _value = float(value)
         publish_message("Tesla/vehicle0/solar/ess_max_charge_voltage", message=f"{_value}", retain=True)
 
-    def grid_charging_enabled(self):
-        _value = self.value == "True"
+    def grid_charging_enabled(self, value):
+        _value = value == "True"
 
         if _value:
             grid_import_state = "Enabled"
@@ -194,13 +204,13 @@ class Event:
 
         logging.info(f"Grid assisted charging toggled to {grid_import_state}")
 
-    def tesla_l1_current(self):
+    def tesla_l1_current(self, value):
         self.update_charging_amp_totals()
 
-    def tesla_l2_current(self):
+    def tesla_l2_current(self, value):
         self.update_charging_amp_totals()
 
-    def tesla_l3_current(self):
+    def tesla_l3_current(self, value):
         self.update_charging_amp_totals()
 
     #
@@ -290,9 +300,9 @@ class Event:
         publish_message("Tesla/vehicle0/Ac/ac_loads", message=f"{adjusted_ac_out_power}", retain=False)
 
     @staticmethod
-    def trigger_ess_charge_scheduling():
+    def trigger_ess_charge_scheduling(_value=None):
         set_charging_schedule(caller=__name__, silent=True, schedule_type='48h', slots=5)
 
     @staticmethod
-    def clear_ess_charge_schedule():
+    def clear_ess_charge_schedule(_value=None):
         clear_victron_schedules()
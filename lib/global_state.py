@@ -1,5 +1,7 @@
 import sqlite3
 import logging
+import threading
+import time
 
 from lib.helpers import publish_message, reduce_decimal
 
@@ -8,6 +10,33 @@ logging.basicConfig(
     level=logging.INFO,
     datefmt='%Y-%m-%d %H:%M:%S')
 
+SNAPSHOT_PATH = "/dev/shm/cerbo_state.db"
+SNAPSHOT_INTERVAL_S = 1.0
+
+# Keys whose MQTT mirror drives controls or the dashboard's control state: they
+# are never coalesced, whatever the default publish interval is.
+IMMEDIATE_PUBLISH_KEYS = (
+    "ai_mode", "ai_control_action", "ai_reason", "ai_reason_code", "ai_grid_assist",
+    "ai_ess_override_enabled", "feed_in_limit_state", "max_feed_in_power",
+    "min_ess_soc_applied", "grid_charging_enabled", "grid_charging_enabled_by_price",
+    "ev_charge_requested", "vehicle_refresh_requested",
+)
+
+
+def _coerce(value):
+    """Type coercion applied to stored (string) values on ``get``."""
+    try:
+        if '.' in value:
+            return float(value)
+        elif "True" in str(value):
+            return bool(True)
+        elif "False" in str(value):
+            return bool(False)
+        else:
+            return int(value)
+    except Exception as e: # noqa
+        return str(value)
+
 
 class SQLiteConnection:
     def __init__(self, path):
@@ -27,21 +56,257 @@ class SQLiteConnection:
             logging.debug("SQLiteConnection: Connection to database closed.")
 
 
-class GlobalStateDatabase:
+class StateStore:
+    """Thread-safe in-process key/value store behind GlobalStateClient.
+
+    Values are kept as the stored string plus its coerced form, so ``get`` is a
+    dict lookup. Writes take the lock and mark the key dirty for the snapshot
+    writer; reads rely on single dict operations being atomic.
+    """
+
     def __init__(self):
-        self.db_path = "/dev/shm/cerbo_state.db"
+        self._lock = threading.Lock()
+        self._values = {}
+        self._dirty = set()
+        self.primary = False
+        self.snapshot_path = SNAPSHOT_PATH
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def has(self, key):
+        return key in self._values
+
+    def set(self, key, value):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[0] == value:
+                return
+            self._values[key] = (value, _coerce(value))
+            self._dirty.add(key)
+
+    def load(self, rows):
+        with self._lock:
+            self._values = {str(key): (value, _coerce(value)) for key, value in rows}
+            self._dirty.clear()
+
+    def items(self):
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._values.items()]
+
+    def drain_dirty(self):
+        with self._lock:
+            rows = [(key, self._values[key][0]) for key in self._dirty if key in self._values]
+            self._dirty.clear()
+            return rows
+
+
+_STORE = StateStore()
+
+
+def _mirror(key, value):
+    publish_message(f"Cerbomoticzgx/GlobalState/{key}", message=value, retain=True)
+
+
+class StatePublisher:
+    """Change-only, per-key coalesced MQTT mirror of the state store.
+
+    A value equal to the last one published for its key is not sent again.
+    With a non-zero ``interval`` a key publishes at most once per interval;
+    updates inside the window replace each other and the latest is sent by
+    ``flush`` once the window has passed. ``overrides`` maps keys to their own
+    interval (0 = always immediate) and is layered over IMMEDIATE_PUBLISH_KEYS.
+    """
+
+    def __init__(self, interval=0.0, overrides=None):
+        self._lock = threading.Lock()
+        self._last_value = {}
+        self._last_sent = {}
+        self._pending = {}
+        self.sent = 0
+        self.unchanged = 0
+        self.coalesced = 0
+        self.configure(interval, overrides)
+
+    def configure(self, interval=0.0, overrides=None):
+        with self._lock:
+            self.interval = max(0.0, float(interval or 0.0))
+            self.overrides = {key: 0.0 for key in IMMEDIATE_PUBLISH_KEYS}
+            self.overrides.update({str(k): max(0.0, float(v)) for k, v in (overrides or {}).items()})
+
+    def publish(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            if key in self._pending:
+                # The update waiting in this window is superseded either way.
+                del self._pending[key]
+                self.coalesced += 1
+            if self._last_value.get(key) == value:
+                self.unchanged += 1
+                return
+            interval = self.overrides.get(key, self.interval)
+            last = self._last_sent.get(key)
+            if interval > 0 and last is not None and now - last < interval:
+                self._pending[key] = value
+                return
+            self._mark_sent(key, value, now)
+        _mirror(key, value)
+
+    def observe(self, key, value):
+        """Record ``value`` as already on the retained topic (published by another process)."""
+        with self._lock:
+            if self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            self._last_value[key] = value
+
+    def flush(self, force=False):
+        """Publish pending values whose interval has passed (all when ``force``)."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, value in list(self._pending.items()):
+                interval = self.overrides.get(key, self.interval)
+                if force or now - self._last_sent.get(key, 0.0) >= interval:
+                    del self._pending[key]
+                    self._mark_sent(key, value, now)
+                    due.append((key, value))
+        for key, value in due:
+            _mirror(key, value)
+
+    def _mark_sent(self, key, value, now):
+        self._last_value[key] = value
+        self._last_sent[key] = now
+        self.sent += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'suppressed': self.unchanged + self.coalesced,
+                'suppressed_unchanged': self.unchanged,
+                'suppressed_coalesced': self.coalesced,
+                'pending': len(self._pending),
+                'interval_s': self.interval,
+            }
+
+
+_PUBLISHER = StatePublisher()
+
+
+def publish_stats():
+    """Sent vs. suppressed counters of the GlobalState MQTT mirror."""
+    return _PUBLISHER.stats()
+
+
+class SnapshotWriter(threading.Thread):
+    """Write-behind copy of the in-process store to SQLite for other processes.
+
+    Changed keys are flushed every ``interval`` seconds over one long-lived
+    connection, so readers like scripts/ai_ess_dryrun.py see state that is at
+    most one interval old without the live service paying for SQLite per call.
+    Writes other processes (e.g. the dashboard run as a sidecar) queued in the
+    ``inbox`` table are applied to the store on the same tick, which also
+    releases coalesced MQTT publishes; with ``path`` None only the latter is done.
+    """
+
+    def __init__(self, store, path, interval=SNAPSHOT_INTERVAL_S, publisher=None):
+        super().__init__(name="GlobalStateSnapshot", daemon=True)
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.publisher = publisher
+        self._stop_event = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._connection = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+        self.flush(force=True)
+
+    def flush(self, force=False):
+        if self.publisher is not None:
+            self.publisher.flush(force=force)
+        if self.path is None:
+            return
+        with self._flush_lock:
+            try:
+                if self._connection is None:
+                    self._connection = sqlite3.connect(
+                        self.path, check_same_thread=False, isolation_level=None)
+                cursor = self._connection.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute("SELECT key,value FROM inbox")
+                    for key, value in cursor.fetchall():
+                        self.store.set(str(key), value)
+                        if self.publisher is not None:
+                            # The writing process already published it; a later local
+                            # set back to the old value must not be taken as unchanged.
+                            self.publisher.observe(str(key), value)
+                    cursor.execute("DELETE FROM inbox")
+                    cursor.executemany("INSERT OR REPLACE INTO data VALUES (?, ?)",
+                                       self.store.drain_dirty())
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                logging.error(f"GlobalStateDatabase: Snapshot write failed - {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=self.interval * 2)
+
+
+class GlobalStateDatabase:
+    """Owns the process-wide state store.
+
+    Instantiated once by the live service (main.py): it resets the SQLite
+    snapshot, switches GlobalStateClient to the in-process store and starts
+    the background writer (write-behind snapshot unless ``snapshot`` is
+    False, plus release of coalesced MQTT publishes).
+    """
+
+    def __init__(self, db_path=SNAPSHOT_PATH, snapshot=True):
+        self.db_path = db_path
         self.init_database()
+        _STORE.load([])
+        _STORE.snapshot_path = db_path
+        _STORE.primary = True
+        self.writer = SnapshotWriter(_STORE, db_path if snapshot else None,
+                                     SNAPSHOT_INTERVAL_S, publisher=_PUBLISHER)
+        self.writer.start()
+
+    @staticmethod
+    def configure_publishing(interval=0.0, overrides=None):
+        """Set the MQTT mirror's default coalescing interval and per-key overrides."""
+        _PUBLISHER.configure(interval, overrides)
 
     def init_database(self):
         with SQLiteConnection(self.db_path) as cursor:
             cursor.execute("DROP TABLE IF EXISTS data")
+            cursor.execute("DROP TABLE IF EXISTS inbox")
             cursor.execute("CREATE TABLE IF NOT EXISTS data (key TEXT PRIMARY KEY, value TEXT)")
+            cursor.execute("CREATE TABLE IF NOT EXISTS inbox (key TEXT PRIMARY KEY, value TEXT)")
             cursor.connection.commit()
             logging.info("GlobalStateDatabase: database initialized.")
 
+    def flush(self):
+        """Write pending changes to the snapshot and release due publishes now."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """Stop the background writer after a final flush."""
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+
     def export_to_file(self, export_path):
         """Export the in-memory SQLite database to a file."""
         try:
+            self.flush()
             with SQLiteConnection(self.db_path) as cursor:
                 with sqlite3.connect(export_path) as file_conn:
                     cursor.connection.backup(file_conn)
@@ -55,44 +320,58 @@ class GlobalStateDatabase:
             with sqlite3.connect(import_path) as file_conn:
                 with SQLiteConnection(self.db_path) as cursor:
                     file_conn.backup(cursor.connection)
+                    # The backup replaces the whole snapshot, and a file without an inbox table
+                    # (e.g. an older export) would break every later snapshot flush.
+                    cursor.execute("CREATE TABLE IF NOT EXISTS data (key TEXT PRIMARY KEY, value TEXT)")
+                    cursor.execute("CREATE TABLE IF NOT EXISTS inbox (key TEXT PRIMARY KEY, value TEXT)")
+                    cursor.connection.commit()
+                    cursor.execute("SELECT key,value FROM data")
+                    _STORE.load(cursor.fetchall())
                     logging.info(f"GlobalStateDatabase: Imported from {import_path}.")
         except Exception as e:
             logging.error(f"GlobalStateDatabase: Failed to import database - {e}")
 
 
 class GlobalStateClient:
+    """Global state access.
+
+    In the live service this reads and writes the in-process store and
+    ``set`` mirrors through StatePublisher (change-only, optionally
+    coalesced). Processes that never created a GlobalStateDatabase (scripts,
+    tests, a sidecar dashboard) fall back to the SQLite snapshot and publish
+    every ``set``, as every call used to; their writes are also queued for the
+    live service to pick up.
+    """
+
     @staticmethod
     def all():
-        with SQLiteConnection("/dev/shm/cerbo_state.db") as cursor:
+        if _STORE.primary:
+            return _STORE.items() or None
+        with SQLiteConnection(_STORE.snapshot_path) as cursor:
             cursor.execute("SELECT key,value FROM data")
             result = cursor.fetchall()
             return result if result else None
 
     @staticmethod
     def get(key):
-        with SQLiteConnection("/dev/shm/cerbo_state.db") as cursor:
+        if _STORE.primary:
+            entry = _STORE.get(str(key))
+            return entry[1] if entry else 0
+
+        with SQLiteConnection(_STORE.snapshot_path) as cursor:
             cursor.execute("SELECT value FROM data WHERE key=?", (str(key),))
             result = cursor.fetchone()
 
             if result:
-                result_value = result[0]
-                try:
-                    if '.' in result_value:
-                        return float(result_value)
-                    elif "True" in str(result_value):
-                        return bool(True)
-                    elif "False" in str(result_value):
-                        return bool(False)
-                    else:
-                        return int(result_value)
-                except Exception as e: # noqa
-                    return str(result_value)
+                return _coerce(result[0])
             else:
                 return 0
 
     @staticmethod
     def has(key):
-        with SQLiteConnection("/dev/shm/cerbo_state.db") as cursor:
+        if _STORE.primary:
+            return _STORE.has(str(key))
+        with SQLiteConnection(_STORE.snapshot_path) as cursor:
             cursor.execute("SELECT 1 FROM data WHERE key=? LIMIT 1", (str(key),))
             return cursor.fetchone() is not None
 
@@ -100,7 +379,16 @@ class GlobalStateClient:
     def set(key, value):
         _value = reduce_decimal(value)
 
-        with SQLiteConnection("/dev/shm/cerbo_state.db") as cursor:
+        if _STORE.primary:
+            _STORE.set(str(key), _value)
+            _PUBLISHER.publish(str(key), _value)
+            return
+
+        with SQLiteConnection(_STORE.snapshot_path) as cursor:
             cursor.execute("INSERT OR REPLACE INTO data VALUES (?, ?)", (key, _value))
+            try:
+                cursor.execute("INSERT OR REPLACE INTO inbox VALUES (?, ?)", (key, _value))
+            except sqlite3.OperationalError:
+                pass  # snapshot predates the inbox: no live service is reading it
             publish_message(f"Cerbomoticzgx/GlobalState/{key}", message=_value, retain=True)
             cursor.connection.commit()
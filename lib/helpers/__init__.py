@@ -55,6 +55,10 @@ def clear_victron_schedules() -> None:
         topic_stub = f"W/{systemId0}/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/{i}/"
         publish_message(f"{topic_stub}Day", payload="{\"value\": -1}", retain=False)
 
+    # The optimizer's charge-schedule synchronizer must not trust its state after this.
+    from lib.victron_schedule import forget_programmed_slots
+    forget_programmed_slots()
+
 
 def remove_message(topic, qos=0, retain=True):
     """
@@ -118,6 +122,40 @@ def get_current_value_from_mqtt(topic: str, timeout: float = 1.0, raw: bool = Fa
     return messages[0] if messages else None
 
 
+def get_current_values_from_mqtt(topic_filter: str, expected: int = 0, timeout: float = 2.0) -> dict:
+    """
+    Collects the retained values under a wildcard ``topic_filter`` over one temporary
+    connection: {topic: value}. Returns once ``expected`` topics have arrived or after
+    ``timeout`` seconds, whichever is first.
+    """
+    from lib.constants import mosquittoEndpoint
+
+    values = {}
+
+    def on_connect(client, _userdata, _flags, _rc):
+        client.subscribe(topic_filter)
+
+    def on_message(_client, _userdata, msg):
+        try:
+            values[msg.topic] = json.loads(msg.payload.decode("utf-8")).get('value')
+        except (json.JSONDecodeError, AttributeError, UnicodeDecodeError):
+            pass
+
+    temp_client = mqtt.Client(client_id=f"helper-retained-retrieval-client-{time.monotonic_ns() % 1000000}")
+    temp_client.on_connect = on_connect
+    temp_client.on_message = on_message
+    temp_client.connect(mosquittoEndpoint, 1883, 60)
+    temp_client.loop_start()
+
+    deadline = time.time() + timeout
+    while time.time() < deadline and not (expected and len(values) >= expected):
+        time.sleep(0.1)
+
+    temp_client.loop_stop()
+    temp_client.disconnect()
+    return dict(values)
+
+
 def get_topic_key(topic, system_id="system0") -> str:
     """
     Retrieves the key name for a MQQT literal topic from the Topics dict() if one exists
@@ -5,14 +5,30 @@ Durable data is only ever one of two shapes, both friendly to network / hostpath
 
   * **Append-only NDJSON** for the hot/current month. A crash mid-write can damage at
     most the trailing line, which :func:`read_day` simply skips — there is no shared
-    mutable index to corrupt.
-  * **Write-once, immutable Parquet** for cold months. Compaction writes to a temp file,
-    verifies the row count, then atomically renames it into place; the file is never
-    mutated afterwards.
+    mutable index to corrupt. Writers append through :class:`HistoryWriter`, which
+    keeps the day's file open and fsyncs per its policy.
+  * **Write-once, immutable Parquet** for cold months. Compaction runs inside DuckDB,
+    writes to a temp file, verifies the row count, then atomically renames it into
+    place; the file is never mutated afterwards. Records are stored as typed columns (PARQUET_SCHEMA_VERSION) so
+    DuckDB can query fields like ``pv_w`` directly; read-back still reproduces each record
+    exactly, and months written in the older raw-JSON layout remain readable.
 
 Because every file is immutable-after-publish and date-named, cross-zone migration is a
 plain file copy and "which zone has the newest data" is answered by :func:`latest_ts` /
-:func:`store_status` — there is no live database state to reconcile or tear.
+:func:`store_status` — there is no live database state to reconcile or tear. Both read
+the per-month manifest compaction writes beside each Parquet (:func:`month_manifest`)
+rather than the Parquet itself.
+
+Parsed days are kept in a small process-wide LRU (:func:`day_cache_stats`) keyed on the
+source file's identity (mtime, size, inode), so the optimizer and the dashboard re-reading
+the same days costs one ``stat`` per call; an append, a completed torn line or a compaction
+changes the identity and the next read re-parses. Today's file is re-read incrementally
+from a byte cursor (:class:`_NdjsonTail`), parsing only the lines appended since.
+
+Parquet reads share a small pool of in-memory DuckDB connections with the Parquet footer
+cache on, and each month file's columns / days / schema version are kept per file identity
+too (:func:`duckdb_pool_stats`), so repeated cold-day reads skip connection setup and
+footer parsing.
 
 DuckDB is used ONLY as an in-process engine to write Parquet during compaction and to
 read/query it back. It is never the durable store, so it never sits as a mutable file on
@@ -24,9 +40,19 @@ import re
 import glob
 import json
 import logging
+import math
+import shutil
 import tempfile
+import threading
+import time
+from collections import OrderedDict
 from datetime import date, datetime
 
+try:
+    import orjson as _orjson
+except Exception:                       # pragma: no cover - optional; json is the fallback
+    _orjson = None
+
 try:
     import duckdb
     _HAVE_DUCKDB = True
@@ -39,6 +65,49 @@ DEFAULT_HISTORY_DIR = "data/history"
 _DAY_RE = re.compile(r"ess-(\d{4})-(\d{2})-(\d{2})\.ndjson$")
 _MONTH_RE = re.compile(r"ess-(\d{4})-(\d{2})\.parquet$")
 
+DAY_CACHE_MAX_DAYS = 64
+DAY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DUCKDB_POOL_SIZE = 4
+DEFAULT_FSYNC_INTERVAL_S = 0.0
+
+# Parquet layout written by compact_month. Version 1 stored each record as its raw JSON
+# ``line``; version 2 stores the known cycle/settlement fields as typed columns so DuckDB
+# can project and filter on them, plus:
+#   * ``extra``   JSON object of every other field, and of any known field whose value
+#                 is not of the column's type (ints, nested values, ...) or that a column
+#                 would not keep distinct (-0.0, which compares equal to 0.0), so nothing
+#                 is lost;
+#   * ``missing`` hex bitmask of known fields absent from the record (a NULL column is an
+#                 explicit ``null``), so read-back reproduces the record exactly.
+# Readers accept both versions; scripts/compact_history.py --migrate rewrites v1 months.
+PARQUET_SCHEMA_VERSION = 2
+
+_D, _V, _B = "DOUBLE", "VARCHAR", "BOOLEAN"
+TYPED_FIELDS = (
+    # cycle records (energy_broker._append_history)
+    ("soc", _D), ("control_action", _V), ("realized_action", _V), ("mode", _V), ("reason_code", _V),
+    ("price_buy", _D), ("price_sell", _D), ("applied_setpoint_w", _D), ("limit_feed_in", _B),
+    ("min_soc_reserve", _D), ("grid_w", _D), ("pv_w", _D), ("load_w", _D), ("batt_w", _D),
+    ("pv_remaining_wh", _D), ("pv_tomorrow_wh", _D), ("pv_forecast_today_kwh", _D),
+    ("pv_actual_today_kwh", _D), ("load_forecast_today_wh", _D), ("load_actual_today_wh", _D),
+    ("plan_horizon_net_eur", _D), ("realized_net_eur", _D), ("day_import_kwh", _D),
+    ("day_import_cost", _D), ("day_export_kwh", _D), ("day_export_reward", _D),
+    ("weather_source", _V), ("weather_fetched_at", _V), ("weather_hvac_apply", _B),
+    ("weather_pv_apply", _B), ("weather_load_adj_today_kwh", _D), ("weather_max_temp_c", _D),
+    ("weather_pv_shadow_abs_delta_kwh", _D),
+    # settlement records (energy_broker._settle_prior_slot)
+    ("slot_start", _V), ("slot_end", _V), ("incomplete", _B), ("predicted_control_action", _V),
+    ("predicted_grid_kwh", _D), ("predicted_net_eur", _D), ("actual_import_kwh", _D),
+    ("actual_export_kwh", _D), ("actual_cost", _D), ("actual_reward", _D), ("actual_net_eur", _D),
+    ("actual_pv_kwh", _D), ("actual_load_kwh", _D), ("predicted_pv_kwh", _D),
+    ("predicted_load_kwh", _D), ("temp_forecast_c", _D), ("gti_forecast_wm2", _D),
+    ("cloud_forecast_pct", _D), ("weather_load_adj_kwh", _D), ("weather_pv_shadow_kwh", _D),
+    ("soc_start", _D), ("soc_end", _D), ("soc_delta", _D), ("cost_basis_eur_per_kwh", _D),
+)
+_PY_TYPES = {_D: float, _V: str, _B: bool}
+# "ts" and "kind" are carried by the day/ts/kind key columns; bits 0 and 1 of ``missing``.
+_MASK_FIELDS = ("ts", "kind") + tuple(name for name, _t in TYPED_FIELDS)
+
 
 def duckdb_available() -> bool:
     """True when the Parquet/compaction path is usable."""
@@ -68,6 +137,11 @@ def month_parquet_path(year, month, hist_dir=None) -> str:
                         f"ess-{int(year):04d}-{int(month):02d}.parquet")
 
 
+def month_manifest_path(year, month, hist_dir=None) -> str:
+    return os.path.join(resolve_history_dir(hist_dir),
+                        f"ess-{int(year):04d}-{int(month):02d}.manifest.json")
+
+
 def _month_parquet_for_day(iso, hist_dir) -> str:
     y, m, _d = iso.split("-")
     return month_parquet_path(int(y), int(m), hist_dir)
@@ -75,69 +149,667 @@ def _month_parquet_for_day(iso, hist_dir) -> str:
 
 # --- writes ----------------------------------------------------------------
 
+_ORJSON_SCALARS = frozenset({str, int, bool, type(None)})
+
+
+def _encode(record) -> bytes:
+    """One NDJSON line: orjson for flat records of plain JSON values, else json.
+
+    Both give the same record after parsing, not the same bytes (orjson writes
+    ``{"a":1}`` where json writes ``{"a": 1}``). orjson also serializes values json
+    rejects (datetime, UUID, dataclasses) and writes NaN/inf as ``null``, so it is
+    used only when every key is a str and every value is a str, int, bool, None or
+    finite float; anything else — nested values included — takes the json path and
+    is accepted or rejected exactly as before.
+    """
+    if _orjson is not None:
+        for k, v in record.items():
+            t = type(v)
+            if type(k) is not str:
+                break
+            if t is float:
+                if not math.isfinite(v):
+                    break
+            elif t not in _ORJSON_SCALARS:
+                break
+        else:
+            try:
+                return _orjson.dumps(record) + b"\n"
+            except TypeError:
+                pass        # e.g. an int beyond 64 bits
+    return (json.dumps(record) + "\n").encode("utf-8")
+
+
+class HistoryWriter:
+    """Appends records to the day's NDJSON through one open file handle.
+
+    The handle stays open across records and rolls over to the next day's file when
+    a record for a new (local) day arrives, so a write costs one ``write`` instead of
+    an open/append/close round trip on the network FS. Each record goes out as ONE
+    unbuffered ``write`` of a complete line, which keeps the store's guarantee that a
+    crash can tear at most the trailing line.
+
+    ``fsync_interval`` is the durability policy: 0 fsyncs every record, N > 0 at
+    most every N seconds (checked on write, and always on rollover and close), None
+    leaves it to the OS. If the day's file is removed or replaced underneath (a
+    forced compaction), the next write reopens it rather than writing to the
+    orphaned inode.
+    """
+
+    def __init__(self, hist_dir=None, fsync_interval=DEFAULT_FSYNC_INTERVAL_S):
+        self.hist_dir = resolve_history_dir(hist_dir)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fh = None
+        self._path = None
+        self._ino = None
+        self._dirty = False
+        self._synced_at = 0.0
+        self.records = 0
+        self.bytes = 0
+        self.opens = 0
+        self.rollovers = 0
+        self.fsyncs = 0
+        self.errors = 0
+
+    def write(self, record: dict, day=None):
+        """Append ``record`` to ``day``'s file (default today); returns the file's
+        (size before, size after) the record."""
+        line = _encode(record)
+        path = day_ndjson_path(day or date.today(), self.hist_dir)
+        with self._lock:
+            try:
+                fh = self._handle(path)
+                fh.write(line)
+                size_after = fh.tell()
+            except OSError:
+                self.errors += 1
+                self._close()
+                raise
+            self.records += 1
+            self.bytes += len(line)
+            self._dirty = True
+            if self.fsync_interval is not None and time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._sync()
+        return size_after - len(line), size_after
+
+    def _handle(self, path):
+        if self._fh is not None:
+            if path != self._path:
+                self.rollovers += 1
+                self._close()
+            else:
+                try:
+                    replaced = os.stat(path).st_ino != self._ino
+                except OSError:
+                    replaced = True
+                if replaced:
+                    self._close()
+        if self._fh is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._fh = open(path, "ab", buffering=0)
+            self._path = path
+            self._ino = os.fstat(self._fh.fileno()).st_ino
+            self.opens += 1
+        return self._fh
+
+    def _sync(self):
+        if self._dirty and self._fh is not None:
+            os.fsync(self._fh.fileno())
+            self.fsyncs += 1
+        self._dirty = False
+        self._synced_at = time.monotonic()
+
+    def _close(self):
+        if self._fh is None:
+            return
+        try:
+            if self.fsync_interval is not None:
+                self._sync()
+        except OSError as e:
+            logging.warning("history_store: fsync of %s failed: %s", self._path, e)
+        finally:
+            self._fh.close()
+            self._fh = self._path = self._ino = None
+
+    def flush(self):
+        """fsync anything written since the last sync (per the policy's own schedule otherwise)."""
+        with self._lock:
+            if self._fh is not None:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self._path,
+                "records": self.records,
+                "bytes": self.bytes,
+                "opens": self.opens,
+                "rollovers": self.rollovers,
+                "fsyncs": self.fsyncs,
+                "errors": self.errors,
+                "fsync_interval_s": self.fsync_interval,
+            }
+
+
+_WRITERS = OrderedDict()    # history dir -> writer, least recently used first
+_WRITERS_LOCK = threading.Lock()
+MAX_WRITERS = 4
+
+
+def get_writer(hist_dir=None, fsync_interval=None) -> HistoryWriter:
+    """The process-wide writer for ``hist_dir``.
+
+    ``fsync_interval`` (see :class:`HistoryWriter`) defaults to HISTORY_FSYNC_INTERVAL_S
+    from the environment; passing one updates the existing writer's policy.
+    """
+    hist_dir = resolve_history_dir(hist_dir)
+    if fsync_interval is None:
+        try:
+            fsync_interval = float(os.environ.get("HISTORY_FSYNC_INTERVAL_S", DEFAULT_FSYNC_INTERVAL_S))
+        except ValueError:
+            fsync_interval = DEFAULT_FSYNC_INTERVAL_S
+    if fsync_interval < 0:
+        fsync_interval = None
+    evicted = []
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(hist_dir)
+        if writer is None:
+            writer = _WRITERS[hist_dir] = HistoryWriter(hist_dir, fsync_interval)
+            while len(_WRITERS) > MAX_WRITERS:
+                evicted.append(_WRITERS.popitem(last=False)[1])
+        _WRITERS.move_to_end(hist_dir)
+        writer.fsync_interval = fsync_interval
+    for old in evicted:
+        old.close()
+    return writer
+
+
+def close_writers() -> None:
+    """fsync and close every open history file (shutdown)."""
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+        _WRITERS.clear()
+    for writer in writers:
+        writer.close()
+
+
+def writer_stats() -> dict:
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    return {w.hist_dir: w.stats() for w in writers}
+
+
 def append(day, record: dict, hist_dir=None) -> None:
     """Append one record to the day's NDJSON file (the hot path). Single writer."""
-    path = day_ndjson_path(day, hist_dir)
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "a", encoding="utf-8") as fh:
-        fh.write(json.dumps(record) + "\n")
+    get_writer(hist_dir).write(record, day)
 
 
 # --- reads -----------------------------------------------------------------
 
-def _parse_ndjson(path) -> list:
+def _parse_lines(data: bytes) -> list:
     out = []
+    for line in data.decode("utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            out.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue    # tolerate a torn/partial trailing line
+    return out
+
+
+def _parse_ndjson(path) -> list:
     try:
-        with open(path, encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    out.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue    # tolerate a torn/partial trailing line
+        with open(path, "rb") as fh:
+            return _parse_lines(fh.read())
     except (FileNotFoundError, OSError):
         return []
+
+
+class _NdjsonTail:
+    """Incremental reader for the hot day file, which only ever grows by appends.
+
+    Keeps a cursor at the end of the last complete (newline-terminated) line and the
+    records parsed up to it, so a read only parses what was appended since. A trailing
+    line without its newline yet is parsed for the result but not consumed, so a torn
+    write that later completes is picked up whole. A different inode, a size below the
+    cursor or a changed head of the file means it was replaced or truncated: start over.
+    """
+
+    HEAD_BYTES = 256
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, ino):
+        self.ino, self.offset, self.head, self.records = ino, 0, b"", []
+
+    def read(self) -> list:
+        with self._lock:
+            try:
+                with open(self.path, "rb") as fh:
+                    st = os.fstat(fh.fileno())
+                    if st.st_ino != self.ino or st.st_size < self.offset or fh.read(len(self.head)) != self.head:
+                        self._reset(st.st_ino)
+                    fh.seek(self.offset)
+                    chunk = fh.read()
+            except OSError:
+                self._reset(None)
+                return []
+            end = chunk.rfind(b"\n") + 1
+            if end:
+                self.records.extend(_parse_lines(chunk[:end]))
+                if len(self.head) < self.HEAD_BYTES:
+                    self.head = (self.head + chunk[:end])[:self.HEAD_BYTES]
+                self.offset += end
+            return self.records + _parse_lines(chunk[end:])
+
+
+_TAILS = {}
+_TAILS_LOCK = threading.Lock()
+
+
+def _read_hot_ndjson(path, iso) -> list:
+    """Today's file goes through its tail cursor; any other day is parsed whole."""
+    if iso != date.today().isoformat():
+        return _parse_ndjson(path)
+    with _TAILS_LOCK:
+        tail = _TAILS.get(path)
+        if tail is None:
+            for stale in [p for p in _TAILS if not p.endswith(f"ess-{iso}.ndjson")]:
+                del _TAILS[stale]       # yesterday's cursor is done with after midnight
+            tail = _TAILS[path] = _NdjsonTail(path)
+    return tail.read()
+
+
+def _is_column_float(value) -> bool:
+    """True when a DOUBLE column holds ``value`` exactly and distinctly: a finite float, not -0.0."""
+    return type(value) is float and math.isfinite(value) and (value != 0.0 or math.copysign(1.0, value) > 0)
+
+
+def _encode_row(iso, rec) -> tuple:
+    """One record as a v2 row: (schema_version, day, ts, kind, *typed fields, extra, missing).
+
+    The reference encoder: compact_month encodes in SQL (_compact_encode_sql), and the
+    tests hold that to this row for row. Not used on the compaction path itself.
+    """
+    ts = str(rec.get("ts") or rec.get("slot_start") or "")
+    kind = str(rec.get("kind") or "cycle")
+    extra, missing = {}, 0
+    for bit, key in enumerate(("ts", "kind")):
+        value = rec.get(key, None)
+        if not (isinstance(value, str) and value):
+            missing |= 1 << bit
+            if key in rec:
+                extra[key] = value
+    values = []
+    for bit, (name, sql_type) in enumerate(TYPED_FIELDS, start=2):
+        if name not in rec:
+            missing |= 1 << bit
+            values.append(None)
+            continue
+        value = rec[name]
+        if value is None or (_is_column_float(value) if sql_type == _D
+                             else type(value) is _PY_TYPES[sql_type]):
+            values.append(value)
+        else:
+            values.append(None)
+            extra[name] = value
+    known = set(_MASK_FIELDS)
+    extra.update((k, v) for k, v in rec.items() if k not in known)
+    return (PARQUET_SCHEMA_VERSION, iso, ts, kind, *values,
+            json.dumps(extra) if extra else None, format(missing, "x"))
+
+
+def _decode_row(row: dict) -> dict:
+    missing = int(row.get("missing") or "0", 16)
+    rec = {}
+    if not missing & 1:
+        rec["ts"] = row["ts"]
+    if not missing & 2:
+        rec["kind"] = row["kind"]
+    for bit, (name, _t) in enumerate(TYPED_FIELDS, start=2):
+        if not missing >> bit & 1:
+            rec[name] = row.get(name)
+    if row.get("extra"):
+        rec.update(json.loads(row["extra"]))
+    return rec
+
+
+def _parquet_records(con, sql, params=(), sizes=None):
+    """(day, record) for each row of a month Parquet query, either schema version.
+
+    ``sizes`` (a list) collects an approximate in-memory size per record for the day cache.
+    """
+    cur = con.execute(sql, list(params))
+    names = [d[0] for d in cur.description]
+    out = []
+    for values in cur.fetchall():
+        row = dict(zip(names, values))
+        if "line" in row:                   # v1: the raw JSON line
+            try:
+                out.append((row["day"], json.loads(row["line"])))
+            except (TypeError, json.JSONDecodeError):
+                continue
+            if sizes is not None:
+                sizes.append(len(row["line"]))
+        else:
+            rec = _decode_row(row)
+            out.append((row["day"], rec))
+            if sizes is not None:
+                sizes.append(24 * len(rec) + len(row.get("extra") or ""))
     return out
 
 
-def _read_parquet_day(parquet_path, iso) -> list:
+# --- DuckDB read pool --------------------------------------------------------
+
+class _ReadPool:
+    """Reusable in-memory DuckDB connections for the history readers.
+
+    All pooled connections are cursors on ONE in-memory database with DuckDB's Parquet
+    metadata cache enabled, so a month file's footer is parsed once rather than on
+    every read. Readers only ever SELECT through them; compaction writes on a private
+    connection of its own.
+
+    The footer cache is trusted only while every Parquet read through the pool still
+    has the identity (mtime, size, inode) it was first read at. When one changes — a
+    re-compaction here or by the cron script — the database is replaced: idle cursors
+    are closed at once, the old database once its last borrowed cursor comes back.
+    """
+
+    def __init__(self, size=DUCKDB_POOL_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._db = None
+        self._borrowed = {}     # database -> cursors of it currently lent out
+        self._idle = []
+        self._stamps = {}       # parquet path -> stamp when first read by this database
+        self.opened = 0
+        self.reused = 0
+        self.recycles = 0
+        self.queries = 0
+        self._query_total = 0.0
+        self._query_max = 0.0
+
+    def _open_db(self):
+        db = duckdb.connect()
+        try:
+            db.execute("SET GLOBAL parquet_metadata_cache = true")
+        except Exception as e:          # pragma: no cover - older duckdb builds
+            logging.debug("history_store: parquet metadata cache unavailable: %s", e)
+        return db
+
+    def _recycle(self):
+        """Drop the current database (lock held); see the class docstring."""
+        old, self._db = self._db, None
+        for con in self._idle:
+            con.close()
+        self._idle = []
+        self._stamps = {}
+        self.recycles += 1
+        if old is not None and not self._borrowed.get(old):
+            self._borrowed.pop(old, None)
+            old.close()
+
+    def acquire(self, paths=()):
+        """A (database, cursor) pair for reading ``paths``; give it back with :meth:`release`."""
+        stamps = {p: _file_stamp(p) for p in paths}
+        with self._lock:
+            if any(p in self._stamps and self._stamps[p] != st for p, st in stamps.items()):
+                self._recycle()
+            for p, st in stamps.items():
+                self._stamps.setdefault(p, st)
+            if self._db is None:
+                self._db = self._open_db()
+            db = self._db
+            if self._idle:
+                con = self._idle.pop()
+                self.reused += 1
+            else:
+                con = db.cursor()
+                self.opened += 1
+            self._borrowed.setdefault(db, set()).add(con)
+        return db, con
+
+    def release(self, db, con, elapsed):
+        with self._lock:
+            self.queries += 1
+            self._query_total += elapsed
+            self._query_max = max(self._query_max, elapsed)
+            lent = self._borrowed.get(db, set())
+            lent.discard(con)
+            if db is self._db and len(self._idle) < self.size:
+                self._idle.append(con)
+                return
+            con.close()
+            if db is not self._db and not lent:
+                self._borrowed.pop(db, None)
+                db.close()
+
+    def clear(self):
+        with self._lock:
+            self._recycle()
+
+    def stats(self):
+        with self._lock:
+            queries = self.queries or 1
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": sum(len(v) for v in self._borrowed.values()),
+                "opened": self.opened,
+                "reused": self.reused,
+                "recycles": self.recycles,
+                "queries": self.queries,
+                "query_ms_avg": round(self._query_total / queries * 1000.0, 3),
+                "query_ms_max": round(self._query_max * 1000.0, 3),
+                "metadata_hits": _PARQUET_META.hits,
+                "metadata_misses": _PARQUET_META.misses,
+            }
+
+
+class _pooled:
+    """``with _pooled(paths) as con:`` — borrow a pooled cursor to read ``paths``."""
+
+    def __init__(self, paths=()):
+        self._paths = paths
+
+    def __enter__(self):
+        self._db, self._con = _POOL.acquire(self._paths)
+        self._started = time.monotonic()
+        return self._con
+
+    def __exit__(self, *exc):
+        _POOL.release(self._db, self._con, time.monotonic() - self._started)
+        return False
+
+
+class _ParquetMetaCache:
+    """Per month file: its columns, schema version and days, keyed on the file's stamp."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        stamp = _file_stamp(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        esc = path.replace("'", "''")
+        with _pooled([path]) as con:
+            columns = frozenset(r[0] for r in con.execute(
+                f"DESCRIBE SELECT * FROM read_parquet('{esc}')").fetchall())
+            version = 1
+            if "schema_version" in columns:
+                version = con.execute(f"SELECT max(schema_version) FROM read_parquet('{esc}')").fetchone()[0]
+            days = tuple(sorted(d for (d,) in con.execute(
+                f"SELECT DISTINCT day FROM read_parquet('{esc}')").fetchall() if d))
+        meta = {"columns": columns, "version": version, "days": days}
+        with self._lock:
+            self._entries[path] = (stamp, meta)
+        return meta
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_PARQUET_META = _ParquetMetaCache()
+_POOL = _ReadPool()
+
+
+def duckdb_pool_stats() -> dict:
+    """Connection reuse, query latency and Parquet metadata-cache counters of the read pool."""
+    return _POOL.stats()
+
+
+def _read_parquet_day(parquet_path, iso):
+    """(records, approximate source bytes) for one day of a month Parquet."""
     esc = parquet_path.replace("'", "''")
-    con = duckdb.connect()
+    sizes = []
+    with _pooled([parquet_path]) as con:
+        rows = _parquet_records(
+            con, f"SELECT * FROM read_parquet('{esc}') WHERE day = ? ORDER BY ts", [iso], sizes)
+    return [rec for _day, rec in rows], sum(sizes)
+
+
+def parquet_schema_version(parquet_path) -> int:
+    """Schema version of a month Parquet (1 = raw JSON ``line`` layout)."""
+    return _PARQUET_META.get(parquet_path)["version"]
+
+
+def _file_stamp(path):
+    """Identity of a file's current contents, or None when it does not exist."""
     try:
-        rows = con.execute(
-            f"SELECT line FROM read_parquet('{esc}') WHERE day = ? ORDER BY ts",
-            [iso],
-        ).fetchall()
-    finally:
-        con.close()
-    out = []
-    for (line,) in rows:
-        try:
-            out.append(json.loads(line))
-        except (TypeError, json.JSONDecodeError):
-            continue
-    return out
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class _DayCache:
+    """Bounded LRU of parsed days: (path, day) -> (file stamp, records, source bytes).
+
+    An entry is served only while its file still has the stamp it was parsed at, so
+    the hot NDJSON day is revalidated with a ``stat`` and a write-once Parquet month
+    stays cached until it is evicted or replaced by a re-compaction.
+    """
+
+    def __init__(self, max_days=DAY_CACHE_MAX_DAYS, max_bytes=DAY_CACHE_MAX_BYTES):
+        self.max_days = max_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, stamp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, stamp, records, size):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            if self.max_days <= 0 or size > self.max_bytes:
+                return
+            self._entries[key] = (stamp, records, size)
+            self.bytes += size
+            while len(self._entries) > self.max_days or self.bytes > self.max_bytes:
+                _key, (_stamp, _records, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "days": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_days": self.max_days,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_DAY_CACHE = _DayCache()
+
+
+def day_cache_stats() -> dict:
+    """Hit/miss/eviction counters and resident size of the parsed-day cache."""
+    return _DAY_CACHE.stats()
 
 
 def read_day(day, hist_dir=None) -> list:
     """All records for a day, oldest-first.
 
     The hot NDJSON file wins when present (freshest, still being appended); otherwise
-    the day is served from its month's Parquet. Missing day -> ``[]``.
+    the day is served from its month's Parquet. Missing day -> ``[]``. Records are
+    shared with the day cache: treat them as read-only.
     """
     hist_dir = resolve_history_dir(hist_dir)
     iso = _iso(day)
     ndjson = os.path.join(hist_dir, f"ess-{iso}.ndjson")
-    if os.path.exists(ndjson):
-        return _parse_ndjson(ndjson)
+    stamp = _file_stamp(ndjson)
+    if stamp is not None:
+        records = _DAY_CACHE.get((ndjson, iso), stamp)
+        if records is None:
+            records = _read_hot_ndjson(ndjson, iso)
+            _DAY_CACHE.put((ndjson, iso), stamp, records, stamp[1])
+        return list(records)
     parquet = _month_parquet_for_day(iso, hist_dir)
-    if _HAVE_DUCKDB and os.path.exists(parquet):
-        return _read_parquet_day(parquet, iso)
+    stamp = _file_stamp(parquet) if _HAVE_DUCKDB else None
+    if stamp is not None:
+        records = _DAY_CACHE.get((parquet, iso), stamp)
+        if records is None:
+            records, size = _read_parquet_day(parquet, iso)
+            _DAY_CACHE.put((parquet, iso), stamp, records, size)
+        return list(records)
     return []
 
 
+def day_source_stamp(day, hist_dir=None):
+    """Identity (mtime, size, inode) of the file :func:`read_day` serves ``day`` from, or None.
+
+    Lets callers cache anything derived from a day and revalidate it with a ``stat``.
+    """
+    hist_dir = resolve_history_dir(hist_dir)
+    iso = _iso(day)
+    stamp = _file_stamp(os.path.join(hist_dir, f"ess-{iso}.ndjson"))
+    if stamp is None and _HAVE_DUCKDB:
+        stamp = _file_stamp(_month_parquet_for_day(iso, hist_dir))
+    return stamp
+
+
 def _ndjson_days(hist_dir) -> set:
     days = set()
     for p in glob.glob(os.path.join(hist_dir, "ess-*.ndjson")):
@@ -157,21 +829,22 @@ def _parquet_months(hist_dir) -> list:
 
 
 def available_days(hist_dir=None) -> list:
-    """Every day present in the store (NDJSON files + days inside Parquet months), sorted."""
+    """Every day present in the store (NDJSON files + days inside Parquet months), sorted.
+
+    Parquet days come from the month manifests; only a month without a current
+    manifest is scanned.
+    """
     hist_dir = resolve_history_dir(hist_dir)
     days = _ndjson_days(hist_dir)
-    parquets = glob.glob(os.path.join(hist_dir, "ess-*.parquet"))
-    if parquets and _HAVE_DUCKDB:
-        esc = os.path.join(hist_dir, "ess-*.parquet").replace("'", "''")
-        con = duckdb.connect()
-        try:
-            for (d,) in con.execute(f"SELECT DISTINCT day FROM read_parquet('{esc}')").fetchall():
-                if d:
-                    days.add(d)
-        except Exception as e:          # pragma: no cover
-            logging.debug("history_store: parquet day scan failed: %s", e)
-        finally:
-            con.close()
+    for p in glob.glob(os.path.join(hist_dir, "ess-*.parquet")):
+        manifest = month_manifest(p)
+        if manifest is not None:
+            days.update(manifest["days"])
+        elif _HAVE_DUCKDB:
+            try:
+                days.update(_PARQUET_META.get(p)["days"])
+            except Exception as e:      # pragma: no cover
+                logging.debug("history_store: parquet day scan of %s failed: %s", p, e)
     return sorted(days)
 
 
@@ -181,8 +854,13 @@ def latest_ts(hist_dir=None):
     days = available_days(hist_dir)
     if not days:
         return None
+    last = days[-1]
+    if not os.path.exists(os.path.join(hist_dir, f"ess-{last}.ndjson")):
+        manifest = month_manifest(_month_parquet_for_day(last, hist_dir))
+        if manifest is not None and last in manifest["days"]:
+            return manifest["days"][last]["max_ts"]
     stamps = [r.get("ts") or r.get("slot_start")
-              for r in read_day(days[-1], hist_dir)]
+              for r in read_day(last, hist_dir)]
     stamps = [s for s in stamps if s]
     return max(stamps) if stamps else None
 
@@ -191,11 +869,14 @@ def store_status(hist_dir=None) -> dict:
     """Summary of what's stored and in which format — handy for migration/zone checks."""
     hist_dir = resolve_history_dir(hist_dir)
     days = available_days(hist_dir)
+    months = _parquet_months(hist_dir)
     return {
         "dir": hist_dir,
         "duckdb": _HAVE_DUCKDB,
         "ndjson_days": sorted(_ndjson_days(hist_dir)),
-        "parquet_months": _parquet_months(hist_dir),
+        "parquet_months": months,
+        "months_without_manifest": [ym for ym in months
+                                    if month_manifest(month_parquet_path(*ym.split("-"), hist_dir)) is None],
         "days": len(days),
         "earliest": days[0] if days else None,
         "latest": days[-1] if days else None,
@@ -203,26 +884,292 @@ def store_status(hist_dir=None) -> dict:
     }
 
 
+# --- range queries ---------------------------------------------------------
+
+def query(start, end, kinds=None, columns=None, hist_dir=None) -> dict:
+    """Records of every day in ``start..end`` (inclusive), column-oriented.
+
+    Returns ``{"day": [...], "ts": [...], "kind": [...], <column>: [...], ...}`` ordered by
+    (day, ts), one list entry per record; an absent field is ``None``. ``kind`` is the
+    record's kind with a missing one reported as ``"cycle"``, and ``ts`` falls back to
+    ``slot_start`` (the same keys compaction sorts on). ``kinds`` filters on it;
+    ``columns`` defaults to every typed field (TYPED_FIELDS) and may name any other
+    record field too.
+
+    As with :func:`read_day` a day's hot NDJSON wins over its Parquet month. All the
+    Parquet months in range are read in ONE DuckDB scan with the day and kind filters
+    pushed down; the NDJSON days go through the (cached) day reader.
+    """
+    hist_dir = resolve_history_dir(hist_dir)
+    start, end = _iso(start), _iso(end)
+    columns = list(columns) if columns is not None else [name for name, _t in TYPED_FIELDS]
+    kinds = set(kinds) if kinds is not None else None
+    rows = []   # (day, ts, kind, values)
+
+    hot_days = sorted(d for d in _ndjson_days(hist_dir) if start <= d <= end)
+    for iso in hot_days:
+        for rec in read_day(iso, hist_dir):
+            kind = str(rec.get("kind") or "cycle")
+            if kinds is not None and kind not in kinds:
+                continue
+            rows.append((iso, str(rec.get("ts") or rec.get("slot_start") or ""), kind,
+                         [rec.get(c) for c in columns]))
+
+    months = [ym for ym in _parquet_months(hist_dir) if start[:7] <= ym <= end[:7]]
+    if months and _HAVE_DUCKDB:
+        paths = [month_parquet_path(*ym.split("-"), hist_dir) for ym in months]
+        rows.extend(_query_parquet(paths, start, end, hot_days, kinds, columns))
+
+    rows.sort(key=lambda r: (r[0], r[1]))
+    out = {"day": [r[0] for r in rows], "ts": [r[1] for r in rows], "kind": [r[2] for r in rows]}
+    for i, name in enumerate(columns):
+        out[name] = [r[3][i] for r in rows]
+    return out
+
+
+def _query_parquet(paths, start, end, skip_days, kinds, columns) -> list:
+    files = "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+    source = f"read_parquet({files}, union_by_name = true)"
+    present = set().union(*(_PARQUET_META.get(p)["columns"] for p in paths))
+    typed = {name for name, _t in TYPED_FIELDS}
+    direct = [c for c in columns if c in typed and c in present]
+    aux = [c for c in ("extra", "line") if c in present]
+    where, params = ["day BETWEEN ? AND ?"], [start, end]
+    if skip_days:
+        where.append(f"day NOT IN ({', '.join('?' * len(skip_days))})")
+        params.extend(skip_days)
+    if kinds is not None:
+        where.append(f"kind IN ({', '.join('?' * len(kinds))})")
+        params.extend(sorted(kinds))
+    select = ", ".join(["day", "ts", "kind"] + direct + aux)
+    with _pooled(paths) as con:
+        fetched = con.execute(
+            f"SELECT {select} FROM {source} WHERE {' AND '.join(where)}", params).fetchall()
+
+    index = {name: 3 + i for i, name in enumerate(direct)}
+    aux_at = 3 + len(direct)
+    rows = []
+    for r in fetched:
+        overflow = None
+        for raw in r[aux_at:]:
+            if raw:                         # v2 extra / v1 line: JSON object of other fields
+                try:
+                    overflow = json.loads(raw)
+                except json.JSONDecodeError:
+                    overflow = None
+        values = []
+        for c in columns:
+            v = r[index[c]] if c in index else None
+            if overflow is not None and c in overflow:
+                v = overflow[c]
+            values.append(v)
+        rows.append((r[0], r[1], r[2], values))
+    return rows
+
+
+# --- month manifests ---------------------------------------------------------
+#
+# compact_month writes ``ess-YYYY-MM.manifest.json`` next to each Parquet month: the days
+# present with their row counts, first/last record timestamps and closing day_* totals.
+# A month is immutable once published, so available_days / latest_ts / store_status
+# answer from manifests (plus NDJSON file names) without scanning Parquet. A manifest
+# is trusted only while it names the Parquet's current byte size; a missing or stale
+# one falls back to reading the Parquet itself.
+
+MANIFEST_VERSION = 1
+_DAY_TOTAL_FIELDS = ("day_import_kwh", "day_import_cost", "day_export_kwh", "day_export_reward")
+
+
+def _build_manifest(records, parquet_bytes) -> dict:
+    """Manifest for ``records``, ``(day, rec)`` pairs in (day, ts) order."""
+    days = {}
+    for iso, rec in records:
+        entry = days.setdefault(iso, {"rows": 0, "kinds": {}, "min_ts": None, "max_ts": None, "totals": {}})
+        entry["rows"] += 1
+        kind = str(rec.get("kind") or "cycle")
+        entry["kinds"][kind] = entry["kinds"].get(kind, 0) + 1
+        ts = rec.get("ts") or rec.get("slot_start")
+        if isinstance(ts, str) and ts:
+            entry["min_ts"] = ts if entry["min_ts"] is None else min(entry["min_ts"], ts)
+            entry["max_ts"] = ts if entry["max_ts"] is None else max(entry["max_ts"], ts)
+        if kind == "cycle":
+            # Last valid reading of each cumulative day counter (see frontend.data).
+            for key in _DAY_TOTAL_FIELDS:
+                v = rec.get(key)
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v):
+                    entry["totals"][key] = v
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "schema_version": PARQUET_SCHEMA_VERSION,
+        "parquet_bytes": parquet_bytes,
+        "rows": sum(d["rows"] for d in days.values()),
+        "days": days,
+    }
+
+
+def _write_manifest(path, manifest):
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".json", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_MANIFESTS = {}     # manifest path -> (manifest stamp, manifest)
+_MANIFESTS_LOCK = threading.Lock()
+
+
+def month_manifest(parquet_path):
+    """The manifest of a month Parquet, or None when it is missing or stale."""
+    path = parquet_path[:-len(".parquet")] + ".manifest.json"
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return None
+    with _MANIFESTS_LOCK:
+        cached = _MANIFESTS.get(path)
+    if cached is not None and cached[0] == stamp:
+        manifest = cached[1]
+    else:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError) as e:
+            logging.debug("history_store: unreadable manifest %s: %s", path, e)
+            return None
+        with _MANIFESTS_LOCK:
+            _MANIFESTS[path] = (stamp, manifest)
+    parquet = _file_stamp(parquet_path)
+    if not isinstance(manifest, dict) or parquet is None or manifest.get("parquet_bytes") != parquet[1]:
+        return None
+    return manifest
+
+
+def write_month_manifests(hist_dir=None) -> list:
+    """Write the manifest of every Parquet month that lacks a current one. Returns their paths."""
+    hist_dir = resolve_history_dir(hist_dir)
+    if not _HAVE_DUCKDB:
+        raise RuntimeError("history_store.write_month_manifests requires duckdb")
+    done = []
+    for ym in _parquet_months(hist_dir):
+        parquet_path = month_parquet_path(*ym.split("-"), hist_dir)
+        if month_manifest(parquet_path) is None:
+            path = month_manifest_path(*ym.split("-"), hist_dir)
+            _write_manifest(path, _build_manifest(_read_parquet_rows(parquet_path),
+                                                  os.path.getsize(parquet_path)))
+            done.append(path)
+    return done
+
+
 # --- compaction (cold-month rollup) ----------------------------------------
 
 def _read_parquet_rows(parquet_path) -> list:
     esc = parquet_path.replace("'", "''")
-    con = duckdb.connect()
-    try:
-        return con.execute(
-            f"SELECT day, ts, kind, line FROM read_parquet('{esc}')"
-        ).fetchall()
-    finally:
-        con.close()
+    with _pooled([parquet_path]) as con:
+        return _parquet_records(con, f"SELECT * FROM read_parquet('{esc}')")
+
+
+def _sql_literal(text) -> str:
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _json_truthy_text(j, jt) -> str:
+    """SQL text of JSON value ``j`` (of JSON type ``jt``) when Python would find it truthy, else NULL.
+
+    Strings are unquoted and ``true`` reads ``True`` as ``str()`` would; other values
+    keep their JSON text.
+    """
+    return (f"CASE WHEN {jt} IS NULL OR {jt} = 'NULL' THEN NULL "
+            f"WHEN {jt} = 'VARCHAR' THEN nullif(json_extract_string({j}, '$'), '') "
+            f"WHEN {j}::VARCHAR IN ('false', '0', '0.0', '-0.0', '[]', '{{}}') THEN NULL "
+            f"WHEN {j}::VARCHAR = 'true' THEN 'True' ELSE {j}::VARCHAR END")
+
+
+def _compact_encode_sql(source) -> str:
+    """SELECT encoding ``source``'s JSON-object ``line`` rows as v2 rows, as _encode_row does.
+
+    ``source`` yields (day, src, n, line); the output adds the v2 columns to src/n, which
+    only order the rows. Each line is parsed once into a struct of all known fields
+    (``json_transform``) and each field's JSON type is taken once; ``extra`` is the line
+    with every field a column already carries removed by a JSON merge patch, which
+    keeps the original text of the numbers left in it.
+
+    A DOUBLE field is typed only when Python would read a float: an integer literal
+    too large for BIGINT/UBIGINT (which DuckDB types DOUBLE) stays in ``extra`` as
+    written, as does -0.0.
+    """
+    structure = json.dumps({name: "JSON" for name in _MASK_FIELDS})
+    v = {name: f"s.{name}" for name in _MASK_FIELDS}
+    t = {name: f"t_{name}" for name in _MASK_FIELDS}
+    typed, removable, bits = [], [], []
+    for bit, key in enumerate(("ts", "kind")):
+        removable.append(f"CASE WHEN {key}_ok THEN '\"{key}\":null' END")
+        bits.append(f"CASE WHEN {key}_ok THEN 0 ELSE {1 << bit} END")
+    for bit, (name, sql_type) in enumerate(TYPED_FIELDS, start=2):
+        j, jt = v[name], t[name]
+        if sql_type == _D:
+            value = (f"CASE WHEN {jt} = 'DOUBLE' AND regexp_matches({j}::VARCHAR, '[.eE]') "
+                     f"THEN TRY_CAST({j} AS DOUBLE) END")
+            typed.append(f"CASE WHEN isfinite({value}) AND NOT ({value} = 0 AND signbit({value})) "
+                         f"THEN {value} END AS {name}")
+        elif sql_type == _V:
+            typed.append(f"CASE WHEN {jt} = 'VARCHAR' THEN json_extract_string({j}, '$') END AS {name}")
+        else:
+            typed.append(f"CASE WHEN {jt} = 'BOOLEAN' THEN TRY_CAST({j} AS BOOLEAN) END AS {name}")
+        removable.append(f"CASE WHEN {name} IS NOT NULL OR {jt} = 'NULL' THEN '\"{name}\":null' END")
+        bits.append(f"CASE WHEN {jt} IS NULL THEN {1 << bit} ELSE 0 END")
+    key_ok = {key: f"({t[key]} = 'VARCHAR' AND json_extract_string({v[key]}, '$') <> '')"
+              for key in ("ts", "kind")}
+    typed_names = ", ".join(name for name, _t in TYPED_FIELDS)
+    patch = f"'{{' || concat_ws(',', {', '.join(removable)}) || '}}'"
+    return (
+        f"SELECT {PARQUET_SCHEMA_VERSION} AS schema_version, day, ts, kind, {typed_names}, "
+        f"nullif(json_merge_patch(line, {patch}), '{{}}') AS extra, "
+        f"lower(format('{{:x}}', ({' + '.join(bits)})::BIGINT)) AS missing, src, n "
+        f"FROM (SELECT day, src, n, line, {', '.join(t.values())}, {key_ok['ts']} AS ts_ok, {key_ok['kind']} AS kind_ok, "
+        f"coalesce({_json_truthy_text(v['ts'], t['ts'])}, {_json_truthy_text(v['slot_start'], t['slot_start'])}, '') AS ts, "
+        f"coalesce({_json_truthy_text(v['kind'], t['kind'])}, 'cycle') AS kind, {', '.join(typed)} "
+        f"FROM (SELECT *, {', '.join(f'json_type({v[name]}) AS {t[name]}' for name in _MASK_FIELDS)} "
+        f"FROM (SELECT day, src, n, line, json_transform(line, {_sql_literal(structure)}) AS s FROM ({source}))))"
+    )
+
+
+def _load_day_lines(con, paths):
+    """Split the NDJSON day files ``paths`` into compact_month's ``lines`` table, in DuckDB."""
+    files = ", ".join(_sql_literal(p) for p in paths)
+    con.execute(
+        "INSERT INTO lines SELECT regexp_extract(filename, 'ess-(\\d{4}-\\d{2}-\\d{2})\\.ndjson$', 1), "
+        "1, n, line FROM (SELECT filename, unnest(parts) AS line, "
+        "generate_subscripts(parts, 1) AS n FROM (SELECT filename, "
+        f"string_split(content, chr(10)) AS parts FROM read_text([{files}])))"
+    )
+
+
+def _load_day_lines_lenient(con, path):
+    """_load_day_lines for a file DuckDB cannot read as UTF-8: decoded like _parse_lines."""
+    iso = "-".join(_DAY_RE.search(os.path.basename(path)).groups())
+    with open(path, "rb") as fh:
+        text = fh.read().decode("utf-8", errors="replace")
+    con.executemany("INSERT INTO lines VALUES (?, 1, ?, ?)",
+                    [(iso, n, line) for n, line in enumerate(text.split("\n"), start=1)])
 
 
 def compact_month(year, month, hist_dir=None, *, remove_ndjson=False):
     """Roll a month's NDJSON day files into a single immutable Parquet, atomically.
 
-    Stores the raw JSON line per record (columns day/ts/kind/line) so read-back is
-    byte-faithful — no schema drift or type coercion. Merges any existing Parquet for
-    the month first, so re-runs and crash-partial states never drop data. Returns the
-    Parquet path, or None when there is nothing to compact. Requires DuckDB.
+    Writes the typed v2 layout (see PARQUET_SCHEMA_VERSION); read-back reproduces each
+    record exactly. Merges any existing Parquet for the month first, of either version,
+    so re-runs and crash-partial states never drop data and re-compacting a v1 month
+    migrates it. The month's manifest is (re)written after the Parquet is published.
+    Returns the Parquet path, or None when there is nothing to compact.
+    Requires DuckDB.
+
+    The whole rollup runs inside DuckDB: the day files are read, split into lines and
+    encoded in SQL (blank and torn lines skipped), deduplicated and sorted there and
+    streamed to the Parquet, so no record is materialized in Python.
     """
     hist_dir = resolve_history_dir(hist_dir)
     if not _HAVE_DUCKDB:
@@ -237,59 +1184,71 @@ def compact_month(year, month, hist_dir=None, *, remove_ndjson=False):
     if not src_files and not os.path.exists(parquet_path):
         return None
 
-    # (day, ts, line) key -> row, so identical records dedupe and re-runs are idempotent.
-    rows = {}
-    if os.path.exists(parquet_path):
-        for r in _read_parquet_rows(parquet_path):
-            rows[(r[0], r[1], r[3])] = tuple(r)
-
-    for path in src_files:
-        m = _DAY_RE.search(os.path.basename(path))
-        iso = f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
-        try:
-            with open(path, encoding="utf-8") as fh:
-                for raw in fh:
-                    s = raw.strip()
-                    if not s:
-                        continue
-                    try:
-                        rec = json.loads(s)
-                    except json.JSONDecodeError:
-                        continue    # skip a torn line rather than abort the whole month
-                    ts = str(rec.get("ts") or rec.get("slot_start") or "")
-                    kind = str(rec.get("kind") or "cycle")
-                    rows[(iso, ts, s)] = (iso, ts, kind, s)
-        except OSError as e:
-            logging.warning("history_store: cannot read %s: %s", path, e)
-            return None
-
-    row_list = sorted(rows.values(), key=lambda r: (r[0], r[1]))
-
+    columns = ([("schema_version", "INTEGER"), ("day", _V), ("ts", _V), ("kind", _V)]
+               + list(TYPED_FIELDS) + [("extra", _V), ("missing", _V)])
+    names = ", ".join(name for name, _t in columns)
     fd, tmp_path = tempfile.mkstemp(prefix=".compact-", suffix=".parquet", dir=hist_dir)
     os.close(fd)
     os.remove(tmp_path)     # let DuckDB create the file fresh
+    spill_dir = tempfile.mkdtemp(prefix="history-compact-")
+    con = duckdb.connect()
     try:
-        con = duckdb.connect()
-        try:
-            con.execute("CREATE TABLE t(day VARCHAR, ts VARCHAR, kind VARCHAR, line VARCHAR)")
-            if row_list:
-                con.executemany("INSERT INTO t VALUES (?,?,?,?)", row_list)
-            esc = tmp_path.replace("'", "''")
-            con.execute(
-                f"COPY (SELECT * FROM t ORDER BY day, ts) TO '{esc}' "
-                "(FORMAT PARQUET, COMPRESSION 'zstd')"
-            )
-            written = con.execute(f"SELECT count(*) FROM read_parquet('{esc}')").fetchone()[0]
-        finally:
-            con.close()
-        if written != len(row_list):
+        con.execute(f"SET temp_directory = {_sql_literal(spill_dir)}")
+        con.execute("CREATE TEMP TABLE lines(day VARCHAR, src INTEGER, n BIGINT, line VARCHAR)")
+        con.execute(f"CREATE TEMP TABLE staged AS SELECT {names}, 0 AS src, 0::BIGINT AS n "
+                    f"FROM ({_compact_encode_sql('SELECT * FROM lines')}) LIMIT 0")
+
+        if os.path.exists(parquet_path):
+            parquet = f"read_parquet({_sql_literal(parquet_path)}, file_row_number = true)"
+            if parquet_schema_version(parquet_path) >= 2:
+                con.execute(f"INSERT INTO staged SELECT {PARQUET_SCHEMA_VERSION}, day, ts, kind, "
+                            f"{', '.join(name for name, _t in TYPED_FIELDS)}, "
+                            f"nullif(json(extra), '{{}}'), missing, 0, file_row_number FROM {parquet}")
+            else:
+                con.execute(f"INSERT INTO lines SELECT day, 0, file_row_number, line FROM {parquet}")
+
+        if src_files:
+            try:
+                _load_day_lines(con, src_files)
+            except duckdb.Error:
+                # A day file that is not valid UTF-8 (a line torn inside a multibyte
+                # character) fails the whole read; load the files one by one instead.
+                con.execute("DELETE FROM lines WHERE src = 1")
+                for path in src_files:
+                    try:
+                        _load_day_lines(con, [path])
+                    except duckdb.Error:
+                        _load_day_lines_lenient(con, path)
+
+        # Skip blank and torn lines (and JSON that isn't an object) rather than abort the month.
+        con.execute(
+            "INSERT INTO staged " + _compact_encode_sql(
+                "SELECT day, src, n, line FROM lines "
+                "WHERE json_type(CASE WHEN json_valid(line) THEN line END) = 'OBJECT'")
+        )
+        # Identical rows dedupe to their first occurrence, so re-runs are idempotent.
+        con.execute(f"CREATE TEMP TABLE compacted AS SELECT {names}, min(src) AS src, "
+                    f"arg_min(n, (src, n)) AS n FROM staged GROUP BY ALL")
+        expected = con.execute("SELECT count(*) FROM compacted").fetchone()[0]
+        esc = tmp_path.replace("'", "''")
+        con.execute(
+            f"COPY (SELECT {names} FROM compacted ORDER BY day, ts, src, n) TO '{esc}' "
+            "(FORMAT PARQUET, COMPRESSION 'zstd')"
+        )
+        written = con.execute(f"SELECT count(*) FROM read_parquet('{esc}')").fetchone()[0]
+        if written != expected:
             raise RuntimeError(
-                f"compaction row mismatch for {year}-{month}: wrote {written}, expected {len(row_list)}")
+                f"compaction row mismatch for {year}-{month}: wrote {written}, expected {expected}")
         os.replace(tmp_path, parquet_path)      # atomic publish
+        _write_manifest(month_manifest_path(year, month, hist_dir),
+                        _compacted_manifest(con, os.path.getsize(parquet_path)))
     except Exception:
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
         raise
+    finally:
+        con.close()
+        shutil.rmtree(spill_dir, ignore_errors=True)
 
     if remove_ndjson:
         for path in src_files:
@@ -300,6 +1259,58 @@ def compact_month(year, month, hist_dir=None, *, remove_ndjson=False):
     return parquet_path
 
 
+def _compacted_manifest(con, parquet_bytes) -> dict:
+    """_build_manifest's result for compact_month's ``compacted`` table, aggregated in SQL."""
+    days = {}
+    # Only a string ``ts`` (or ``slot_start`` standing in for it) bounds the day.
+    string_ts = "ts <> '' AND (('0x' || missing)::BIGINT & 1 = 0 OR ts = slot_start)"
+    for iso, kind, rows, min_ts, max_ts in con.execute(
+            f"SELECT day, kind, count(*), min(ts) FILTER (WHERE {string_ts}), max(ts) FILTER (WHERE {string_ts}) "
+            "FROM compacted GROUP BY day, kind ORDER BY day, kind").fetchall():
+        entry = days.setdefault(iso, {"rows": 0, "kinds": {}, "min_ts": None, "max_ts": None, "totals": {}})
+        entry["rows"] += rows
+        entry["kinds"][kind] = rows
+        if min_ts is not None:
+            entry["min_ts"] = min_ts if entry["min_ts"] is None else min(entry["min_ts"], min_ts)
+            entry["max_ts"] = max_ts if entry["max_ts"] is None else max(entry["max_ts"], max_ts)
+    # Last valid reading of each cumulative day counter, as JSON so an int stays an int.
+    totals = ", ".join(
+        f"last(coalesce(to_json({key}), CASE WHEN json_type(extra, '$.{key}') IN ('UBIGINT', 'BIGINT') "
+        f"THEN json_extract(extra, '$.{key}') END) ORDER BY ts, src, n) "
+        f"FILTER (WHERE {key} IS NOT NULL OR json_type(extra, '$.{key}') IN ('UBIGINT', 'BIGINT'))"
+        for key in _DAY_TOTAL_FIELDS)
+    for iso, *values in con.execute(
+            f"SELECT day, {totals} FROM compacted WHERE kind = 'cycle' GROUP BY day").fetchall():
+        days[iso]["totals"] = {key: json.loads(value)
+                               for key, value in zip(_DAY_TOTAL_FIELDS, values) if value is not None}
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "schema_version": PARQUET_SCHEMA_VERSION,
+        "parquet_bytes": parquet_bytes,
+        "rows": sum(d["rows"] for d in days.values()),
+        "days": days,
+    }
+
+
+def migrate_parquet_months(hist_dir=None) -> list:
+    """Rewrite every month Parquet older than PARQUET_SCHEMA_VERSION in the current layout.
+
+    Each month goes through compact_month (verified row count, atomic rename), so an
+    interrupted migration leaves every month readable. Returns the migrated paths.
+    """
+    hist_dir = resolve_history_dir(hist_dir)
+    if not _HAVE_DUCKDB:
+        raise RuntimeError("history_store.migrate_parquet_months requires duckdb")
+    done = []
+    for ym in _parquet_months(hist_dir):
+        y, m = ym.split("-")
+        path = month_parquet_path(int(y), int(m), hist_dir)
+        if parquet_schema_version(path) < PARQUET_SCHEMA_VERSION:
+            compact_month(int(y), int(m), hist_dir, remove_ndjson=False)
+            done.append(path)
+    return done
+
+
 def backfill_cold_months(hist_dir=None, *, remove_ndjson=True, before=None) -> list:
     """Compact every complete past month (strictly before ``before``'s month).
 
@@ -0,0 +1,161 @@
+"""One fetched Tibber price horizon, parsed and indexed once for every consumer.
+
+A fetch yields ``{'start', 'total', 'level'}`` points for today and, from ~13:00,
+tomorrow. The MQTT highest/lowest publishers, the appliance and charge schedulers,
+the current-price lookup and the optimizer each used to re-parse and re-sort that
+list (the publishers ~40 times per publish). A :class:`PriceHorizon` is built once
+per fetch instead and holds:
+
+  * parsed ``starts`` and contiguous ``totals`` / ``levels`` tuples in time order;
+  * ``rank``, the slot indices in ascending price order, and the same per local day;
+  * per-day index ranges (``day_range``) keyed by the local date;
+  * an O(1) slot-for-time lookup (``index_at`` / ``price_at``) on regular grids.
+
+Instances are immutable after construction, so one can be shared across threads
+and handed from the fetch to every reader without copying.
+"""
+import bisect
+from datetime import datetime
+from types import MappingProxyType
+
+from dateutil import parser as date_parser
+
+HOUR_S = 3600
+
+
+def parse_start(value) -> datetime:
+    """A price point's start (datetime or ISO-8601 string) as a datetime."""
+    if isinstance(value, datetime):
+        return value
+    text = str(value)
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return date_parser.parse(text)
+
+
+def _point_fields(point):
+    """(start, total, level) of a point dict or a tibber library price object."""
+    if isinstance(point, dict):
+        return point["start"], point["total"], point.get("level")
+    return point.starts_at, point.total, point.level
+
+
+class PriceHorizon:
+    """Immutable, pre-indexed price horizon. Build with :meth:`from_points`."""
+
+    __slots__ = ("starts", "totals", "levels", "slot_seconds", "rank",
+                 "_epochs", "_regular", "_days", "_day_rank", "_zone", "_hourly")
+
+    def __init__(self, starts, totals, levels, zone=None, default_slot_seconds=HOUR_S):
+        """``starts`` must be sorted; use :meth:`from_points` for raw fetch output."""
+        set_ = object.__setattr__
+        set_(self, "starts", tuple(starts))
+        set_(self, "totals", tuple(float(t) for t in totals))
+        set_(self, "levels", tuple(levels))
+        set_(self, "_zone", zone)
+        set_(self, "_hourly", None)
+        epochs = tuple(s.timestamp() for s in self.starts)
+        gaps = [b - a for a, b in zip(epochs, epochs[1:]) if b > a]
+        slot = min(gaps) if gaps else float(default_slot_seconds)
+        set_(self, "_epochs", epochs)
+        set_(self, "slot_seconds", slot)
+        set_(self, "_regular", all(b - a == slot for a, b in zip(epochs, epochs[1:])))
+        set_(self, "rank", tuple(sorted(range(len(epochs)), key=self.totals.__getitem__)))
+
+        days = {}
+        for i, start in enumerate(self.starts):
+            local = start.astimezone(zone) if zone is not None and start.tzinfo else start
+            lo, _hi = days.get(local.date(), (i, i))
+            days[local.date()] = (lo, i + 1)
+        set_(self, "_days", MappingProxyType(days))
+        set_(self, "_day_rank", MappingProxyType({
+            day: tuple(sorted(range(lo, hi), key=self.totals.__getitem__)) for day, (lo, hi) in days.items()
+        }))
+
+    @classmethod
+    def from_points(cls, points, zone=None, default_slot_seconds=HOUR_S):
+        """Horizon of ``points`` (dicts or library price objects), sorted by start.
+
+        Malformed points are skipped. ``zone`` is the timezone whose dates partition
+        the days (the starts' own offsets when None). A horizon is returned as is.
+        """
+        if isinstance(points, cls):
+            return points
+        rows = []
+        for point in points or ():
+            try:
+                start, total, level = _point_fields(point)
+                rows.append((parse_start(start), float(total), level))
+            except (AttributeError, KeyError, TypeError, ValueError, OverflowError):
+                continue
+        rows.sort(key=lambda row: row[0])
+        return cls([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows],
+                   zone=zone, default_slot_seconds=default_slot_seconds)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PriceHorizon is immutable")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        first = self.starts[0].isoformat() if self.starts else None
+        return f"PriceHorizon({len(self)} slots of {self.slot_seconds:.0f}s from {first})"
+
+    # --- lookups ----------------------------------------------------------
+
+    def index_at(self, when):
+        """Index of the slot whose window contains ``when``, or None."""
+        if not self._epochs:
+            return None
+        t = when.timestamp()
+        if self._regular:
+            i = int((t - self._epochs[0]) // self.slot_seconds)
+            return i if 0 <= i < len(self._epochs) else None
+        i = bisect.bisect_right(self._epochs, t) - 1
+        return i if i >= 0 and t < self._epochs[i] + self.slot_seconds else None
+
+    def price_at(self, when):
+        """Price of the slot containing ``when``, or None outside the horizon."""
+        i = self.index_at(when)
+        return None if i is None else self.totals[i]
+
+    @property
+    def days(self) -> tuple:
+        return tuple(self._days)
+
+    def day_range(self, day) -> tuple:
+        """``(lo, hi)`` slot indices of local date ``day``; ``(0, 0)`` when absent."""
+        return self._days.get(day, (0, 0))
+
+    def day_rank(self, day) -> tuple:
+        """Slot indices of ``day`` in ascending price order (empty when absent)."""
+        return self._day_rank.get(day, ())
+
+    def point(self, i) -> dict:
+        return {"start": self.starts[i].isoformat(), "total": self.totals[i], "level": self.levels[i]}
+
+    def to_points(self) -> list:
+        """The horizon as ``{'start': ISO-8601, 'total', 'level'}`` dicts, in time order."""
+        return [self.point(i) for i in range(len(self.starts))]
+
+    def hourly(self):
+        """This horizon at hourly resolution (itself when already hourly or coarser).
+
+        Sub-hour slots are averaged per clock hour, keeping the hour's first level,
+        for the consumers that schedule whole hours. Built once and kept.
+        """
+        if self.slot_seconds >= HOUR_S or not self.starts:
+            return self
+        if self._hourly is None:
+            hours = {}
+            for start, total, level in zip(self.starts, self.totals, self.levels):
+                key = start.replace(minute=0, second=0, microsecond=0)
+                entry = hours.setdefault(key, [0.0, 0, level])
+                entry[0] += total
+                entry[1] += 1
+            object.__setattr__(self, "_hourly", PriceHorizon(
+                list(hours), [s / n for s, n, _l in hours.values()], [l for _s, _n, l in hours.values()],
+                zone=self._zone))
+        return self._hourly
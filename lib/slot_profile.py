@@ -0,0 +1,241 @@
+"""Rolling per-day, per-quarter-hour load and PV samples derived from the cycle history.
+
+The optimizer's empirical models (``energy_broker._historical_load_by_slot`` and
+``_pv_shape_by_slot``) are the mean of the last N days' cycle records bucketed by
+``'HH:MM'``. Rebuilding those buckets by re-reading N days of history every cycle is
+wasted work: a closed day never changes and today only grows by one record per cycle.
+
+So each day's bucketed samples are kept here, in ``HISTORY_DIR/profiles/slots-<day>.json``:
+the energy broker adds each record as it appends it (settlements add no samples but
+advance the covered size), and a lookup concatenates at most N small per-day arrays. Samples (not running sums) are
+kept so the mean is computed over exactly the values, in exactly the order, the
+history scan produced — the result is bit-identical.
+
+A day's profile records the size of the history file it was derived from (the hot
+NDJSON, or the month Parquet once the day is compacted) and the filters it applied.
+Whenever either no longer matches — a record written by something other than the energy broker, a compaction,
+a profile that predates this module — the day is rebuilt from ``history_store.read_day``
+and persisted again, so the profile can never drift from the history.
+"""
+import os
+import json
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from lib import history_store as _hist
+
+PROFILE_SUBDIR = "profiles"
+PROFILE_VERSION = 1
+PROFILE_RETENTION_DAYS = 35
+MEMORY_MAX_DAYS = 40
+HEAVY_BATTERY_W = 4000
+DAYLIGHT_HOURS = (5, 22)
+
+_lock = threading.Lock()
+_profiles = OrderedDict()     # (history_dir, day) -> profile dict
+_pruned = {}                  # history_dir -> day profiles were last pruned on
+
+
+def _slot_key(when) -> str:
+    return f"{when.hour:02d}:{(when.minute // 15) * 15:02d}"
+
+
+def record_samples(rec, daylight=DAYLIGHT_HOURS):
+    """``(slot, load_kw, pv_kw)`` contributed by one history record (None where excluded).
+
+    Mirrors the historical scan: settlement records are skipped, load samples taken
+    during heavy battery activity (|batt_w| > 4 kW) are dropped because the AC-out
+    reading is unreliable then, and PV only counts within the daylight hours.
+    """
+    if rec.get('kind') == 'settlement':
+        return None, None, None
+    ts = rec.get('ts')
+    if ts is None:
+        return None, None, None
+    load = pv = slot = None
+
+    load_w, batt = rec.get('load_w'), rec.get('batt_w')
+    if load_w is not None:
+        try:
+            if not (batt is not None and abs(float(batt)) > HEAVY_BATTERY_W):
+                when = datetime.fromisoformat(ts)
+                slot = _slot_key(when)
+                load = float(load_w) / 1000.0
+        except (TypeError, ValueError):
+            load = None
+
+    pv_w = rec.get('pv_w')
+    if pv_w is not None:
+        try:
+            when = datetime.fromisoformat(ts)
+            if daylight[0] <= when.hour < daylight[1]:
+                slot = _slot_key(when)
+                pv = max(0.0, float(pv_w)) / 1000.0
+        except (TypeError, ValueError):
+            pv = None
+    return slot, load, pv
+
+
+def _filters(daylight):
+    return [HEAVY_BATTERY_W, *daylight]
+
+
+def _empty(iso, source, daylight):
+    return {"version": PROFILE_VERSION, "day": iso, "source": source, "filters": _filters(daylight),
+            "load": {}, "pv": {}}
+
+
+def _add(profile, rec, daylight):
+    slot, load, pv = record_samples(rec, daylight)
+    if load is not None:
+        profile["load"].setdefault(slot, []).append(load)
+    if pv is not None:
+        profile["pv"].setdefault(slot, []).append(pv)
+
+
+def _day_source(history_dir, iso):
+    """``[file name, size]`` of the file ``read_day`` serves ``iso`` from, or None."""
+    for path in (os.path.join(history_dir, f"ess-{iso}.ndjson"), _hist._month_parquet_for_day(iso, history_dir)):
+        try:
+            return [os.path.basename(path), os.path.getsize(path)]
+        except OSError:
+            continue
+    return None
+
+
+def _profile_path(history_dir, iso):
+    return os.path.join(history_dir, PROFILE_SUBDIR, f"slots-{iso}.json")
+
+
+def _load(history_dir, iso):
+    try:
+        with open(_profile_path(history_dir, iso), encoding="utf-8") as fh:
+            profile = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(profile, dict) or profile.get("version") != PROFILE_VERSION:
+        return None
+    return profile
+
+
+def _save(history_dir, profile):
+    directory = os.path.join(history_dir, PROFILE_SUBDIR)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".slots-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(profile, fh, separators=(",", ":"))
+        os.replace(tmp_path, _profile_path(history_dir, profile["day"]))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _remember(history_dir, iso, profile):
+    """Keep ``profile`` in memory (lock held), bounded to MEMORY_MAX_DAYS."""
+    _profiles[(history_dir, iso)] = profile
+    _profiles.move_to_end((history_dir, iso))
+    while len(_profiles) > MEMORY_MAX_DAYS:
+        _profiles.popitem(last=False)
+
+
+def _rebuild(history_dir, iso, source, daylight):
+    profile = _empty(iso, source, daylight)
+    for rec in _hist.read_day(iso, history_dir):
+        _add(profile, rec, daylight)
+    try:
+        _save(history_dir, profile)
+    except OSError as e:
+        logging.debug(f"slot_profile: could not persist {iso}: {e}")
+    return profile
+
+
+def _current(profile, source, daylight):
+    """Whether ``profile`` was derived from ``source`` with the current filters."""
+    return (profile is not None and profile.get("source") == source
+            and profile.get("filters") == _filters(daylight))
+
+
+def _day_profile(history_dir, iso, daylight):
+    source = _day_source(history_dir, iso)
+    if source is None:
+        return None
+    with _lock:
+        profile = _profiles.get((history_dir, iso))
+    if not _current(profile, source, daylight):
+        profile = _load(history_dir, iso)
+        if not _current(profile, source, daylight):
+            profile = _rebuild(history_dir, iso, source, daylight)
+        with _lock:
+            _remember(history_dir, iso, profile)
+    return profile
+
+
+def add_record(history_dir, iso, rec, size_before, size_after, daylight=DAYLIGHT_HOURS):
+    """Fold a record just appended to ``iso``'s NDJSON into that day's profile.
+
+    ``size_before``/``size_after`` are the file's size around the append; when the
+    profile didn't cover exactly ``size_before`` bytes the day is rebuilt instead.
+    """
+    name = f"ess-{iso}.ndjson"
+    with _lock:
+        profile = _profiles.get((history_dir, iso))
+    if profile is None:
+        profile = _load(history_dir, iso)
+    if _current(profile, [name, size_before], daylight):
+        # Copy before adding: lookups on other threads may be reading the old one.
+        profile = {**profile, "source": [name, size_after],
+                   "load": {k: list(v) for k, v in profile["load"].items()},
+                   "pv": {k: list(v) for k, v in profile["pv"].items()}}
+        _add(profile, rec, daylight)
+        _save(history_dir, profile)
+    else:
+        profile = _rebuild(history_dir, iso, _day_source(history_dir, iso), daylight)
+    with _lock:
+        _remember(history_dir, iso, profile)
+        pruned, _pruned[history_dir] = _pruned.get(history_dir), iso
+    if pruned != iso:
+        _prune(history_dir, iso)
+
+
+def _prune(history_dir, today_iso):
+    """Drop profile files older than PROFILE_RETENTION_DAYS (rebuilt on demand if needed)."""
+    cutoff = (date.fromisoformat(today_iso) - timedelta(days=PROFILE_RETENTION_DAYS)).isoformat()
+    directory = os.path.join(history_dir, PROFILE_SUBDIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith("slots-") and name.endswith(".json") and name[6:-5] < cutoff:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def slot_means(history_dir, days, metric, daylight=DAYLIGHT_HOURS, today=None) -> dict:
+    """Mean ``metric`` (``'load'`` or ``'pv'``, kW) per ``'HH:MM'`` over the last ``days`` days.
+
+    Identical to bucketing the cycle records of today and the ``days - 1`` days before
+    it and averaging each bucket; {} when there is no usable history.
+    """
+    today = today or datetime.now().date()
+    buckets = {}
+    for i in range(max(1, days)):
+        profile = _day_profile(history_dir, (today - timedelta(days=i)).isoformat(), daylight)
+        if profile is None:
+            continue
+        for slot, values in profile[metric].items():
+            buckets.setdefault(slot, []).extend(values)
+    return {k: sum(v) / len(v) for k, v in buckets.items() if v}
+
+
+def clear():
+    with _lock:
+        _profiles.clear()
+        _pruned.clear()
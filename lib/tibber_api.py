@@ -14,6 +14,7 @@ TIBBER_GQL_URL = "https://api.tibber.com/v1-beta/gql"
 
 from lib.config_retrieval import retrieve_setting
 from lib.constants import logging, systemId0
+from lib.price_horizon import PriceHorizon
 from lib.domoticz_updater import domoticz_update
 from lib.clients.mqtt_client_factory import VictronClient
 from gql.transport.exceptions import TransportClosed, TransportQueryError
@@ -28,20 +29,30 @@ tzinfos = {"UTC": tz.gettz(retrieve_setting('TIMEZONE'))}
 # constructor, so initialising it inline would block import (and thus the whole
 # service start) — and crash outright if Tibber is down. Start with no account and
 # populate it from a background daemon thread that retries with backoff, so a slow
-# or unreachable Tibber can never block or crash startup. The single consumer
-# (``live_measurements``) reads ``_home`` at call time and skips if not ready yet.
+# or unreachable Tibber can never block or crash startup. ``live_measurements``
+# reads ``_home`` at call time and skips if not ready yet; price/home reads go
+# through ``get_account()``, which reuses (and periodically refreshes) this one
+# account instead of paying the schema download and TLS setup per call.
 account = None
 _home = None
+_account_lock = threading.Lock()
+_account_refreshed_at = 0.0
+
+
+def _set_account(acct):
+    global account, _home, _account_refreshed_at
+    account, _home = acct, (acct.homes[0] if acct.homes else None)
+    _account_refreshed_at = time.monotonic()
 
 
 def _account_init_worker(delay: float = 5.0):
-    global account, _home
     token = retrieve_setting('TIBBER_ACCESS_TOKEN')
     while True:
         try:
-            acct = tibber.Account(token)
-            account, _home = acct, (acct.homes[0] if acct.homes else None)
-            logging.info("Tibber: account initialised.")
+            with _account_lock:
+                if account is None:
+                    _set_account(tibber.Account(token))
+                    logging.info("Tibber: account initialised.")
             return
         except Exception as e:                      # network/timeout/transport errors
             logging.warning("Tibber: account init failed (retry in %ss): %s", int(delay), e)
@@ -49,11 +60,36 @@ def _account_init_worker(delay: float = 5.0):
             delay = min(delay * 2, 60.0)            # exponential backoff, capped at 60s
 
 
+def get_account(max_age_s: float | None = None):
+    """The shared tibber.Account, created on first use if the init worker has not yet.
+
+    Its cached home/price data is re-queried over the existing session (no schema
+    download) once older than ``max_age_s`` (TIBBER_ACCOUNT_REFRESH_S, default 900).
+    Raises whatever the library raises when Tibber is unreachable.
+    """
+    global _account_refreshed_at
+    if max_age_s is None:
+        max_age_s = _float_setting('TIBBER_ACCOUNT_REFRESH_S', 900.0)
+    with _account_lock:
+        if account is None:
+            _set_account(tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN')))
+        elif time.monotonic() - _account_refreshed_at >= max_age_s:
+            account.update()
+            _account_refreshed_at = time.monotonic()
+        return account
+
+
+def get_home():
+    """The first home of the shared account, reflecting its latest refresh."""
+    return get_account().homes[0]
+
+
 threading.Thread(target=_account_init_worker, name="tibber-account-init", daemon=True).start()
 
 client = VictronClient().get_client()
 
 _PRICE_CACHE = {}
+_http = None
 DEFAULT_PRICE_CACHE_PATH = "/dev/shm/cerbo_tibber_price_cache.json"
 
 def live_measurements(home=None):
@@ -122,30 +158,25 @@ def live_measurements(home=None):
         client.publish("Cerbomoticzgx/system/shutdown", payload=f"{{\"value\": \"True\"}}", retain=True)
 
 
-def dip_peak_data(caller=None, level="CHEAP", day=0, price_cap=0.22):
+def dip_peak_data(caller=None, level="CHEAP", day=0, price_cap=0.22, horizon=None):
     """
     :param: str: level = "CHEAP", "EXPENSIVE", "NORMAL"
     :param: int: 0 = "today" or 1 = "tomorrow"
     """
     data = []
 
-    _account = tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN'))
-    home = _account.homes[0]
-
-    prices = home.current_subscription.price_info.today if day == 0 else home.current_subscription.price_info.tomorrow
-
-    if not prices:
-        return data
+    horizon = (horizon if horizon is not None else get_price_horizon()).hourly()
+    target = (_local_now() + timedelta(days=day)).date()
+    order = horizon.day_rank(target)
 
-    for i in range(1, len(prices) + 1):
+    for rank in range(1, len(order) + 1):
+        hour = _ranked_price_point(horizon, target, rank)
         if day == 0:
-            hour = today_price_points(home, i)
-            if level in hour[2] and time.localtime()[3] <= today_price_points(home, i)[0].hour and hour[3] <= price_cap:
+            if level in hour[2] and time.localtime()[3] <= hour[0].hour and hour[3] <= price_cap:
                 logging.info(f"{caller}: Today: {hour[2]} at {hour[0]} for {hour[3]}")
                 data.append(str(hour[0]).replace(":00:00", ""))
 
         if day == 1:
-            hour = tomorrow_price_points(home, i)
             if level in hour[2] and hour[3] <= price_cap:
                 logging.info(f"{caller}: Tomorrow: {hour[2]} at {hour[0]} for {hour[3]}")
                 data.append(str(hour[0]).replace(":00:00", ""))
@@ -154,55 +185,34 @@ def dip_peak_data(caller=None, level="CHEAP", day=0, price_cap=0.22):
 
 def publish_pricing_data(caller):
     try:
-        _account = tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN'))
-        home = _account.homes[0]
+        # One fetch, one PriceHorizon: every topic below is published from it.
+        horizon = get_price_horizon()
 
-        mqtt_publish_lowest_price_points(home)
-        mqtt_publish_highest_price_points(home)
-        mqtt_publish_current_price(home)
+        mqtt_publish_lowest_price_points(horizon)
+        mqtt_publish_highest_price_points(horizon)
+        mqtt_publish_current_price(horizon)
 
         # Publish all price points for AI optimizer. Accept any truthy form of
         # the flag ("1", "true", "yes", "on", "True") for consistency with the
         # EnergyBroker truthiness check.
         ai_flag = str(retrieve_setting('AI_POWERED_ESS_ALGORITHM') or "").strip().lower()
         if ai_flag in {"1", "true", "yes", "on"}:
-            mqtt_publish_all_prices(home)
-
-        # c = _account.websession.close()
-        # c.close()
-        # del home, _account
+            mqtt_publish_all_prices(horizon)
 
         logging.debug(f"Tibber: (called from {caller}): retrieved and published Tibber pricing data to mqtt bus.")
 
     except Exception as e:
         logging.error(f"Tibber: (publish_pricing_data) (Error): {e}")
 
-def mqtt_publish_all_prices(home):
+def mqtt_publish_all_prices(horizon):
     """
     Publishes all available price points (today and tomorrow) to MQTT for the AI optimizer.
     """
     try:
-        prices = []
-        if home.current_subscription.price_info.today:
-            prices.extend(home.current_subscription.price_info.today)
-        if home.current_subscription.price_info.tomorrow:
-            prices.extend(home.current_subscription.price_info.tomorrow)
-
-        if prices:
-            # Sort by time just in case, though usually they are sorted
-            prices.sort(key=lambda x: x.starts_at)
-
-            # Create a simplified list of dicts
-            price_list = []
-            for p in prices:
-                 price_list.append({
-                     "start": p.starts_at,
-                     "total": p.total,
-                     "level": p.level
-                 })
+        if horizon:
+            price_list = horizon.to_points()
 
             # Publish as a single JSON blob
-            import json
             payload = json.dumps(price_list)
             client.publish("Tibber/home/price_info/all", payload=payload, qos=0, retain=True)
             logging.debug(f"Tibber: Published {len(price_list)} price points to Tibber/home/price_info/all")
@@ -244,9 +254,12 @@ def _normalise_price_points(points: list) -> list:
     return normalised
 
 
+def _local_zone():
+    return tz.gettz(str(retrieve_setting('TIMEZONE') or '').strip("'\"")) or tz.tzlocal()
+
+
 def _local_now():
-    zone = tz.gettz(str(retrieve_setting('TIMEZONE') or '').strip("'\"")) or tz.tzlocal()
-    return datetime.now(zone)
+    return datetime.now(_local_zone())
 
 
 def _has_next_day_prices(points: list, now=None) -> bool:
@@ -347,6 +360,14 @@ def _cached_price_points(resolution: str) -> list:
         return []
 
 
+def _http_session() -> requests.Session:
+    """Keep-alive session for the direct GraphQL price queries (one TLS handshake)."""
+    global _http
+    if _http is None:
+        _http = requests.Session()
+    return _http
+
+
 def _fetch_price_points_graphql_once(resolution: str) -> list:
     """Query the Tibber GraphQL API directly for price points at the requested
     resolution.
@@ -366,7 +387,7 @@ def _fetch_price_points_graphql_once(resolution: str) -> list:
         ") { today { total startsAt level } tomorrow { total startsAt level } } } } } }"
     )
     try:
-        resp = requests.post(
+        resp = _http_session().post(
             TIBBER_GQL_URL,
             json={"query": query},
             headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
@@ -415,8 +436,7 @@ def _fetch_price_points_graphql(resolution: str, attempts: int = 3, retry_delay_
 def _get_all_price_points_via_library() -> list:
     """Fallback: hourly price points via the tibber python library."""
     try:
-        _account = tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN'))
-        home = _account.homes[0]
+        home = get_home()
 
         prices = []
         if home.current_subscription.price_info.today:
@@ -430,6 +450,18 @@ def _get_all_price_points_via_library() -> list:
         return []
 
 
+def _price_resolution() -> str:
+    resolution = str(retrieve_setting('TIBBER_PRICE_RESOLUTION') or 'QUARTER_HOURLY').strip().upper()
+    return resolution if resolution in ('QUARTER_HOURLY', 'HOURLY') else 'QUARTER_HOURLY'
+
+
+def _float_setting(name: str, default: float) -> float:
+    try:
+        return float(retrieve_setting(name) or default)
+    except (TypeError, ValueError):
+        return default
+
+
 def get_all_price_points():
     """
     Returns a list of all available price points (today and tomorrow) as dicts
@@ -441,10 +473,7 @@ def get_all_price_points():
     ('QUARTER_HOURLY' default, or 'HOURLY'). Falls back to hourly library data if
     the direct query yields nothing (e.g. market/home does not support it yet).
     """
-    resolution = str(retrieve_setting('TIBBER_PRICE_RESOLUTION') or 'QUARTER_HOURLY').strip().upper()
-    if resolution not in ('QUARTER_HOURLY', 'HOURLY'):
-        resolution = 'QUARTER_HOURLY'
-
+    resolution = _price_resolution()
     points = _fetch_price_points_graphql(resolution)
     if points:
         if (
@@ -487,7 +516,168 @@ def get_all_price_points():
     logging.warning("Tibber: Falling back to hourly price points via the tibber library.")
     return _get_all_price_points_via_library()
 
-def _current_quarter_hour_price():
+class PriceFetchCoordinator:
+    """Single-flight, TTL-aware source of the price horizon.
+
+    Tibber publishes prices once a day (tomorrow's from ~13:00), yet the optimizer,
+    the current-price lookup and the pricing jobs all ask for them every few
+    minutes. The coordinator serves the last horizon (seeded from the /dev/shm
+    cache after a restart) while it is complete and only fetches when:
+
+      * there is none, or the current slot has rolled past its last slot — after a
+        failed fetch, retried at most every ``retry_s`` seconds as well;
+      * next-day prices are expected (after 13:05) but missing — retried at most
+        every ``retry_s`` seconds (TIBBER_PRICE_RETRY_S, default 300);
+      * it is older than ``max_age_s`` (TIBBER_PRICE_MAX_AGE_S, default 6h), a
+        safety net for Tibber re-publishing corrected prices.
+
+    Concurrent callers collapse into one in-flight fetch: they wait on the lock
+    and are served what it produced, whether it succeeded or failed, so a Tibber
+    outage costs one fetch per ``retry_s``, not one per waiting caller.
+    """
+
+    def __init__(self, fetch=None, seed=None, retry_s=300.0, max_age_s=21600.0, clock=time.monotonic):
+        self._fetch = fetch or (lambda: PriceHorizon.from_points(get_all_price_points(), zone=_local_zone()))
+        self._seed = seed
+        self.retry_s = retry_s
+        self.max_age_s = max_age_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._horizon = None
+        self._fetched_at = None
+        self._attempted_at = None
+        self._failed_at = None      # last fetch failed at (cleared by a successful one)
+        self._generation = 0        # completed fetches, successful or not
+        self.requests = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _stale(self, now=None) -> str | None:
+        """Why the held horizon needs a fetch, or None while it can be served."""
+        horizon = self._horizon
+        now = now or _local_now()
+        if not horizon or horizon._epochs[-1] + horizon.slot_seconds <= now.timestamp():
+            if self._failed_at is not None and self._clock() - self._failed_at < self.retry_s:
+                return None     # serve what is held (possibly nothing) until the retry is due
+            return "rollover" if horizon else "empty"
+        since_attempt = self._clock() - self._attempted_at
+        if since_attempt >= self.max_age_s:
+            return "max_age"
+        if (_next_day_prices_expected(now) and now.date() + timedelta(days=1) not in horizon.days
+                and since_attempt >= self.retry_s):
+            return "next_day"
+        return None
+
+    def _seed_from_cache(self) -> None:
+        self._seed, seed = None, self._seed
+        try:
+            horizon = seed() if seed else None
+        except Exception as e:
+            logging.debug("Tibber: could not seed prices from cache: %s", e)
+            return
+        if horizon:
+            self._horizon = horizon
+            self._fetched_at = self._attempted_at = self._clock()
+
+    def get(self, force: bool = False) -> PriceHorizon:
+        """The current price horizon, fetching only when it is stale (or ``force``)."""
+        with self._stats_lock:
+            self.requests += 1
+        generation_seen = self._generation
+        with self._lock:
+            if self._horizon is None and self._seed is not None:
+                self._seed_from_cache()
+            waited = self._generation != generation_seen
+            # A fetch that finished while this caller waited answers it, even a failed one.
+            reason = "forced" if force else None if waited else self._stale()
+            if reason is None:
+                with self._stats_lock:
+                    self.hits += 1
+                    self.coalesced += waited
+                return self._served()
+            started = self._clock()
+            try:
+                horizon = self._fetch()
+            except Exception as e:
+                logging.warning("Tibber: price fetch (%s) failed: %s", reason, e)
+                horizon = None
+            elapsed = self._clock() - started
+            self._attempted_at = self._clock()
+            self._failed_at = None if horizon else self._attempted_at
+            self._generation += 1
+            with self._stats_lock:
+                self.fetches += 1
+                self.errors += not horizon
+                self._latency_total += elapsed
+                self._latency_max = max(self._latency_max, elapsed)
+            logging.debug("Tibber: fetched prices (%s) in %.0f ms.", reason, elapsed * 1000.0)
+            if horizon:
+                self._horizon, self._fetched_at = horizon, self._attempted_at
+            return self._served()
+
+    def _served(self) -> PriceHorizon:
+        return self._horizon if self._horizon is not None else PriceHorizon.from_points([])
+
+    def invalidate(self) -> None:
+        """Drop the held horizon so the next call fetches."""
+        with self._lock:
+            self._horizon = self._fetched_at = self._attempted_at = self._failed_at = None
+
+    def stats(self) -> dict:
+        horizon, fetched_at = self._horizon, self._fetched_at
+        with self._stats_lock:
+            return {
+                'requests': self.requests,
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'fetches': self.fetches,
+                'errors': self.errors,
+                'latency_ms_avg': round(self._latency_total / (self.fetches or 1) * 1000.0, 3),
+                'latency_ms_max': round(self._latency_max * 1000.0, 3),
+                'slots': len(horizon) if horizon is not None else 0,
+                'age_s': round(self._clock() - fetched_at, 1) if fetched_at is not None else None,
+            }
+
+
+def _seed_price_horizon():
+    return PriceHorizon.from_points(_cached_price_points(_price_resolution()), zone=_local_zone())
+
+
+_PRICE_FETCHER = None
+
+
+def get_price_fetcher() -> PriceFetchCoordinator:
+    """The process-wide PriceFetchCoordinator."""
+    global _PRICE_FETCHER
+    if _PRICE_FETCHER is None:
+        _PRICE_FETCHER = PriceFetchCoordinator(
+            seed=_seed_price_horizon,
+            retry_s=_float_setting('TIBBER_PRICE_RETRY_S', 300.0),
+            max_age_s=_float_setting('TIBBER_PRICE_MAX_AGE_S', 21600.0),
+        )
+    return _PRICE_FETCHER
+
+
+def price_fetch_stats():
+    return _PRICE_FETCHER.stats() if _PRICE_FETCHER is not None else {}
+
+
+def get_price_horizon(force: bool = False) -> PriceHorizon:
+    """The price points of get_all_price_points(), parsed and indexed once.
+
+    Served by the PriceFetchCoordinator, so repeated calls reuse the last fetch
+    until it goes stale. Days are partitioned by the configured TIMEZONE.
+    Consumers should take one horizon and pass it around.
+    """
+    return get_price_fetcher().get(force=force)
+
+
+def _current_quarter_hour_price(horizon=None):
     """Return the price of the 15-minute slot containing 'now', or None.
 
     Uses the same quarter-hourly feed the optimizer uses so the published
@@ -495,197 +685,129 @@ def _current_quarter_hour_price():
     hourly).
     """
     try:
-        points = get_all_price_points()
-        if not points:
-            return None
-        parsed = []
-        for p in points:
-            start = p['start']
-            if not isinstance(start, datetime):
-                start = parser.parse(start, tzinfos=tzinfos)
-            parsed.append((start, p['total']))
-        parsed.sort(key=lambda x: x[0])
-        now = datetime.now(parsed[0][0].tzinfo)
-        current = None
-        for start, total in parsed:
-            if start <= now:
-                current = total
-            else:
-                break
-        return current
+        horizon = horizon if horizon is not None else get_price_horizon()
+        return horizon.price_at(datetime.now(timezone.utc))
     except Exception as e:
         logging.debug(f"Tibber: could not derive 15-min current price: {e}")
         return None
 
 
-def mqtt_publish_current_price(home):
+def mqtt_publish_current_price(horizon=None):
     # Publish the current 15-minute price when available (matches the optimizer);
     # fall back to the library's hourly current price.
-    value = _current_quarter_hour_price()
+    value = _current_quarter_hour_price(horizon)
     if value is None:
-        value = home.current_subscription.price_info.current.total
+        value = current_price(get_home())
     client.publish("Tibber/home/price_info/now/total", payload=f"{{\"value\": \"{value}\"}}", qos=0, retain=True)
 
 def current_price(home):
     price = home.current_subscription.price_info.current.total
     return price
 
-def mqtt_publish_highest_price_points(home):
-    # today
-    if today_price_points(home, rank=-1) and today_price_points(home, rank=-3):
-        logging.debug(f"Tibber: publishing today's highest price points to Mqtt broker...")
-        client.publish("Tibber/home/price_info/today/highest/0/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=0)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/0/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=0)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/0/level", payload=f"{{\"value\": \"{today_price_points(home, rank=0)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/0/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=0)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/today/highest/1/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=-1)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/1/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=-1)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/1/level", payload=f"{{\"value\": \"{today_price_points(home, rank=-1)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/1/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=-1)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/today/highest/2/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=-2)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/2/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=-2)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/2/level", payload=f"{{\"value\": \"{today_price_points(home, rank=-2)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/highest/2/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=-2)[3]}\"}}", qos=0, retain=True)
-
-    # tomorrow
-    if tomorrow_price_points(home, rank=-1) and tomorrow_price_points(home, rank=-3):
-        logging.debug(f"Tibber: publishing tomorrow's highest price points to Mqtt broker...")
-        client.publish("Tibber/home/price_info/tomorrow/highest/0/hour", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=0)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/0/delta", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=0)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/0/level", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=0)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/0/cost", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=0)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/tomorrow/highest/1/hour", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=-1)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/1/delta", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=-1)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/1/level", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=-1)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/highest/1/cost", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=-1)[3]}\"}}", qos=0, retain=True)
-
-def mqtt_publish_lowest_price_points(home):
-    # today
-    if today_price_points(home, rank=1) and today_price_points(home, rank=3):
-        logging.debug(f"Tibber: publishing today's lowest price points to Mqtt broker...")
-        client.publish("Tibber/home/price_info/today/lowest/0/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=1)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/0/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=1)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/0/level", payload=f"{{\"value\": \"{today_price_points(home, rank=1)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/0/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=1)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/today/lowest/1/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=2)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/1/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=2)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/1/level", payload=f"{{\"value\": \"{today_price_points(home, rank=2)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/1/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=2)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/today/lowest/2/hour", payload=f"{{\"value\": \"{today_price_points(home, rank=3)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/2/delta", payload=f"{{\"value\": \"{today_price_points(home, rank=3)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/2/level", payload=f"{{\"value\": \"{today_price_points(home, rank=3)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/today/lowest/2/cost", payload=f"{{\"value\": \"{today_price_points(home, rank=3)[3]}\"}}", qos=0, retain=True)
-
-    # tomorrow
-    if tomorrow_price_points(home, rank=1) and tomorrow_price_points(home, rank=2):
-        logging.debug(f"Tibber: publishing tomorrow's lowest price points to Mqtt broker...")
-        client.publish("Tibber/home/price_info/tomorrow/lowest/0/hour", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=1)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/0/delta", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=1)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/0/level", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=1)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/0/cost", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=1)[3]}\"}}", qos=0, retain=True)
-
-        client.publish("Tibber/home/price_info/tomorrow/lowest/1/hour", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=2)[0]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/1/delta", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=2)[1]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/1/level", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=2)[2]}\"}}", qos=0, retain=True)
-        client.publish("Tibber/home/price_info/tomorrow/lowest/1/cost", payload=f"{{\"value\": \"{tomorrow_price_points(home, rank=2)[3]}\"}}", qos=0, retain=True)
-
-def tomorrow_price_points(home, rank=1):
-    _tomorrow = home.current_subscription.price_info.tomorrow
-    _index = rank - 1
-
-    if _tomorrow:
-        _sorted_by_price = sorted(_tomorrow, key=lambda hour: hour.total, reverse=False)
-        _dto = parser.parse(_sorted_by_price[_index].starts_at, tzinfos=tzinfos)
-        _level = _sorted_by_price[_index].level
-        _cost = _sorted_by_price[_index].total
-        _hour = _dto.time()
-        _delta = _dto - datetime.now(timezone.utc).replace(microsecond=0)
-        logging.debug(f"Tibber: Tomorrow's lowest pricing is at: {_hour} starting in {_delta}")
-        return _hour, _delta, _level, _cost
+# Published ranks per day and side: topic slot -> rank as understood by
+# today/tomorrow_price_points (1 = cheapest, 0 = dearest, -1 = 2nd dearest, ...),
+# and the number of prices the day needs before it is published at all.
+_RANKED_TOPICS = {
+    ("today", "highest"): ((0, -1, -2), 4),
+    ("tomorrow", "highest"): ((0, -1), 4),
+    ("today", "lowest"): ((1, 2, 3), 3),
+    ("tomorrow", "lowest"): ((1, 2), 2),
+}
+_RANKED_FIELDS = ("hour", "delta", "level", "cost")
+
+
+def _publish_ranked_price_points(horizon, side):
+    horizon = horizon.hourly()
+    today = _local_now().date()
+    for label, day in (("today", today), ("tomorrow", today + timedelta(days=1))):
+        ranks, needed = _RANKED_TOPICS[(label, side)]
+        priced = len(horizon.day_rank(day))
+        # Until tomorrow's prices are out (~13:00) its topics read "not_yet_published",
+        # replacing yesterday's retained values (today's prices) on the dashboard.
+        if priced < needed and not (label == "tomorrow" and priced == 0):
+            continue
+        logging.debug(f"Tibber: publishing {label}'s {side} price points to Mqtt broker...")
+        for slot, rank in enumerate(ranks):
+            if label == "tomorrow":
+                point = tomorrow_price_points(horizon, rank)
+            else:
+                point = _ranked_price_point(horizon, day, rank)
+            for field, value in zip(_RANKED_FIELDS, point):
+                client.publish(f"Tibber/home/price_info/{label}/{side}/{slot}/{field}",
+                               payload=f"{{\"value\": \"{value}\"}}", qos=0, retain=True)
+
+def mqtt_publish_highest_price_points(horizon):
+    _publish_ranked_price_points(horizon, "highest")
+
+def mqtt_publish_lowest_price_points(horizon):
+    _publish_ranked_price_points(horizon, "lowest")
+
+def _ranked_price_point(horizon, day, rank):
+    """(time, delta, level, cost) of the ``rank``-th cheapest hour of ``day``, or None."""
+    horizon = horizon.hourly()
+    order = horizon.day_rank(day)
+    if not order:
+        return None
+    i = order[rank - 1]
+    start = horizon.starts[i]
+    return start.time(), start - datetime.now(timezone.utc).replace(microsecond=0), horizon.levels[i], horizon.totals[i]
+
+def tomorrow_price_points(horizon, rank=1):
+    point = _ranked_price_point(horizon, _local_now().date() + timedelta(days=1), rank)
+
+    if point:
+        logging.debug(f"Tibber: Tomorrow's lowest pricing is at: {point[0]} starting in {point[1]}")
+        return point
 
     else:
         logging.debug("Tibber: Tomorrow's prices not yet published.")
         return "not_yet_published", "not_yet_published", "not_yet_published", "not_yet_published"
 
-def today_price_points(home, rank=1):
-    _today = home.current_subscription.price_info.today
-    _index = rank - 1
+def today_price_points(horizon, rank=1):
+    point = _ranked_price_point(horizon, _local_now().date(), rank)
 
-    if _today:
-        _sorted_by_price = sorted(_today, key=lambda hour: hour.total, reverse=False)
-        _dto = parser.parse(_sorted_by_price[_index].starts_at, tzinfos=tzinfos)
-        _level = _sorted_by_price[_index].level
-        _cost = _sorted_by_price[_index].total
-        _hour = _dto.time()
-        _delta = _dto - datetime.now(timezone.utc).replace(microsecond=0)
-        logging.debug(f"Tibber: Today's lowest pricing is at: {_hour} starting in {_delta}")
+    if point:
+        logging.debug(f"Tibber: Today's lowest pricing is at: {point[0]} starting in {point[1]}")
+        return point
 
-        return _hour, _delta, _level, _cost
-
-def lowest_48h_prices(price_cap=0.22, max_items=4):
-    """
-    Returns a list of the lowest 4 price data sets in the coming 48 hours
-
-    :return: list: day, hour, level, price
-    """
-    _account = tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN'))
-    home = _account.homes[0]
-
-    index = 0
-    full_list = home.current_subscription.price_info.today
-    if home.current_subscription.price_info.tomorrow:
-        for item in home.current_subscription.price_info.tomorrow:
-            full_list.append(item)
-
-    _sorted_by_price = sorted(full_list, key=lambda hour: hour.total, reverse=False)
+def _lowest_prices(horizon, order, price_cap, max_items):
+    today = _local_now().date()
+    now = datetime.now(timezone.utc)
 
     relevant_data = []
-    for item in _sorted_by_price:
-        _day = 0 if parser.parse(item.starts_at, tzinfos=tzinfos).day == parser.parse(item.starts_at, tzinfos=tzinfos).today().day else 1
-        _hour = parser.parse(item.starts_at, tzinfos=tzinfos).hour
-        _level = item.level
-        _price = item.total
-
-        if parser.parse(item.starts_at, tzinfos=tzinfos) >= datetime.now(timezone.utc):
+    for i in order:
+        start = horizon.starts[i]
+        _day = 0 if start.day == today.day else 1
+        _hour = start.hour
+        _level = horizon.levels[i]
+        _price = horizon.totals[i]
+
+        if start >= now:
             if _price <= price_cap:
                 logging.debug(f"Day: {_day} Hour: {_hour} Level: {_level} Price: {_price}")
                 relevant_data.append([_day, _hour, _level, _price])
+                if len(relevant_data) >= max_items:
+                    break
 
-        index += 1
-
-    return relevant_data[0:max_items]
+    return relevant_data
 
-def lowest_24h_prices(price_cap=0.22, max_items=4):
+def lowest_48h_prices(price_cap=0.22, max_items=4, horizon=None):
     """
-    Returns a list of the lowest 4 price data sets in the coming 24 hours
+    Returns a list of the lowest 4 price data sets in the coming 48 hours
 
     :return: list: day, hour, level, price
     """
-    _account = tibber.Account(retrieve_setting('TIBBER_ACCESS_TOKEN'))
-    home = _account.homes[0]
-
-    full_list = home.current_subscription.price_info.today
-
-    _sorted_by_price = sorted(full_list, key=lambda hour: hour.total, reverse=False)
+    horizon = (horizon if horizon is not None else get_price_horizon()).hourly()
+    return _lowest_prices(horizon, horizon.rank, price_cap, max_items)
 
-    relevant_data = []
-    for item in _sorted_by_price:
-        _day = 0 if parser.parse(item.starts_at, tzinfos=tzinfos).day == parser.parse(item.starts_at, tzinfos=tzinfos).today().day else 1
-        _hour = parser.parse(item.starts_at, tzinfos=tzinfos).hour
-        _level = item.level
-        _price = item.total
-
-        if parser.parse(item.starts_at, tzinfos=tzinfos) >= datetime.now(timezone.utc):
-            if _price <= price_cap:
-                logging.debug(f"Day: {_day} Hour: {_hour} Level: {_level} Price: {_price}")
-                relevant_data.append([_day, _hour, _level, _price])
+def lowest_24h_prices(price_cap=0.22, max_items=4, horizon=None):
+    """
+    Returns a list of the lowest 4 price data sets in the coming 24 hours
 
-    return relevant_data[0:max_items]
+    :return: list: day, hour, level, price
+    """
+    horizon = (horizon if horizon is not None else get_price_horizon()).hourly()
+    return _lowest_prices(horizon, horizon.day_rank(_local_now().date()), price_cap, max_items)
 
 def current_price_level(home):
     return home.current_subscription.price_info.current.level
@@ -1,7 +1,7 @@
-from paho.mqtt import publish
+from lib.clients.control_publisher import control_publish
 from lib.global_state import GlobalStateClient
 from lib.helpers import publish_message
-from lib.constants import logging, Topics, TopicsWritable, cerboGxEndpoint
+from lib.constants import logging, Topics, TopicsWritable
 from lib.config_retrieval import retrieve_setting
 
 STATE = GlobalStateClient()
@@ -21,7 +21,7 @@ def ac_power_setpoint(watts: str = None, override_ess_net_mettering=True, silent
             publish_message(Topics['system0']['ess_net_metering_overridden'], message="True", retain=True)
 
         STATE.set(key='ac_power_setpoint', value=f"{watts}")
-        publish.single(TopicsWritable['system0']['ac_power_setpoint'], payload=_msg, qos=1, retain=True, hostname=cerboGxEndpoint, port=1883)
+        control_publish(TopicsWritable['system0']['ac_power_setpoint'], payload=_msg, qos=1, retain=True)
 
         if not silent:
             logging.info(f"Victron Integration: Set AC Power Set Point to: {watts} watts")
@@ -49,10 +49,13 @@ def limit_grid_feed_in(enabled: bool, watts: int = 0):
 
     try:
         _msg = f"{{\"value\": {desired_value}}}"
-        publish.single(
+        if not control_publish(
             TopicsWritable['system0']['max_feed_in_power'],
-            payload=_msg, qos=1, retain=False, hostname=cerboGxEndpoint, port=1883,
-        )
+            payload=_msg, qos=1, retain=False,
+        ):
+            # Leave the applied state untouched so the next call retries the write.
+            logging.error(f"Victron Integration: Grid feed-in limit write ({desired_state}) was rejected; will retry.")
+            return
         STATE.set('feed_in_limit_state', desired_state)
         STATE.set('max_feed_in_power', desired_value)
 
@@ -82,7 +85,9 @@ def set_minimum_ess_soc(percent=None):
 
     _msg = f"{{\"value\": {percent}}}"
     logging.info(f"Victron Integration: Setting ESS minimum SoC limit to: {percent}%")
-    publish.single(TopicsWritable['system0']['minimum_ess_soc'], payload=_msg, qos=1, retain=True, hostname=cerboGxEndpoint, port=1883)
+    if not control_publish(TopicsWritable['system0']['minimum_ess_soc'], payload=_msg, qos=1, retain=True):
+        logging.error(f"Victron Integration: ESS minimum SoC limit write ({percent}%) was rejected; will retry.")
+        return
     STATE.set('min_ess_soc_applied', percent)
 
 def restore_default_battery_max_voltage():
@@ -99,26 +104,26 @@ def regulate_battery_max_voltage(ess_soc):
 
     try:
         if int(ess_soc) == float(retrieve_setting('MINIMUM_ESS_SOC')) and current_max_charge_voltage != float_voltage:
-            publish.single(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": {float_voltage}}}", qos=1, retain=False, hostname=cerboGxEndpoint, port=1883)
+            control_publish(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": {float_voltage}}}", qos=1, retain=False)
             logging.info(f"Victron Integration: Adjusting max charge voltage to {float_voltage}V due to battery SOC at {ess_soc}%")
-            publish.single("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{float_voltage}\"}}", qos=0, retain=True, hostname=cerboGxEndpoint, port=1883)
+            control_publish("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{float_voltage}\"}}", qos=0, retain=True)
 
         elif int(ess_soc) < float(retrieve_setting('MINIMUM_ESS_SOC')) and current_max_charge_voltage != max_voltage:
-            publish.single(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": {max_voltage}}}", qos=1, retain=False, hostname=cerboGxEndpoint, port=1883)
+            control_publish(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": {max_voltage}}}", qos=1, retain=False)
             logging.info(f"Victron Integration: Adjusting max charge voltage to {max_voltage}V due to battery SOC {ess_soc}% of {retrieve_setting('MINIMUM_ESS_SOC')}%")
-            publish.single("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{max_voltage}\"}}", qos=0, retain=True, hostname=cerboGxEndpoint, port=1883)
+            control_publish("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{max_voltage}\"}}", qos=0, retain=True)
 
         elif int(ess_soc) >= float(retrieve_setting('MAXIMUM_ESS_SOC')) and current_max_charge_voltage != float(retrieve_setting('BATTERY_FULL_VOLTAGE')):
-            publish.single(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": \"{battery_full_voltage}\"}}", qos=1, retain=False, hostname=cerboGxEndpoint, port=1883)
+            control_publish(TopicsWritable["system0"]["max_charge_voltage"], payload=f"{{\"value\": \"{battery_full_voltage}\"}}", qos=1, retain=False)
             logging.info(f"Victron Integration: Adjusting max charge voltage to {battery_full_voltage} due to battery SOC reaching {retrieve_setting('MAXIMUM_ESS_SOC')}% or higher")
-            publish.single("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{battery_full_voltage}\"}}", qos=1, retain=True, hostname=cerboGxEndpoint, port=1883)
+            control_publish("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{battery_full_voltage}\"}}", qos=1, retain=True)
             # On full charge, re-assert the ESS minimum-SoC floor from the single
             # source of truth (seasonal reserve), not a hardcoded value.
             set_minimum_ess_soc()
 
         else:
             logging.debug(f"Victron Integration: No Action. Battery max charge voltage is appropriately set at {current_max_charge_voltage}V with ESS SOC at {ess_soc}%")
-            publish.single("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{current_max_charge_voltage}\"}}", qos=1, retain=True, hostname=cerboGxEndpoint, port=1883)
+            control_publish("Tesla/vehicle0/solar/ess_max_charge_voltage", payload=f"{{\"value\": \"{current_max_charge_voltage}\"}}", qos=1, retain=True)
 
         return True
 
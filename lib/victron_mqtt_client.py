@@ -1,5 +1,6 @@
 from lib.constants import logging
 from lib.clients.mqtt_client_factory import VictronClient
+from lib.domoticz_updater import get_sink
 
 client = VictronClient().get_client()
 
@@ -16,3 +17,5 @@ def mqtt_stop():
     logging.info("Mqtt Client: Stopping...")
     client.loop_stop(force=True)
     client.disconnect()
+    VictronClient().stop_dispatcher()
+    get_sink().stop()
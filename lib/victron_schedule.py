@@ -0,0 +1,236 @@
+"""
+Diff-based programming of the five Victron ESS scheduled-charge slots.
+
+Each ``Settings/CGwacs/BatteryLife/Schedule/Charge/{i}`` slot has four fields:
+Duration (s), Soc (%), Start (seconds after midnight) and Day (Victron weekday;
+-1 disables the slot). The optimizer used to clear all five slots and rewrite
+every field each cycle — up to 25 writes even when nothing changed, with a brief
+window in which no slot was programmed.
+
+:class:`ChargeScheduleSync` keeps the last programmed value of every field,
+seeded once from the retained N/ topics, and writes only the fields that differ.
+The Victron treats the slots as interchangeable, so a planned slot keeps the index
+that already holds it (an elapsed first slot does not shift the rest) and the
+others take the index needing the fewest writes. An unchanged plan costs no
+writes, a moved slot only the fields that moved (bracketed by disabling and
+re-enabling it when its window changes), and only leftover slots are disabled —
+after the new ones are programmed, so there is no empty window. A field whose
+write is rejected stays unknown and is rewritten next cycle.
+
+Slots changed elsewhere (the Victron UI, a dashboard clear in another process) are
+picked up when the state is re-read from the retained topics, every
+VICTRON_SCHEDULE_RESYNC_S seconds (default 3600) or after ``forget_programmed_slots``.
+"""
+import threading
+import time
+
+from lib.clients.control_publisher import control_publish
+from lib.constants import logging, systemId0, PythonToVictronWeekdayNumberConversion
+
+SLOT_COUNT = 5
+FIELDS = ("Duration", "Soc", "Start", "Day")    # Day last: it enables the slot
+DAY_DISABLED = -1
+
+
+def _slot_path(i):
+    return f"settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge/{i}"
+
+
+def charge_slot_fields(start, duration, soc=100) -> dict:
+    """The field values that program one slot to charge from ``start`` (a datetime)."""
+    return {
+        "Duration": int(duration),
+        "Soc": int(soc),
+        "Start": start.hour * 3600 + start.minute * 60,
+        "Day": PythonToVictronWeekdayNumberConversion[start.weekday()],
+    }
+
+
+def _write(topic, payload, retain):
+    return control_publish(topic, payload, qos=1, retain=retain)
+
+
+def _read_retained_slots():
+    """{(slot, field): value} from the retained N/ schedule topics."""
+    from lib.helpers import get_current_values_from_mqtt
+
+    prefix = f"N/{systemId0}/"
+    values = get_current_values_from_mqtt(f"{prefix}{_slot_path('+')}/+", expected=SLOT_COUNT * len(FIELDS))
+    seeded = {}
+    for topic, value in values.items():
+        slot, _sep, field = topic[len(prefix):].rpartition("/")
+        try:
+            seeded[(int(slot.rsplit("/", 1)[-1]), field)] = int(float(value))
+        except (TypeError, ValueError):
+            continue
+    return seeded
+
+
+class ChargeScheduleSync:
+    """Last-known state of the five charge slots and the minimal writes to change it."""
+
+    def __init__(self, publish=None, seed=None, resync_s=3600.0, clock=time.monotonic):
+        self._publish = publish or _write
+        self._seed = seed or _read_retained_slots
+        self.resync_s = resync_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._slots = None      # list of {field: value}; a missing field is unknown
+        self._seeded_at = None
+        self.cycles = 0
+        self.last_writes = 0
+        self.writes = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def _ensure_seeded(self):
+        """Read the programmed slots on first use and every ``resync_s`` seconds.
+
+        Retained values override the known state; fields the broker does not hold
+        keep what was last written (or stay unknown on first use).
+        """
+        now = self._clock()
+        if self._slots is not None and now - self._seeded_at < self.resync_s:
+            return
+        if self._slots is None:
+            self._slots = [{} for _ in range(SLOT_COUNT)]
+        self._seeded_at = now
+        try:
+            seeded = self._seed() or {}
+        except Exception as e:
+            logging.info(f"Victron Schedule: could not read the programmed charge slots ({e}).")
+            return
+        for (i, field), value in seeded.items():
+            if 0 <= i < SLOT_COUNT and field in FIELDS:
+                self._slots[i][field] = value
+
+    def _write_field(self, i, field, value, retain) -> bool:
+        have = self._slots[i]
+        topic = f"W/{systemId0}/{_slot_path(i)}/{field}"
+        if self._publish(topic, f"{{\"value\": {value}}}", retain) is False:
+            self.failed += 1
+            have.pop(field, None)
+            return False
+        have[field] = value
+        return True
+
+    def _apply(self, i, wanted, retain):
+        """Write the fields of ``wanted`` that slot ``i`` does not already hold.
+
+        Moving the window of a slot that is (or may be) enabled disables it first, so
+        the Victron never runs a half-written window such as a new Duration from the
+        old Start; the Day write at the end enables it again.
+        """
+        have = self._slots[i]
+        written = 0
+        if (have.get("Day") != DAY_DISABLED
+                and any(f in wanted and have.get(f) != wanted[f] for f in ("Duration", "Start"))):
+            if not self._write_field(i, "Day", DAY_DISABLED, retain=False):
+                return written      # still enabled: leave the window alone until the next cycle
+            written += 1
+        for field in FIELDS:
+            if field not in wanted:
+                continue
+            if have.get(field) == wanted[field]:
+                self.skipped += 1
+                continue
+            if self._write_field(i, field, wanted[field], retain):
+                written += 1
+        return written
+
+    def _assign(self, slots):
+        """Slot index for each planned slot: an exact match first, else fewest writes."""
+        free = list(range(SLOT_COUNT))
+        assigned = [None] * len(slots)
+        for n, wanted in enumerate(slots):
+            for i in free:
+                if all(self._slots[i].get(f) == wanted[f] for f in FIELDS):
+                    assigned[n] = i
+                    free.remove(i)
+                    break
+        for n, wanted in enumerate(slots):
+            if assigned[n] is None:
+                i = min(free, key=lambda j: sum(self._slots[j].get(f) != wanted[f] for f in FIELDS))
+                assigned[n] = i
+                free.remove(i)
+        return assigned, free
+
+    def sync(self, slots) -> int:
+        """Program ``slots`` (complete field dicts, at most five) and disable the other slots.
+
+        Returns the number of writes this cycle.
+        """
+        slots = list(slots)[:SLOT_COUNT]
+        with self._lock:
+            self._ensure_seeded()
+            assigned, leftover = self._assign(slots)
+            written = sum(self._apply(i, wanted, retain=True) for i, wanted in zip(assigned, slots))
+            written += sum(self._apply(i, {"Day": DAY_DISABLED}, retain=False) for i in leftover)
+            self.cycles += 1
+            self.last_writes = written
+            self.writes += written
+        return written
+
+    def program_slot(self, i, fields) -> int:
+        """Program a single slot, leaving the others as they are."""
+        with self._lock:
+            self._ensure_seeded()
+            written = self._apply(i, fields, retain=True)
+            self.writes += written
+        return written
+
+    def clear(self) -> int:
+        """Disable all five slots, writing each even if it is believed disabled already."""
+        with self._lock:
+            self._ensure_seeded()
+            for slot in self._slots:
+                slot.pop("Day", None)
+            written = sum(self._apply(i, {"Day": DAY_DISABLED}, retain=False) for i in range(SLOT_COUNT))
+            self.writes += written
+        return written
+
+    def invalidate(self):
+        """Forget the known state; the next call rewrites what the retained topics do not confirm."""
+        with self._lock:
+            self._slots = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cycles': self.cycles,
+                'last_cycle_writes': self.last_writes,
+                'writes': self.writes,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'enabled_slots': (sum(1 for s in self._slots if s.get("Day", DAY_DISABLED) != DAY_DISABLED)
+                                  if self._slots is not None else None),
+            }
+
+
+_SYNC = None
+_SYNC_LOCK = threading.Lock()
+
+
+def get_schedule_sync():
+    """The process-wide ChargeScheduleSync."""
+    global _SYNC
+    with _SYNC_LOCK:
+        if _SYNC is None:
+            from lib.config_retrieval import retrieve_setting
+
+            try:
+                resync_s = float(retrieve_setting('VICTRON_SCHEDULE_RESYNC_S') or 3600.0)
+            except (TypeError, ValueError):
+                resync_s = 3600.0
+            _SYNC = ChargeScheduleSync(resync_s=resync_s)
+        return _SYNC
+
+
+def forget_programmed_slots():
+    """Invalidate the known slot state after the slots were written around the synchronizer."""
+    if _SYNC is not None:
+        _SYNC.invalidate()
+
+
+def charge_schedule_stats():
+    return _SYNC.stats() if _SYNC is not None else {}
@@ -11,10 +11,12 @@ from lib.victron_mqtt_client import mqtt_start, mqtt_stop
 from lib.ev_charge_controller import EvCharger
 from lib.task_scheduler import TaskScheduler
 from lib.victron_integration import restore_default_battery_max_voltage
+from lib.clients.control_publisher import close_control_publisher
 from lib.tibber_api import live_measurements, publish_pricing_data
 from lib.helpers import publish_message, retrieve_message, is_truthy
 from lib.global_state import GlobalStateDatabase, GlobalStateClient
 from lib.solar_forecasting import get_victron_solar_forecast
+from lib import history_store
 from lib.energy_broker import (
     main as energybroker,
     get_todays_n_highest_prices,
@@ -24,6 +26,14 @@ from lib.energy_broker import (
 GlobalStateDB = GlobalStateDatabase()
 STATE = GlobalStateClient()
 
+try:
+    GlobalStateDB.configure_publishing(
+        interval=float(retrieve_setting('GLOBALSTATE_PUBLISH_INTERVAL_S') or 0),
+        overrides=json.loads(retrieve_setting('GLOBALSTATE_PUBLISH_INTERVAL_OVERRIDES') or '{}'),
+    )
+except (TypeError, ValueError) as e:
+    logging.warning(f"main(): Invalid GlobalState publish settings ({e}); publishing changes immediately.")
+
 ACTIVE_MODULES = json.loads(retrieve_setting('ACTIVE_MODULES'))
 HOME_CONNECT_APPLIANCE_SCHEDULING = is_truthy(retrieve_setting("HOME_CONNECT_APPLIANCE_SCHEDULING"))
 
@@ -57,9 +67,18 @@ def shutdown():
 
     mqtt_stop()
 
+    # wait for in-flight Victron writes to be acknowledged, then drop the control session
+    close_control_publisher()
+
     # publish message to broker that we are shutting down
     publish_message("Cerbomoticzgx/system/shutdown", message="True", retain=True)
 
+    # final write-behind flush so cross-process readers see the last state
+    GlobalStateDB.close()
+
+    # fsync and close the open history day files
+    history_store.close_writers()
+
 def init():
     if retrieve_message("Cerbomoticzgx/system/shutdown"):
         # let post_startup() know that this is a manually requested restart
@@ -22,7 +22,7 @@ from datetime import datetime
 sys.path.append(os.getcwd())
 
 from lib.global_state import GlobalStateClient
-from lib.tibber_api import get_all_price_points
+from lib.tibber_api import get_price_horizon
 from lib.ai_powered_ess import OptimizationEngine, format_plan_summary
 from lib.energy_broker import (
     _build_pv_forecast_by_slot,
@@ -65,29 +65,14 @@ def main():
         print("   Pass --soc <percent> to run with an assumed value.")
         return 1
 
-    prices = get_all_price_points()
+    prices = get_price_horizon()
     if not prices:
         print("!! No Tibber price points available. Is TIBBER_UPDATES_ENABLED=1 and the feed live?")
         return 1
 
     # Mirror run_ai_optimizer()'s PV forecast construction.
-    from lib.ai_powered_ess import _coerce_datetime
-    normalised_slots = []
-    for p in prices:
-        try:
-            normalised_slots.append({"start": _coerce_datetime(p["start"])})
-        except (KeyError, TypeError, ValueError):
-            continue
-    slot_duration_h = 1.0
-    if len(normalised_slots) > 1:
-        normalised_slots.sort(key=lambda x: x["start"])
-        gaps = [
-            (normalised_slots[i]["start"] - normalised_slots[i - 1]["start"]).total_seconds()
-            for i in range(1, len(normalised_slots))
-        ]
-        positive_gaps = [g for g in gaps if g > 0]
-        if positive_gaps:
-            slot_duration_h = min(positive_gaps) / 3600.0
+    normalised_slots = [{"start": start} for start in prices.starts]
+    slot_duration_h = prices.slot_seconds / 3600.0 if len(prices) > 1 else 1.0
 
     pv_forecast = _build_pv_forecast_by_slot(normalised_slots, slot_duration_h)
     load_forecast = _build_load_forecast_by_slot(normalised_slots, slot_duration_h)
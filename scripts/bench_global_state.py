@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+GlobalState micro-benchmark: get/set throughput, per-call SQLite vs in-process.
+
+"sqlite" is the path every call used to take (and that processes without a
+GlobalStateDatabase still take): open, query and close a SQLite connection on
+tmpfs. "in-process" is the live service's store with the write-behind snapshot
+running. The MQTT mirror of ``set`` is disabled so only the state engine is
+timed. Nothing is read from or written to the live system.
+
+Usage:
+    python3 scripts/bench_global_state.py
+    python3 scripts/bench_global_state.py --ops 50000
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+import lib.global_state as global_state
+from lib.global_state import GlobalStateClient, GlobalStateDatabase
+
+BANNER = "=" * 78
+KEYS = ["batt_soc", "ac_out_power", "grid_charging_enabled", "tibber_price_now", "ai_reason"]
+VALUES = [61.25, 1234, True, 0.2871, "idle"]
+
+
+def _rate(fn, ops):
+    t0 = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops / (time.perf_counter() - t0)
+
+
+def _measure(state, ops):
+    set_rate = _rate(lambda i: state.set(KEYS[i % 5], VALUES[i % 5]), ops)
+    get_rate = _rate(lambda i: state.get(KEYS[i % 5]), ops)
+    return set_rate, get_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GlobalState get/set throughput.")
+    parser.add_argument("--ops", type=int, default=20000, help="Operations per measurement.")
+    args = parser.parse_args()
+
+    global_state.publish_message = lambda *a, **kw: None
+    state = GlobalStateClient()
+
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as tmp:
+        db = GlobalStateDatabase(db_path=os.path.join(tmp, "bench_state.db"))
+        global_state._STORE.primary = False
+        sqlite_set, sqlite_get = _measure(state, args.ops)
+
+        global_state._STORE.primary = True
+        memory_set, memory_get = _measure(state, args.ops)
+        db.close()
+
+    print(BANNER)
+    print("GLOBAL STATE BENCHMARK  (%d ops each, MQTT mirror disabled)" % args.ops)
+    print(BANNER)
+    print(f"  {'engine':<12} {'set/s':>12} {'get/s':>12}")
+    print(f"  {'sqlite':<12} {sqlite_set:>12,.0f} {sqlite_get:>12,.0f}")
+    print(f"  {'in-process':<12} {memory_set:>12,.0f} {memory_get:>12,.0f}")
+    print(f"  {'speed-up':<12} {memory_set / sqlite_set:>11.0f}x {memory_get / sqlite_get:>11.0f}x")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Dashboard history-read benchmark: one /api/plan + /api/history/month refresh,
+with and without the history_store parsed-day cache.
+
+Writes a synthetic month of history (a cycle record every 15 minutes with the
+cumulative day counters, plus a settlement per closed slot) for the current
+month up to today, and a published plan, into a temporary directory. Each
+refresh calls both routes through the Flask test client. "uncached" disables
+the day cache (every read_day re-parses its file, as before); "cached" is the
+warm process-wide LRU. Older months can be compacted to Parquet with --parquet.
+
+Usage:
+    python3 scripts/bench_history_cache.py
+    python3 scripts/bench_history_cache.py --refreshes 50 --parquet
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from frontend import data, server
+from lib import history_store as hs
+
+BANNER = "=" * 78
+
+
+def _write_history(hist_dir, days, seed=11):
+    rnd = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    start = (now - timedelta(days=days - 1)).replace(hour=0, minute=0)
+    t = start
+    totals = {}
+    while t <= now:
+        day = t.date()
+        tot = totals.setdefault(day, {"imp": 0.0, "exp": 0.0, "load": 0.0})
+        load = rnd.uniform(150, 900)
+        pv = max(0.0, 2500 * (1 - abs(t.hour + t.minute / 60 - 13) / 6))
+        tot["imp"] += rnd.uniform(0, 0.2)
+        tot["exp"] += rnd.uniform(0, 0.3)
+        tot["load"] += load / 4
+        hs.append(day, {
+            "kind": "cycle", "ts": t.isoformat(), "soc": rnd.uniform(20, 90), "pv_w": pv,
+            "load_w": load, "batt_w": rnd.uniform(-2000, 2000), "price_buy": rnd.uniform(0.1, 0.4),
+            "day_import_cost": round(tot["imp"] * 0.25, 4), "day_export_reward": round(tot["exp"] * 0.1, 4),
+            "day_import_kwh": round(tot["imp"], 3), "day_export_kwh": round(tot["exp"], 3),
+            "load_actual_today_wh": round(tot["load"], 1),
+        }, hist_dir)
+        slot = t - timedelta(minutes=15)
+        hs.append(day, {
+            "kind": "settlement", "ts": t.isoformat(), "slot_start": slot.isoformat(),
+            "predicted_load_kwh": round(load / 4000, 3), "actual_load_kwh": round(load / 4000, 3),
+            "predicted_pv_kwh": round(pv / 4000, 3), "actual_pv_kwh": round(pv / 4000, 3),
+            "actual_net_eur": round(rnd.uniform(-0.1, 0.1), 4), "action": "idle",
+        }, hist_dir)
+        t += timedelta(minutes=15)
+
+
+def _write_plan(path):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    schedule = [{"time": (now + timedelta(minutes=15 * i)).isoformat(), "price": 0.25, "action": "idle",
+                 "soc": 50.0, "pv_kwh": 0.2, "load_kwh": 0.15} for i in range(96)]
+    with open(path, "w") as fh:
+        json.dump({"generated_at": datetime.now().isoformat(), "schedule": schedule}, fh)
+
+
+def _refresh_rate(client, refreshes):
+    t0 = time.perf_counter()
+    for _ in range(refreshes):
+        assert client.get("/api/plan").status_code == 200
+        assert client.get("/api/history/month").status_code == 200
+    return (time.perf_counter() - t0) / refreshes * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard history reads with the day cache.")
+    parser.add_argument("--refreshes", type=int, default=20, help="Dashboard refreshes per measurement.")
+    parser.add_argument("--parquet", action="store_true", help="Compact months before the current one.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hist_dir, plan = os.path.join(tmp, "history"), os.path.join(tmp, "plan.json")
+        _write_history(hist_dir, max(2, datetime.now().day))
+        if args.parquet and hs.duckdb_available():
+            hs.backfill_cold_months(hist_dir)
+        _write_plan(plan)
+        data._env = lambda: {"HISTORY_DIR": hist_dir, "AI_PLAN_EXPORT_PATH": plan}
+        client = server.app.test_client()
+
+        hs._DAY_CACHE = hs._DayCache(max_days=0)
+        uncached = _refresh_rate(client, args.refreshes)
+        reads = hs.day_cache_stats()["misses"] / args.refreshes
+
+        hs._DAY_CACHE = hs._DayCache()
+        _refresh_rate(client, 1)                            # warm
+        cached = _refresh_rate(client, args.refreshes)
+        stats = hs.day_cache_stats()
+
+    print(BANNER)
+    print("DASHBOARD HISTORY REFRESH  (/api/plan + /api/history/month, %d days, %d refreshes)"
+          % (datetime.now().day, args.refreshes))
+    print(BANNER)
+    print(f"  read_day calls per refresh: {reads:.0f}")
+    print(f"  {'mode':<10} {'ms/refresh':>12}")
+    print(f"  {'uncached':<10} {uncached:>12.1f}")
+    print(f"  {'cached':<10} {cached:>12.1f}")
+    print(f"  {'speed-up':<10} {uncached / cached:>11.1f}x")
+    print(f"  cache: {stats['days']} days, {stats['bytes'] / 1024:.0f} KiB, "
+          f"{stats['hits']} hits / {stats['misses']} misses")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Month compaction benchmark: the Python row loop versus DuckDB-native compaction.
+
+Writes a synthetic month of one-minute cycle telemetry plus a settlement per
+quarter-hour into a temporary directory, with a few duplicated lines and a torn
+trailing line per day, then measures:
+
+  python loop   reading every day file line by line, json.loads, deduplicating and
+                encoding each record with _encode_row and sorting the rows — the
+                Python work compact_month did per record before it ran in DuckDB
+                (excluding the staging and the Parquet write it also did)
+  compact_month the DuckDB-native rollup end to end: ingest, encode, dedupe, sort,
+                Parquet write, row-count verification, rename and manifest
+
+and checks that the Parquet reads back the same records the day files hold.
+
+Usage:
+    python3 scripts/bench_history_compact.py
+    python3 scripts/bench_history_compact.py --days 31 --repeat 3
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from lib import history_store as hs
+
+BANNER = "=" * 78
+
+
+def _write_month(hist_dir, days, seed=20):
+    rnd = random.Random(seed)
+    os.makedirs(hist_dir)
+    for d in range(1, days + 1):
+        t = datetime(2025, 3, d)
+        lines = []
+        while t.day == d:
+            lines.append(json.dumps({
+                "ts": t.isoformat(), "kind": "cycle", "soc": rnd.uniform(20, 90), "mode": "idle",
+                "pv_w": rnd.uniform(0, 4000), "load_w": rnd.uniform(150, 900), "batt_w": rnd.uniform(-2000, 2000),
+                "grid_w": rnd.uniform(-3000, 3000), "price_buy": rnd.uniform(0.1, 0.4), "limit_feed_in": False,
+                "day_import_kwh": rnd.uniform(0, 9), "day_export_kwh": rnd.uniform(0, 9), "plan_slots": 96}))
+            if t.minute % 15 == 0:
+                lines.append(json.dumps({
+                    "ts": (t + timedelta(seconds=5)).isoformat(), "kind": "settlement",
+                    "slot_start": (t - timedelta(minutes=15)).isoformat(), "incomplete": False,
+                    "actual_pv_kwh": rnd.uniform(0, 1), "actual_net_eur": rnd.uniform(-0.1, 0.1)}))
+            if rnd.random() < 0.02:
+                lines.append(lines[-1])
+            t += timedelta(minutes=1)
+        with open(os.path.join(hist_dir, f"ess-2025-03-{d:02d}.ndjson"), "w") as fh:
+            fh.write("\n".join(lines) + '\n{"ts": "2025-03-')
+
+
+def _python_loop(hist_dir):
+    rows = {}
+    for name in sorted(os.listdir(hist_dir)):
+        if not name.endswith(".ndjson"):
+            continue
+        iso = name[4:14]
+        with open(os.path.join(hist_dir, name), encoding="utf-8") as fh:
+            for raw in fh:
+                s = raw.strip()
+                if not s:
+                    continue
+                try:
+                    rec = json.loads(s)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(rec, dict):
+                    ts = str(rec.get("ts") or rec.get("slot_start") or "")
+                    rows[(iso, ts, json.dumps(rec, sort_keys=True))] = hs._encode_row(iso, rec)
+    return sorted(rows.values(), key=lambda r: (r[1], r[2]))
+
+
+def _best(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DuckDB-native month compaction.")
+    parser.add_argument("--days", type=int, default=31, help="Days of one-minute telemetry in the month.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported).")
+    args = parser.parse_args()
+    if not hs.duckdb_available():
+        print("duckdb is not installed; compaction is unavailable.", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source")
+        _write_month(source, args.days)
+        t_py, rows = _best(lambda: _python_loop(source), args.repeat)
+
+        def _compact():
+            work = os.path.join(tmp, "work")
+            shutil.rmtree(work, ignore_errors=True)
+            shutil.copytree(source, work)
+            t0 = time.perf_counter()
+            hs.compact_month(2025, 3, work)
+            return work, time.perf_counter() - t0
+
+        best, work = float("inf"), None
+        for _ in range(args.repeat):
+            work, elapsed = _compact()
+            best = min(best, elapsed)
+        t_sql = best * 1000.0
+        manifest = hs.month_manifest(hs.month_parquet_path(2025, 3, work))
+        same = all(hs.read_day(f"2025-03-{d:02d}", work) == hs.read_day(f"2025-03-{d:02d}", source)
+                   for d in range(1, args.days + 1))
+        size = os.path.getsize(hs.month_parquet_path(2025, 3, work))
+
+    print(BANNER)
+    print("COMPACT ONE MONTH  (%d days, %d rows, best of %d)" % (args.days, len(rows), args.repeat))
+    print(BANNER)
+    print(f"  {'path':<32} {'ms':>10}")
+    print(f"  {'python loop (encode only)':<32} {t_py:>10.1f}")
+    print(f"  {'compact_month (DuckDB, end to end)':<32} {t_sql:>10.1f}")
+    print(f"  rows {manifest['rows']} (expected {len(rows)})   parquet {size / 1024:.0f} KiB   "
+          f"records match: {same}")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+History Parquet layout benchmark: a 12-month PV-shape query on the v1 raw-JSON
+``line`` layout versus the typed v2 layout written by compact_month.
+
+Generates a synthetic year of cycle + settlement records (two per 15 minutes) into
+a temporary directory, writes each month once in the old layout and once in the
+typed layout, then builds the average daylight PV per quarter-hour slot (the shape
+energy_broker._pv_shape_by_slot learns) three ways:
+
+  v1 + json.loads   one scan, every row's line decoded and bucketed in Python
+  v1/v2 + read_day  the same Python bucketing over records read back one day at a time,
+                    as the optimizer does today (one DuckDB connection per day)
+  v2 + SQL          DuckDB projects pv_w/ts and aggregates with the kind filter pushed down
+
+Usage:
+    python3 scripts/bench_history_parquet.py
+    python3 scripts/bench_history_parquet.py --months 12 --repeat 3
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+import duckdb
+
+from lib import history_store as hs
+
+BANNER = "=" * 78
+DAYLIGHT = (6, 21)
+
+
+def _records(day, rnd):
+    out = []
+    t = datetime(day.year, day.month, day.day)
+    for i in range(96):
+        ts = t + timedelta(minutes=15 * i)
+        pv = max(0.0, 3000 * (1 - abs(ts.hour + ts.minute / 60 - 13) / 6)) * rnd.uniform(0.6, 1.0)
+        out.append({"ts": ts.isoformat(), "kind": "cycle", "soc": rnd.uniform(20, 90), "pv_w": pv,
+                    "load_w": rnd.uniform(150, 900), "batt_w": rnd.uniform(-2000, 2000),
+                    "price_buy": rnd.uniform(0.1, 0.4), "mode": "idle", "reason_code": "HOLD",
+                    "day_import_kwh": rnd.uniform(0, 9), "day_export_kwh": rnd.uniform(0, 9)})
+        out.append({"ts": (ts + timedelta(seconds=5)).isoformat(), "kind": "settlement",
+                    "slot_start": (ts - timedelta(minutes=15)).isoformat(), "incomplete": False,
+                    "actual_pv_kwh": pv / 4000, "actual_load_kwh": 0.2, "actual_net_eur": 0.01})
+    return out
+
+
+def _write_v1(path, rows):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t(day VARCHAR, ts VARCHAR, kind VARCHAR, line VARCHAR)")
+    con.executemany("INSERT INTO t VALUES (?,?,?,?)",
+                    [(iso, r["ts"], r["kind"], json.dumps(r)) for iso, r in rows])
+    con.execute(f"COPY (SELECT * FROM t ORDER BY day, ts) TO '{path}' (FORMAT PARQUET, COMPRESSION 'zstd')")
+    con.close()
+
+
+def _bucket(records, buckets):
+    for r in records:
+        if r.get("kind") == "settlement" or r.get("pv_w") is None:
+            continue
+        when = datetime.fromisoformat(r["ts"])
+        if DAYLIGHT[0] <= when.hour < DAYLIGHT[1]:
+            buckets.setdefault(f"{when.hour:02d}:{(when.minute // 15) * 15:02d}", []).append(r["pv_w"] / 1000.0)
+
+
+def _shape_v1(v1_dir):
+    buckets = {}
+    con = duckdb.connect()
+    glob_path = os.path.join(v1_dir, "ess-*.parquet")
+    lines = con.execute(f"SELECT line FROM read_parquet('{glob_path}') ORDER BY day, ts").fetchall()
+    con.close()
+    _bucket((json.loads(line) for (line,) in lines), buckets)
+    return {k: sum(v) / len(v) for k, v in buckets.items()}
+
+
+def _shape_read_day(v2_dir, days):
+    hs._DAY_CACHE = hs._DayCache(max_days=0)
+    buckets = {}
+    for d in days:
+        _bucket(hs.read_day(d, v2_dir), buckets)
+    return {k: sum(v) / len(v) for k, v in buckets.items()}
+
+
+def _shape_sql(v2_dir):
+    con = duckdb.connect()
+    glob_path = os.path.join(v2_dir, "ess-*.parquet")
+    rows = con.execute(f"""
+        SELECT strftime(t, '%H:') || lpad(CAST(15 * (minute(t) // 15) AS VARCHAR), 2, '0') AS slot,
+               avg(pv_w) / 1000.0
+        FROM (SELECT CAST(ts AS TIMESTAMP) AS t, pv_w FROM read_parquet('{glob_path}')
+              WHERE kind <> 'settlement' AND pv_w IS NOT NULL)
+        WHERE hour(t) >= {DAYLIGHT[0]} AND hour(t) < {DAYLIGHT[1]}
+        GROUP BY slot""").fetchall()
+    con.close()
+    return dict(rows)
+
+
+def _best(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a PV-shape query on old vs typed Parquet.")
+    parser.add_argument("--months", type=int, default=12, help="Months of synthetic history.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query (best is reported).")
+    args = parser.parse_args()
+
+    rnd = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        v1_dir, v2_dir = os.path.join(tmp, "v1"), os.path.join(tmp, "v2")
+        os.makedirs(v1_dir)
+        os.makedirs(v2_dir)
+        first = date(2025, 1, 1)
+        days, rows_by_month = [], {}
+        for i in range(366):
+            d = first + timedelta(days=i)
+            if (d.year - first.year) * 12 + d.month - first.month >= args.months:
+                break
+            days.append(d)
+            for r in _records(d, rnd):
+                rows_by_month.setdefault((d.year, d.month), []).append((d.isoformat(), r))
+                hs.append(d, r, v2_dir)
+        for (y, m), rows in rows_by_month.items():
+            _write_v1(hs.month_parquet_path(y, m, v1_dir), rows)
+            hs.compact_month(y, m, v2_dir, remove_ndjson=True)
+
+        size_v1 = sum(os.path.getsize(os.path.join(v1_dir, f)) for f in os.listdir(v1_dir))
+        size_v2 = sum(os.path.getsize(os.path.join(v2_dir, f)) for f in os.listdir(v2_dir))
+        t_v1, shape_v1 = _best(lambda: _shape_v1(v1_dir), args.repeat)
+        t_rd1, _shape = _best(lambda: _shape_read_day(v1_dir, days), args.repeat)
+        t_rd, shape_rd = _best(lambda: _shape_read_day(v2_dir, days), args.repeat)
+        t_sql, shape_sql = _best(lambda: _shape_sql(v2_dir), args.repeat)
+
+    agree = all(abs(shape_v1[k] - shape_rd[k]) < 1e-9 and abs(shape_v1[k] - shape_sql[k]) < 1e-9 for k in shape_v1)
+    print(BANNER)
+    print("PV SHAPE OVER %d MONTHS  (%d records, best of %d)"
+          % (args.months, sum(len(r) for r in rows_by_month.values()), args.repeat))
+    print(BANNER)
+    print(f"  {'layout / path':<20} {'ms':>10} {'parquet KiB':>12}")
+    print(f"  {'v1 + json.loads':<20} {t_v1:>10.1f} {size_v1 / 1024:>12.0f}")
+    print(f"  {'v1 + read_day':<20} {t_rd1:>10.1f} {size_v1 / 1024:>12.0f}")
+    print(f"  {'v2 + read_day':<20} {t_rd:>10.1f} {size_v2 / 1024:>12.0f}")
+    print(f"  {'v2 + SQL':<20} {t_sql:>10.1f} {size_v2 / 1024:>12.0f}")
+    print(f"  speed-up (SQL vs v1): {t_v1 / t_sql:.1f}x   shapes agree: {agree}")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
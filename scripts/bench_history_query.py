@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+History range-query benchmark: the per-day read_day loop vs history_store.query.
+
+Writes a synthetic history (a cycle record every 15 minutes plus a settlement
+per slot) covering the last --days days into a temporary directory, compacts
+every month before the current one to Parquet, and then reads the whole range
+the way the opportunity model and history report need it:
+
+  * per-day   — read_day() for each day, then pick the fields out of the dicts
+  * query     — one history_store.query() over the range (one DuckDB scan of
+                the cold months, the cached day reader for the hot ones)
+
+Both are measured cold (day cache cleared before each pass) — the first
+report/model build after a restart or a month compaction.
+
+Usage:
+    python3 scripts/bench_history_query.py
+    python3 scripts/bench_history_query.py --days 365 --reps 3
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from lib import history_store as hs
+
+BANNER = "=" * 78
+COLUMNS = ("price_buy", "predicted_net_eur", "actual_net_eur", "day_import_cost", "day_export_reward")
+
+
+def _write_history(hist_dir, days, seed=5):
+    rnd = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    t = (now - timedelta(days=days - 1)).replace(hour=0, minute=0)
+    while t <= now:
+        day = t.date()
+        hs.append(day, {
+            "kind": "cycle", "ts": t.isoformat(), "soc": rnd.uniform(20, 90), "pv_w": rnd.uniform(0, 3000),
+            "load_w": rnd.uniform(150, 900), "batt_w": rnd.uniform(-2000, 2000), "mode": "idle",
+            "price_buy": rnd.uniform(0.1, 0.4), "day_import_cost": rnd.uniform(0, 3),
+            "day_export_reward": rnd.uniform(0, 1), "predicted_net_eur": rnd.uniform(-0.1, 0.1),
+        }, hist_dir)
+        hs.append(day, {
+            "kind": "settlement", "ts": t.isoformat(), "slot_start": (t - timedelta(minutes=15)).isoformat(),
+            "predicted_net_eur": rnd.uniform(-0.1, 0.1), "actual_net_eur": rnd.uniform(-0.1, 0.1),
+            "actual_pv_kwh": rnd.uniform(0, 0.7), "action": "idle",
+        }, hist_dir)
+        t += timedelta(minutes=15)
+
+
+def _per_day(hist_dir, start, end):
+    out = {c: [] for c in COLUMNS}
+    d = start
+    while d <= end:
+        for rec in hs.read_day(d, hist_dir):
+            for c in COLUMNS:
+                out[c].append(rec.get(c))
+        d += timedelta(days=1)
+    return len(out["price_buy"])
+
+
+def _query(hist_dir, start, end):
+    return len(hs.query(start, end, columns=COLUMNS, hist_dir=hist_dir)["day"])
+
+
+def _timed(fn, hist_dir, start, end, reps):
+    best, rows = None, 0
+    for _ in range(reps):
+        hs._DAY_CACHE.clear()
+        t0 = time.perf_counter()
+        rows = fn(hist_dir, start, end)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history range reads: read_day loop vs query().")
+    parser.add_argument("--days", type=int, default=90, help="Days of history in the range.")
+    parser.add_argument("--reps", type=int, default=5, help="Repetitions per mode (best is reported).")
+    args = parser.parse_args()
+    if not hs.duckdb_available():
+        print("duckdb is not installed; nothing to compare.", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hist_dir = os.path.join(tmp, "history")
+        _write_history(hist_dir, args.days)
+        hs.backfill_cold_months(hist_dir)
+        end = date.today()
+        start = end - timedelta(days=args.days - 1)
+        status = hs.store_status(hist_dir)
+
+        per_day, rows_a = _timed(_per_day, hist_dir, start, end, args.reps)
+        query, rows_b = _timed(_query, hist_dir, start, end, args.reps)
+
+    print(BANNER)
+    print("HISTORY RANGE READ  (%d days, %d columns, best of %d, cold day cache)"
+          % (args.days, len(COLUMNS), args.reps))
+    print(BANNER)
+    print(f"  store: {len(status['parquet_months'])} Parquet months, {len(status['ndjson_days'])} NDJSON days")
+    print(f"  {'mode':<10} {'ms':>10} {'rows':>10}")
+    print(f"  {'per-day':<10} {per_day:>10.1f} {rows_a:>10}")
+    print(f"  {'query':<10} {query:>10.1f} {rows_b:>10}")
+    print(f"  {'speed-up':<10} {per_day / query:>9.1f}x")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+MQTT dispatch replay benchmark: messages per second through VictronClient._on_message.
+
+Replays a Victron topic stream through the compiled routing table and through an
+emulation of the previous path (linear Topics scan per lookup, a new Event and
+GlobalStateClient per message). Topic handlers, Domoticz HTTP and the GlobalState
+MQTT mirror are replaced by counters so only routing and state updates are timed;
+--handler-ms makes each stubbed handler block for that long, as a Victron write or
+the energy broker does, to compare handlers run inline on the network thread with
+the EventDispatcher worker pool (receipt rate, collapsed telemetry, queue depth).
+--dz-ms does the same for each Domoticz request: the previous path sent inline, the
+routed path queues into DomoticzSink (latest value per device, background flush).
+
+Record a stream from the broker with mosquitto_sub and replay it:
+    mosquitto_sub -h <MOSQUITTO_IP> -v -t 'N/#' -t 'Tibber/#' -t 'Tesla/#' -C 20000 > victron.stream
+    python3 scripts/bench_mqtt_dispatch.py --stream victron.stream
+
+Without --stream a synthetic stream with the live mix (pv/batt/ac power several times
+per second, slow settings topics) is generated. Imports the live modules, so it needs
+the service's .env and a reachable MQTT broker; nothing is published.
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+import types
+
+sys.path.append(os.getcwd())
+
+from lib.constants import Topics, DzEndpoints, SystemState, mqtt_msg_value_conversion, logging
+import lib.global_state as global_state
+import lib.domoticz_updater as domoticz_updater
+from lib.clients.mqtt_client_factory import VictronClient
+from lib.event_dispatcher import EventDispatcher
+from lib.global_state import GlobalStateClient, GlobalStateDatabase
+
+BANNER = "=" * 78
+FAST_KEYS = ["pv_power", "batt_power", "ac_out_power", "ac_in_power", "batt_current", "pv_current",
+             "tesla_power", "tesla_l1_current", "tesla_l2_current", "tesla_l3_current"]
+
+
+def _synthetic_stream(count, seed=3):
+    rnd = random.Random(seed)
+    topics = Topics["system0"]
+    slow_keys = [k for k in topics if k not in FAST_KEYS]
+    stream = []
+    for _ in range(count):
+        key = rnd.choice(FAST_KEYS) if rnd.random() < 0.9 else rnd.choice(slow_keys)
+        value = rnd.choice(list(SystemState)) if key == "system_state" else round(rnd.uniform(-3000, 3000), 1)
+        stream.append((topics[key], json.dumps({"value": value}).encode()))
+    return stream
+
+
+def _recorded_stream(path):
+    stream = []
+    with open(path) as f:
+        for line in f:
+            topic, _, payload = line.rstrip("\n").partition(" ")
+            if topic and payload:
+                stream.append((topic, payload.encode()))
+    return stream
+
+
+class _Dz:
+    """Stands in for the urllib3 pool: counts requests instead of sending them."""
+
+    def __init__(self, latency_ms=0.0):
+        self.requests = 0
+        self.latency_s = latency_ms / 1000.0
+
+    def request(self, *_args, **_kwargs):
+        self.requests += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return types.SimpleNamespace(status=200)
+
+
+def _linear_topic_key(topic):
+    subscribed_topics = Topics["system0"]
+    return next((k for k in subscribed_topics if subscribed_topics.get(k) == topic), None)
+
+
+def _legacy_on_message(msg, handler):
+    """The previous _on_message / domoticz_update / Event path, handlers stubbed."""
+    topic = msg.topic
+    payload = json.loads(msg.payload.decode("utf-8"))
+    value = payload.get('value', payload)
+    logmsg = f"{' '.join(topic.rsplit('/', 3)[1:3])}: {value}"
+    logging.debug(logmsg)
+    if topic and value is not None:
+        if topic in DzEndpoints['system0']:
+            if mqtt_msg_value_conversion.get(_linear_topic_key(topic)):
+                value_dz = mqtt_msg_value_conversion.get(_linear_topic_key(topic))(value=value)
+            else:
+                value_dz = value
+            domoticz_updater.http.request('GET', f"{DzEndpoints['system0'][topic]}{value_dz}")
+        topic_key = _linear_topic_key(topic)
+        gs_client = GlobalStateClient()
+        if topic_key:
+            gs_client.set(topic_key, value)
+            handler(topic_key)
+
+
+def _replay(fn, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for msg in messages:
+            fn(msg)
+        best = min(best, time.perf_counter() - t0)
+    return len(messages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an MQTT topic stream through the dispatch path.")
+    parser.add_argument("--stream", help="mosquitto_sub -v recording ('topic payload' per line).")
+    parser.add_argument("--count", type=int, default=20000, help="Synthetic stream length.")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays per path (best is reported).")
+    parser.add_argument("--handler-ms", type=float, default=0.0, help="Time each stubbed handler blocks.")
+    parser.add_argument("--dz-ms", type=float, default=0.0, help="Latency of each stubbed Domoticz request.")
+    parser.add_argument("--workers", type=int, default=4, help="EventDispatcher workers for the pooled run.")
+    args = parser.parse_args()
+
+    stream = _recorded_stream(args.stream) if args.stream else _synthetic_stream(args.count)
+    messages = [types.SimpleNamespace(topic=t, payload=p) for t, p in stream]
+
+    global_state.publish_message = lambda *a, **kw: None
+    domoticz_updater.http = dz = _Dz(args.dz_ms)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = GlobalStateDatabase(db_path=os.path.join(tmp, "state.db"), snapshot=False)
+
+        client = object.__new__(VictronClient)
+        client.events, client.routes = None, None
+        client._build_routes()
+        handled = {route.key: 0 for route in client.routes.values() if route.handler}
+
+        def handler(key):
+            if key in handled:
+                handled[key] += 1
+                if args.handler_ms:
+                    time.sleep(args.handler_ms / 1000.0)
+
+        for topic, route in client.routes.items():
+            if route.handler:
+                client.routes[topic] = route._replace(handler=lambda value, key=route.key: handler(key))
+
+        legacy = _replay(lambda msg: _legacy_on_message(msg, handler), messages, args.repeat)
+        client.dispatcher = EventDispatcher(workers=0)
+        routed = _replay(lambda msg: client._on_message(None, None, msg), messages, args.repeat)
+
+        client.dispatcher = EventDispatcher(workers=args.workers)
+        pooled = _replay(lambda msg: client._on_message(None, None, msg), messages, args.repeat)
+        while client.dispatcher.stats()['queued']:
+            time.sleep(0.01)
+        client.dispatcher.stop()
+        pool = client.dispatcher.stats()
+        legacy_requests = dz.requests
+        domoticz_updater.get_sink().stop()
+        sink = domoticz_updater.domoticz_stats()
+        db.close()
+
+    print(BANNER)
+    print("MQTT DISPATCH REPLAY  (%d messages, %s, best of %d, handlers %.1f ms)"
+          % (len(messages), "recorded" if args.stream else "synthetic", args.repeat, args.handler_ms))
+    print(BANNER)
+    print(f"  {'path':<22} {'msgs/s':>12}")
+    print(f"  {'linear + Event':<22} {legacy:>12,.0f}")
+    print(f"  {'routing table':<22} {routed:>12,.0f}")
+    print(f"  {'routing + %d workers' % args.workers:<22} {pooled:>12,.0f}")
+    print(f"  {'speed-up (table)':<22} {routed / legacy:>11.1f}x")
+    print(f"  {'speed-up (workers)':<22} {pooled / legacy:>11.1f}x")
+    print(BANNER)
+    print(f"  pool: handled {pool['handled']:,}  collapsed {pool['collapsed']:,}  dropped {pool['dropped']:,}"
+          f"  max queued {pool['max_queued']}  wait avg/max {pool['wait_ms_avg']}/{pool['wait_ms_max']} ms")
+    print(f"  domoticz: {legacy_requests - sink['sent']:,} inline requests (previous path) vs"
+          f" {sink['sent']:,} sent, {sink['merged']:,} merged by the sink")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Daily-policy opportunity-model benchmark: rebuilding from history vs closed-day rollups.
+
+Writes a synthetic history (a cycle record every 15 minutes with the cumulative
+day counters, plus a settlement per slot) for the last N days into a temporary
+directory, compacts every month before the current one to Parquet, and times
+ai_powered_ess._opportunity_model_from_history over the trailing window:
+
+  * rescan   — the rollup cache cleared before every build, so every closed day
+               is read and reduced again (what each optimizer run used to do)
+  * rollups  — the steady state: closed-day rollups cached, a build only merges
+
+Both are measured for the default 21-day window and for a 365-day window.
+
+Usage:
+    python3 scripts/bench_opportunity_model.py
+    python3 scripts/bench_opportunity_model.py --days 21 365 --reps 10
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from lib import ai_powered_ess as ess
+from lib import history_store as hs
+
+BANNER = "=" * 78
+
+
+def _write_history(hist_dir, days, seed=21):
+    rnd = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    t = (now - timedelta(days=days)).replace(hour=0, minute=0)
+    imp = exp = 0.0
+    while t <= now:
+        if t.hour == 0 and t.minute == 0:
+            imp = exp = 0.0
+        imp += rnd.uniform(0, 0.08)
+        exp += rnd.uniform(0, 0.1)
+        price = round(rnd.uniform(0.05, 0.45), 4)
+        hs.append(t.date(), {
+            "kind": "cycle", "ts": t.isoformat(), "price_buy": price, "soc": rnd.uniform(20, 90),
+            "day_import_cost": round(imp, 4), "day_export_reward": round(exp, 4),
+        }, hist_dir)
+        hs.append(t.date(), {
+            "kind": "settlement", "ts": t.isoformat(), "slot_start": (t - timedelta(minutes=15)).isoformat(),
+            "predicted_net_eur": rnd.uniform(-0.1, 0.1), "actual_net_eur": rnd.uniform(-0.1, 0.1),
+        }, hist_dir)
+        t += timedelta(minutes=15)
+
+
+def _timed(hist_dir, days, reps, clear):
+    ess._DAY_ROLLUPS.clear()
+    model = ess._opportunity_model_from_history(hist_dir, days=days)       # warm the day cache/pool
+    best = None
+    for _ in range(reps):
+        if clear:
+            ess._DAY_ROLLUPS.clear()
+        t0 = time.perf_counter()
+        ess._opportunity_model_from_history(hist_dir, days=days)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the opportunity-model build with closed-day rollups.")
+    parser.add_argument("--days", type=int, nargs="+", default=[21, 365], help="History windows to build over.")
+    parser.add_argument("--reps", type=int, default=5, help="Builds per measurement (best is reported).")
+    args = parser.parse_args()
+    if not hs.duckdb_available():
+        print("duckdb is not installed; cannot compact the synthetic history.", file=sys.stderr)
+        return 1
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        hist_dir = os.path.join(tmp, "history")
+        _write_history(hist_dir, max(args.days))
+        hs.backfill_cold_months(hist_dir)
+        for days in args.days:
+            rescan, model = _timed(hist_dir, days, args.reps, clear=True)
+            cached, cached_model = _timed(hist_dir, days, args.reps, clear=False)
+            assert model == cached_model
+            rows.append((days, rescan, cached, model))
+
+    print(BANNER)
+    print("OPPORTUNITY MODEL BUILD  (best of %d)" % args.reps)
+    print(BANNER)
+    print(f"  {'days':>5} {'rescan ms':>11} {'rollups ms':>11} {'speed-up':>9} {'prices':>8} {'p95':>7}")
+    for days, rescan, cached, model in rows:
+        print(f"  {days:>5} {rescan:>11.1f} {cached:>11.2f} {rescan / cached:>8.0f}x "
+              f"{model['price_samples']:>8} {model['historical_price_p95']:>7.4f}")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
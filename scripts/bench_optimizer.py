@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+AI ESS optimizer benchmark: DP runtime versus SoC step and horizon length.
+
+Runs ``OptimizationEngine.optimize`` on a synthetic quarter-hour price curve
+(cheap nights, expensive evenings, midday PV) for 24h, 48h and 72h horizons at a
+range of ``OPTIMIZER_SOC_STEP_PCT`` values, and prints the best-of-N wall time
+per combination. Nothing is read from or written to the live system.
+
+Usage:
+    python3 scripts/bench_optimizer.py                    # banded NumPy kernel
+    python3 scripts/bench_optimizer.py --reference        # also time the pure-Python kernel
+    python3 scripts/bench_optimizer.py --steps 1 0.5 0.25 --hours 48 --repeat 5
+"""
+import sys
+import os
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.getcwd())
+
+from lib.ai_powered_ess import OptimizationEngine
+
+BANNER = "=" * 78
+
+
+def _synthetic_horizon(hours, seed=7):
+    rnd = random.Random(seed)
+    base = (datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            + timedelta(hours=1))
+    prices, load, pv = [], [], []
+    for i in range(hours * 4):
+        t = base + timedelta(minutes=15 * i)
+        price = 0.22
+        if 2 <= t.hour < 5:
+            price = 0.08
+        elif 17 <= t.hour < 21:
+            price = 0.45
+        prices.append({'start': t, 'total': round(price + rnd.uniform(-0.03, 0.03), 4)})
+        load.append(0.18 + rnd.uniform(0.0, 0.25))
+        sun = math.sin(math.pi * (t.hour + t.minute / 60.0 - 6.0) / 14.0)
+        pv.append(max(0.0, sun) * 2.2)
+    return prices, load, pv
+
+
+def _engine(soc_step, kernel):
+    engine = OptimizationEngine()
+    engine.battery_capacity = 45.0
+    engine.slot_minutes = 15.0
+    engine.soc_step = soc_step
+    engine.soc_states = [i * soc_step for i in range(int(100 / soc_step) + 1)]
+    engine.dp_kernel = kernel
+    return engine
+
+
+def _time(engine, prices, load, pv, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = engine.optimize(50.0, prices, load, pv)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI ESS optimizer DP.")
+    parser.add_argument("--steps", type=float, nargs="+", default=[5.0, 2.5, 1.0, 0.5, 0.25],
+                        help="SoC steps (percentage points) to benchmark.")
+    parser.add_argument("--hours", type=int, nargs="+", default=[24, 48, 72],
+                        help="Horizon lengths (hours) to benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per combination (best is reported).")
+    parser.add_argument("--reference", action="store_true",
+                        help="Also time the pure-Python reference kernel (slow at fine steps).")
+    args = parser.parse_args()
+
+    kernels = ['vectorized'] + (['reference'] if args.reference else [])
+
+    print(BANNER)
+    print("AI ESS OPTIMIZER BENCHMARK  (45 kWh pack, 15-min slots, best of %d)" % args.repeat)
+    print(BANNER)
+    header = f"  {'horizon':>7} {'soc step':>9} {'states':>7}"
+    for kernel in kernels:
+        header += f" {kernel + ' s':>14}"
+    if args.reference:
+        header += f" {'speed-up':>9} {'same':>5}"
+    print(header)
+
+    for hours in args.hours:
+        prices, load, pv = _synthetic_horizon(hours)
+        for step in args.steps:
+            row = f"  {hours:>6}h {step:>8.2f}% {int(100 / step) + 1:>7}"
+            timings, results = [], []
+            for kernel in kernels:
+                elapsed, result = _time(_engine(step, kernel), prices, load, pv, args.repeat)
+                timings.append(elapsed)
+                results.append(result)
+                row += f" {elapsed:>14.3f}"
+            if args.reference:
+                row += f" {timings[1] / timings[0]:>8.1f}x {'yes' if results[0] == results[1] else 'NO':>5}"
+            print(row)
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+retrieve_setting micro-benchmark: lookups per second, uncached vs memoized .env.
+
+"uncached" re-parses the .env and re-publishes the config topic on every call,
+as retrieve_setting used to; "memoized" is the current mtime/size keyed cache.
+Runs against a temporary copy of .env.example with an in-process GlobalState
+and the MQTT publish counted instead of sent, so nothing touches the live system.
+
+Usage:
+    python3 scripts/bench_settings.py
+    python3 scripts/bench_settings.py --ops 20000
+"""
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+import lib.config_retrieval as config_retrieval
+from lib.global_state import GlobalStateDatabase
+
+BANNER = "=" * 78
+KEYS = ["MAX_TIBBER_BUY_PRICE", "ESS_NET_METERING_BATT_MIN_SOC", "OPTIMIZER_SOC_STEP_PCT", "TIMEZONE"]
+
+
+def _rate(ops, before_each=None):
+    t0 = time.perf_counter()
+    for i in range(ops):
+        if before_each:
+            before_each()
+        config_retrieval.retrieve_setting(KEYS[i % len(KEYS)])
+    return ops / (time.perf_counter() - t0)
+
+
+def _forget():
+    config_retrieval.invalidate_settings_cache()
+    config_retrieval.retrieve_setting._published = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieve_setting lookups.")
+    parser.add_argument("--ops", type=int, default=5000, help="Lookups per measurement.")
+    args = parser.parse_args()
+
+    published = []
+    config_retrieval.publish_message = lambda *a, **kw: published.append(a or kw)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env_file = os.path.join(tmp, ".env")
+        shutil.copy(".env.example", env_file)
+        os.environ["APP_ENV_PATH"] = env_file
+        os.environ["APP_SECRETS_PATH"] = os.path.join(tmp, ".secrets")
+        db = GlobalStateDatabase(db_path=os.path.join(tmp, "state.db"), snapshot=False)
+
+        uncached = _rate(args.ops, _forget)
+        uncached_publishes = len(published)
+        published.clear()
+        _forget()
+        memoized = _rate(args.ops)
+        memoized_publishes = len(published)
+        db.close()
+
+    print(BANNER)
+    print("SETTINGS LOOKUP BENCHMARK  (%d lookups over %d .env keys)" % (args.ops, len(KEYS)))
+    print(BANNER)
+    print(f"  {'mode':<10} {'lookups/s':>12} {'publishes':>10}")
+    print(f"  {'uncached':<10} {uncached:>12,.0f} {uncached_publishes:>10}")
+    print(f"  {'memoized':<10} {memoized:>12,.0f} {memoized_publishes:>10}")
+    print(f"  {'speed-up':<10} {memoized / uncached:>11.0f}x")
+    print(BANNER)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -15,6 +15,8 @@ Usage:
     python scripts/compact_history.py                     # compact all complete past months
     python scripts/compact_history.py --keep-ndjson       # also keep the source NDJSON
     python scripts/compact_history.py --month 2026-05     # just this month
+    python scripts/compact_history.py --migrate           # rewrite older-layout Parquet months as typed columns
+                                                          # and write any missing month manifests
     python scripts/compact_history.py --dir data/history  # override the history directory
 """
 import os
@@ -58,6 +60,9 @@ def main():
     ap.add_argument("--keep-ndjson", action="store_true", help="keep source NDJSON after compaction")
     ap.add_argument("--dry-run", action="store_true", help="show what would be compacted, do nothing")
     ap.add_argument("--status", action="store_true", help="print store status and exit")
+    ap.add_argument("--migrate", action="store_true",
+                    help="rewrite Parquet months written with an older schema version and write "
+                         "missing month manifests, then exit")
     ap.add_argument("--force", action="store_true",
                     help="allow compacting the CURRENT month (unsafe: it's still being appended)")
     args = ap.parse_args()
@@ -76,6 +81,22 @@ def main():
         print(f"latest ts   : {st['latest_ts']}")
         print(f"parquet mon : {', '.join(st['parquet_months']) or '—'}")
         print(f"ndjson days : {len(st['ndjson_days'])} hot day file(s)")
+        old = [ym for ym in st['parquet_months']
+               if hs.parquet_schema_version(hs.month_parquet_path(*ym.split("-"), hist_dir))
+               < hs.PARQUET_SCHEMA_VERSION]
+        print(f"old layout  : {', '.join(old) or '—'}" + ("  (run --migrate)" if old else ""))
+        bare = st['months_without_manifest']
+        print(f"no manifest : {', '.join(bare) or '—'}" + ("  (run --migrate)" if bare else ""))
+        return 0
+
+    if args.migrate:
+        done = hs.migrate_parquet_months(hist_dir)
+        for path in done:
+            print(f"migrated {path} -> schema v{hs.PARQUET_SCHEMA_VERSION}")
+        if not done:
+            print(f"Nothing to migrate (all Parquet months are schema v{hs.PARQUET_SCHEMA_VERSION}).")
+        for path in hs.write_month_manifests(hist_dir):
+            print(f"wrote manifest {path}")
         return 0
 
     remove = not args.keep_ndjson
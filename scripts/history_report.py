@@ -39,20 +39,28 @@ def _env_history_dir():
         return "data/history"
 
 
+# The record fields the rollup and accuracy sections read (ts and kind always come back).
+REPORT_COLUMNS = (
+    "mode", "control_action", "load_w", "batt_w", "pv_w", "price_buy",
+    "day_import_kwh", "day_import_cost", "day_export_kwh", "day_export_reward",
+    "incomplete", "predicted_net_eur", "actual_net_eur",
+)
+
+
 def load_records(history_dir, only_date=None):
     # Route through the store so both hot NDJSON days and Parquet-compacted cold
-    # months are read. Falls back to a raw NDJSON glob if the store can't be imported.
+    # months are read, as one range query. Falls back to a raw NDJSON glob if the store can't be imported.
     try:
         from lib import history_store as hs
     except Exception:
         hs = None
     if hs is not None:
-        if only_date:
-            return hs.read_day(only_date, history_dir)
-        records = []
-        for d in hs.available_days(history_dir):
-            records.extend(hs.read_day(d, history_dir))
-        return records
+        days = [only_date] if only_date else hs.available_days(history_dir)
+        if not days:
+            return []
+        cols = hs.query(days[0], days[-1], columns=REPORT_COLUMNS, hist_dir=history_dir)
+        names = ["ts", "kind", *REPORT_COLUMNS]
+        return [{n: cols[n][i] for n in names} for i in range(len(cols["ts"]))]
 
     pattern = f"ess-{only_date}.ndjson" if only_date else "ess-*.ndjson"
     records = []
@@ -329,3 +329,13 @@ def test_logs_route_returns_buffered_lines(monkeypatch):
 
     assert response.status_code == 200
     assert response.get_json() == {"lines": ["line one", "line two"]}
+
+
+def test_metrics_route_reports_global_state_publish_counters():
+    response = server.app.test_client().get("/api/metrics")
+
+    assert response.status_code == 200
+    stats = response.get_json()["global_state_publish"]
+    assert {"sent", "suppressed", "pending"} <= set(stats)
+    assert {"mqtt_dispatch", "domoticz", "history_day_cache", "history_duckdb",
+            "tibber_prices", "victron_control", "victron_charge_schedule"} <= set(response.get_json())
@@ -149,6 +149,20 @@ class TestAIPoweredESS(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertIn('schedule', result)
 
+    def test_price_horizon_input_matches_point_list(self):
+        # The broker hands the optimizer a pre-parsed PriceHorizon; the plan must
+        # be the one the raw point list yields.
+        from lib.price_horizon import PriceHorizon
+        base_time = datetime.now(tz.UTC).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        prices = [{'start': (base_time + timedelta(hours=i)).isoformat(),
+                   'total': 0.05 if i % 8 < 3 else 0.40, 'level': 'NORMAL'} for i in range(24)]
+
+        from_list = self.engine.optimize(30.0, prices)
+        from_horizon = self.engine.optimize(30.0, PriceHorizon.from_points(prices))
+        self.assertEqual([s['action'] for s in from_list['schedule']],
+                         [s['action'] for s in from_horizon['schedule']])
+        self.assertEqual(from_list['victron_slots'], from_horizon['victron_slots'])
+
     def test_hourly_slot_duration_detected(self):
         # Hourly Tibber data must yield Victron charge durations in whole hours
         # (multiples of 3600s), not 15-minute (900s) windows.
@@ -332,6 +346,225 @@ class TestAIPoweredESS(unittest.TestCase):
             setattr(e, k, v)
         return e
 
+    def test_vectorized_dp_matches_reference_kernel(self):
+        # The NumPy kernel must reproduce the pure-Python reference exactly
+        # (same schedule, same tie-breaks), across limits, floors and hurdles.
+        import random
+        scenarios = [
+            {},
+            {'soc_step': 1.0, 'max_grid_charge_soc': 90.0, 'cycle_cost': 0.02},
+            {'soc_step': 2.5, 'min_sell_price': 0.30, 'max_power_import': 3.0,
+             'max_power_export': 4.0, 'arbitrage_margin': 0.01},
+            {'soc_step': 5.0, 'charge_efficiency': 1.0, 'max_discharge_power': 5.0,
+             'export_fee': 0.02, 'terminal_value_factor': 1.0},
+        ]
+        base_time = datetime(2099, 6, 28, 10, 0, tzinfo=tz.UTC)
+        for seed, overrides in enumerate(scenarios):
+            rnd = random.Random(seed)
+            prices = [
+                {'start': base_time + timedelta(hours=i),
+                 'total': 0.25 if seed == 0 else round(rnd.uniform(-0.05, 0.60), 4)}
+                for i in range(30)
+            ]
+            load = [round(rnd.uniform(0.0, 1.5), 3) for _ in prices]
+            pv = [round(rnd.uniform(0.0, 3.0), 3) if 8 <= p['start'].hour < 18 else 0.0
+                  for p in prices]
+
+            e = self._arb_engine(slot_minutes=15.0, **overrides)
+            e.soc_states = [i * e.soc_step for i in range(int(100 / e.soc_step) + 1)]
+            e.set_cost_basis_floor(0.15 if seed % 2 else 0.0)
+            fast = e.optimize(47.0, prices, load, pv)
+            e.dp_kernel = 'reference'
+            slow = e.optimize(47.0, prices, load, pv)
+
+            self.assertIsNotNone(slow)
+            self.assertEqual(fast, slow, f"scenario {seed} diverged: {overrides}")
+
+    def test_banded_transitions_cover_power_limits_at_fine_steps(self):
+        # 10 kW for 15 min on 45 kWh = 5.56% per slot: at 0.25% steps only ~23
+        # states either side are reachable, and the band must not lose any of
+        # them (the schedule still matches the dense reference search).
+        e = self._arb_engine(slot_minutes=15.0, soc_step=0.25,
+                             max_charge_power=10.0, max_discharge_power=10.0)
+        e.soc_states = [i * e.soc_step for i in range(int(100 / e.soc_step) + 1)]
+        up, down = e._band_offsets(0.25)
+        self.assertEqual((up, down), (23, 23))
+        self.assertEqual(e._transition_tables(0.25)['ac'].shape, (up + down + 1, 401))
+
+        base_time = datetime(2099, 6, 28, 0, 0, tzinfo=tz.UTC)
+        prices = [
+            {'start': base_time + timedelta(hours=i), 'total': 0.08 if i < 4 else 0.45}
+            for i in range(8)
+        ]
+        fast = e.optimize(30.0, prices, [0.3] * 8, [0.0] * 8)
+        e.dp_kernel = 'reference'
+        self.assertEqual(fast, e.optimize(30.0, prices, [0.3] * 8, [0.0] * 8))
+        rises = [s['soc_end'] - s['soc_start'] for s in fast['schedule']]
+        self.assertTrue(any(r > 5.0 for r in rises), "full-power charge must stay reachable")
+
+    def _warm_start_inputs(self, hours=30):
+        base_time = datetime(2099, 6, 28, 12, 0, tzinfo=tz.UTC)
+        prices = [
+            {'start': base_time + timedelta(hours=i),
+             'total': [0.22, 0.09, 0.31, 0.45, 0.18][i % 5]}
+            for i in range(hours)
+        ]
+        load = {p['start']: 0.6 for p in prices}
+        pv = {p['start']: (1.8 if 9 <= p['start'].hour < 17 else 0.0) for p in prices}
+        return prices, load, pv
+
+    def test_backward_cost_to_go_solve_matches_forward_plan(self):
+        prices, load, pv = self._warm_start_inputs()
+        forward = self._arb_engine().optimize(40.0, prices, load, pv)
+
+        e = self._arb_engine()
+        e.cost_to_go_cache = ai_powered_ess.CostToGoCache()
+        self.assertEqual(e.optimize(40.0, prices, load, pv), forward)
+
+    def test_warm_start_reuses_cost_to_go_after_slot_rollover(self):
+        prices, load, pv = self._warm_start_inputs()
+        cache = ai_powered_ess.CostToGoCache()
+        e = self._arb_engine()
+        e.cost_to_go_cache = cache
+        e.optimize(40.0, prices, load, pv)
+
+        # Next cycle: the first slot dropped off and the live SoC drifted.
+        warm = e.optimize(43.0, prices[1:], load, pv)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['reused_slots'], len(prices) - 1)
+
+        cold = self._arb_engine()
+        cold.cost_to_go_cache = ai_powered_ess.CostToGoCache()
+        self.assertEqual(warm, cold.optimize(43.0, prices[1:], load, pv))
+
+    def test_warm_start_recomputes_only_slots_up_to_a_forecast_change(self):
+        prices, load, pv = self._warm_start_inputs()
+        cache = ai_powered_ess.CostToGoCache()
+        e = self._arb_engine()
+        e.cost_to_go_cache = cache
+        e.optimize(40.0, prices, load, pv)
+
+        # A tiny forecast wobble stays within tolerance; a real change at slot
+        # 10 forces slots 0..10 to be re-solved while 11.. are reused.
+        changed = dict(load)
+        changed[prices[3]['start']] += ai_powered_ess.WARM_START_LOAD_TOLERANCE_KWH / 2
+        changed[prices[10]['start']] += 1.0
+        warm = e.optimize(40.0, prices, changed, pv)
+        self.assertEqual(cache.solved_slots, len(prices) + 11)
+        self.assertEqual(cache.reused_slots, len(prices) - 11)
+
+        changed[prices[3]['start']] = load[prices[3]['start']]
+        cold = self._arb_engine()
+        cold.cost_to_go_cache = ai_powered_ess.CostToGoCache()
+        self.assertEqual(warm['victron_slots'],
+                         cold.optimize(40.0, prices, changed, pv)['victron_slots'])
+
+    def test_daily_policy_candidates_share_one_horizon_and_cost_to_go(self):
+        prices, load, pv = self._warm_start_inputs()
+        split = next(i for i, p in enumerate(prices) if p['start'].date() > prices[0]['start'].date())
+        model = {
+            'exceptional_threshold_eur': 1000.0,
+            'forecast_risk_eur': 0.0,
+            'historical_price_p95': 0.0,
+        }
+
+        # Candidates built the long way: three independent optimizations.
+        e = self._arb_engine()
+        today = e.optimize(40.0, prices[:split], load, pv)
+        future = e.optimize(today['schedule'][-1]['soc_end'], prices[split:], load, pv)
+        expected = ai_powered_ess._combine_today_first_plans(today, future)
+
+        e = self._arb_engine()
+        calls = {'prepare': 0, 'cost_to_go': 0}
+        prepare, cost_to_go = e._prepare_horizon, e._cost_to_go
+
+        def counting(name, fn):
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                return fn(*args, **kwargs)
+            return wrapper
+
+        e._prepare_horizon = counting('prepare', prepare)
+        e._cost_to_go = counting('cost_to_go', cost_to_go)
+        result = e.optimize_with_daily_policy(40.0, prices, load, pv, opportunity_model=model)
+
+        # Without warm start every candidate is a forward solve: exactly the long way.
+        self.assertEqual(result['planning_policy']['selected'], 'today_first')
+        self.assertEqual(result['schedule'], expected['schedule'])
+        self.assertEqual(result['victron_slots'], expected['victron_slots'])
+        self.assertEqual(calls, {'prepare': 1, 'cost_to_go': 0})
+
+        # Warm-started, no terminal value either way, so the future leg rolls out
+        # the full-horizon table; only today's segment needs its own pass.
+        e.cost_to_go_cache = ai_powered_ess.CostToGoCache()
+        calls.update(prepare=0, cost_to_go=0)
+        warm = e.optimize_with_daily_policy(40.0, prices, load, pv, opportunity_model=model)
+        self.assertEqual(warm['planning_policy']['selected'], 'today_first')
+        self.assertAlmostEqual(ai_powered_ess._plan_economics(warm)['total_net_eur'],
+                               ai_powered_ess._plan_economics(expected)['total_net_eur'], places=9)
+        self.assertEqual(calls, {'prepare': 1, 'cost_to_go': 2})
+
+    def test_solves_match_the_reference_kernel_on_randomized_tied_inputs(self):
+        # Few distinct prices, zero-price slots and lossless conversion make exact
+        # cost ties common. Cold solves must pick the reference kernel's schedule;
+        # warm-started (backward) ones an equally cheap one.
+        import random
+        model = {'exceptional_threshold_eur': 0.5, 'forecast_risk_eur': 0.0,
+                 'historical_price_p95': 0.0}
+        base_time = datetime(2099, 6, 28, 14, 0, tzinfo=tz.UTC)
+        states = [i * 2.5 for i in range(41)]
+        for seed in range(200):
+            rnd = random.Random(seed)
+            prices = [{'start': base_time + timedelta(hours=i), 'total': rnd.choice([0.0, 0.1, 0.1, 0.3])}
+                      for i in range(rnd.randint(12, 34))]
+            load = [rnd.uniform(0.0, 1.5) for _ in prices]
+            pv = [rnd.uniform(0.0, 3.0) if 8 <= p['start'].hour < 18 else 0.0 for p in prices]
+            soc = rnd.uniform(5.0, 100.0)
+            overrides = rnd.choice([{}, {'charge_efficiency': 1.0, 'discharge_efficiency': 1.0},
+                                    {'terminal_value_factor': 1.0}, {'cycle_cost': 0.01}])
+
+            engines = {}
+            for name in ('reference', 'cold', 'warm'):
+                e = engines[name] = self._arb_engine(soc_step=2.5, **overrides)
+                e.soc_states = states
+            engines['reference'].dp_kernel = 'reference'
+            engines['warm'].cost_to_go_cache = ai_powered_ess.CostToGoCache()
+            plans = {name: e.optimize(soc, prices, load, pv) for name, e in engines.items()}
+            daily = {name: e.optimize_with_daily_policy(soc, prices, load, pv, opportunity_model=model)
+                     for name, e in engines.items() if name != 'warm'}
+
+            self.assertEqual(plans['cold'], plans['reference'], f"seed {seed}")
+            self.assertEqual(daily['cold'], daily['reference'], f"seed {seed}")
+            if not overrides.get('terminal_value_factor'):
+                self.assertAlmostEqual(ai_powered_ess._plan_economics(plans['warm'])['total_net_eur'],
+                                       ai_powered_ess._plan_economics(plans['reference'])['total_net_eur'],
+                                       places=9, msg=f"seed {seed}")
+
+    def test_warm_start_invalidates_on_new_horizon_and_config_change(self):
+        prices, load, pv = self._warm_start_inputs()
+        cache = ai_powered_ess.CostToGoCache()
+        e = self._arb_engine()
+        e.cost_to_go_cache = cache
+        e.optimize(40.0, prices, load, pv)
+
+        # Tomorrow's prices published: the horizon end moved, nothing is reused.
+        extended = prices + [
+            {'start': prices[-1]['start'] + timedelta(hours=i + 1), 'total': 0.30}
+            for i in range(6)
+        ]
+        e.optimize(40.0, extended, load, pv)
+        self.assertEqual(cache.stats()['misses'], 2)
+        self.assertEqual(cache.reused_slots, 0)
+
+        # Any engine config change drops every cached table.
+        e.cycle_cost = 0.05
+        e.optimize(40.0, extended, load, pv)
+        stats = cache.stats()
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['invalidations'], 1)
+        self.assertEqual(stats['entries'], 1)
+
     def test_arbitrage_margin_prunes_thin_spread_cycles(self):
         # Thin spread (0.20 -> 0.23) is profitable with no hurdle but not once a
         # margin larger than the spread is required.
@@ -656,5 +889,62 @@ class TestAIPoweredESS(unittest.TestCase):
         self.assertEqual(result['planning_policy']['selected'], 'full_horizon')
         self.assertEqual(result['planning_policy']['reason_code'], 'SAME_DAY_HORIZON')
 
+    def test_weighted_percentile_matches_percentile_of_expanded_samples(self):
+        import random
+        from collections import Counter
+        rnd = random.Random(2)
+        for _ in range(50):
+            samples = [round(rnd.uniform(-0.1, 0.6), 2) for _ in range(rnd.randint(1, 40))]
+            for q in (0.0, 0.5, 0.75, 0.95, 1.0):
+                self.assertEqual(ai_powered_ess._weighted_percentile(Counter(samples), q),
+                                 ai_powered_ess._percentile(samples, q))
+        self.assertIsNone(ai_powered_ess._weighted_percentile(Counter(), 0.95))
+
+    def test_opportunity_model_reuses_closed_day_rollups_until_a_day_changes(self):
+        import json
+        import tempfile
+        from unittest.mock import patch
+        from lib import history_store
+
+        today = datetime.now().date()
+        with tempfile.TemporaryDirectory() as tmp:
+            for back, (net, err, price) in enumerate([(2.0, 0.4, 0.30), (4.0, 0.2, 0.50), (1.0, 0.8, 0.20)], start=1):
+                day = today - timedelta(days=back)
+                recs = [
+                    {'ts': f'{day}T10:00:00', 'kind': 'cycle', 'price_buy': price,
+                     'day_import_cost': 1.0, 'day_export_reward': 0.5},
+                    {'ts': f'{day}T23:00:00', 'kind': 'cycle', 'price_buy': price + 0.1,
+                     'day_import_cost': 1.0, 'day_export_reward': 1.0 + net},
+                    {'ts': f'{day}T23:01:00', 'kind': 'settlement',
+                     'predicted_net_eur': 0.1, 'actual_net_eur': 0.1 + err},
+                ]
+                with open(os.path.join(tmp, f'ess-{day}.ndjson'), 'w') as fh:
+                    fh.write(''.join(json.dumps(r) + '\n' for r in recs))
+
+            model = ai_powered_ess._opportunity_model_from_history(tmp, days=21)
+            self.assertEqual(model['source'], 'history')
+            self.assertEqual(model['history_days'], 3)
+            self.assertEqual(model['daily_profit_samples'], 3)
+            self.assertEqual(model['price_samples'], 6)
+            self.assertEqual(model['historical_price_p95'], 0.575)
+            self.assertAlmostEqual(model['forecast_risk_eur'], 0.6, places=3)
+
+            # Closed days are served from their rollups: no history query on a rebuild.
+            with patch.object(history_store, 'query', side_effect=AssertionError('re-read')):
+                self.assertEqual(ai_powered_ess._opportunity_model_from_history(tmp, days=21), model)
+
+            # A changed day is re-read on its own.
+            day = today - timedelta(days=2)
+            with open(os.path.join(tmp, f'ess-{day}.ndjson'), 'a') as fh:
+                fh.write(json.dumps({'ts': f'{day}T23:30:00', 'kind': 'cycle', 'price_buy': 0.9,
+                                     'day_import_cost': 1.0, 'day_export_reward': 11.0}) + '\n')
+            real_query = history_store.query
+            with patch.object(history_store, 'query', side_effect=real_query) as spy:
+                rebuilt = ai_powered_ess._opportunity_model_from_history(tmp, days=21)
+            self.assertEqual(spy.call_count, 1)
+            self.assertEqual(spy.call_args.args[:2], (day.isoformat(), day.isoformat()))
+            self.assertEqual(rebuilt['price_samples'], 7)
+            self.assertGreater(rebuilt['historical_price_p95'], model['historical_price_p95'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -25,3 +25,34 @@ def test_default_env_path_is_repo_local(monkeypatch):
     monkeypatch.delenv("APP_ENV_PATH", raising=False)
 
     assert Path(env_path()).as_posix() == ".env"
+
+
+def test_retrieve_setting_rereads_env_only_when_file_changes(monkeypatch, tmp_path):
+    import os
+    from lib import config_retrieval
+
+    env_path = tmp_path / "runtime.env"
+    env_path.write_text("SOME_SETTING=one\n")
+    published, parses = [], []
+    real_dotenv_values = config_retrieval.dotenv_values
+
+    monkeypatch.setenv("APP_ENV_PATH", str(env_path))
+    monkeypatch.setattr(config_retrieval.STATE, "get", lambda key: None)
+    monkeypatch.setattr(config_retrieval, "publish_message",
+                        lambda topic, message=None, retain=False: published.append(message))
+    monkeypatch.setattr(config_retrieval, "dotenv_values",
+                        lambda path: parses.append(path) or real_dotenv_values(path))
+    monkeypatch.setattr(config_retrieval.retrieve_setting, "_published", {}, raising=False)
+    config_retrieval.invalidate_settings_cache()
+
+    for _ in range(3):
+        assert config_retrieval.retrieve_setting("SOME_SETTING") == "one"
+    assert parses.count(str(env_path)) == 1
+    assert published == ["one"]
+
+    env_path.write_text("SOME_SETTING=three\n")
+    stat = os.stat(env_path)
+    os.utime(env_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert config_retrieval.retrieve_setting("SOME_SETTING") == "three"
+    assert parses.count(str(env_path)) == 2
+    assert published == ["one", "three"]
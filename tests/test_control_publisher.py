@@ -0,0 +1,98 @@
+import types
+
+import paho.mqtt.client as mqtt
+
+from lib.clients.control_publisher import ControlPublisher
+
+
+class _FakeClient:
+    """Stands in for a connected paho client; acks are delivered by the test."""
+
+    def __init__(self, rc=mqtt.MQTT_ERR_SUCCESS, ack_inline=False):
+        self.rc = rc
+        self.ack_inline = ack_inline
+        self.sent = []
+        self.mid = 0
+        self.on_publish = None
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.mid += 1
+        self.sent.append((topic, payload, qos, retain))
+        if self.ack_inline:
+            self.on_publish(self, None, self.mid)
+        return types.SimpleNamespace(rc=self.rc, mid=self.mid)
+
+    def disconnect(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+
+def test_writes_share_one_session_and_are_tracked_until_acked():
+    client = _FakeClient()
+    publisher = ControlPublisher(client=client)
+    publisher._on_connect(client, None, {}, 0)
+
+    for watts in (100, 200, 300):
+        assert publisher.publish("W/x/settings/0/Settings/CGwacs/AcPowerSetPoint", f'{{"value": {watts}}}', retain=True)
+
+    assert len(client.sent) == 3 and all(qos == 1 for _t, _p, qos, _r in client.sent)
+    stats = publisher.stats()
+    assert (stats["connected"], stats["connects"], stats["published"], stats["in_flight"]) == (True, 1, 3, 3)
+    assert stats["oldest_in_flight_s"] is not None
+
+    client.on_publish(client, None, 1)
+    client.on_publish(client, None, 2)
+    assert publisher.stats()["in_flight"] == 1 and publisher.stats()["acked"] == 2
+    assert not publisher.flush(timeout=0.0)
+    client.on_publish(client, None, 3)
+    assert publisher.flush(timeout=0.0)
+    assert publisher.stats()["ack_ms_max"] >= 0.0
+
+
+def test_ack_arriving_before_bookkeeping_is_not_left_in_flight():
+    client = _FakeClient(ack_inline=True)
+    publisher = ControlPublisher(client=client)
+    publisher._on_connect(client, None, {}, 0)
+
+    assert publisher.publish("W/x/vebus/276/Mode", '{"value": 3}')
+
+    stats = publisher.stats()
+    assert (stats["acked"], stats["in_flight"]) == (1, 0)
+    assert publisher._early_acks == {}
+
+
+def _connected(client):
+    publisher = ControlPublisher(client=client)
+    publisher._on_connect(client, None, {}, 0)
+    return publisher
+
+
+def test_qos1_write_while_disconnected_is_queued_but_rejected_write_is_an_error():
+    queued = _connected(_FakeClient(rc=mqtt.MQTT_ERR_NO_CONN))
+    assert queued.publish("W/x/minimum_ess_soc", '{"value": 10}')
+    assert queued.stats()["in_flight"] == 1 and queued.stats()["errors"] == 0
+
+    assert not queued.publish("Tesla/vehicle0/solar/ess_max_charge_voltage", '{"value": "54.0"}', qos=0)
+    rejected = _connected(_FakeClient(rc=mqtt.MQTT_ERR_QUEUE_SIZE))
+    assert not rejected.publish("W/x/minimum_ess_soc", '{"value": 10}')
+    assert queued.stats()["errors"] == 1 and rejected.stats()["errors"] == 1
+    assert rejected.stats()["in_flight"] == 0
+
+
+def test_writes_held_while_disconnected_keep_only_the_latest_value_per_topic():
+    client = _FakeClient()
+    publisher = ControlPublisher(client=client)
+    setpoint = "W/x/settings/0/Settings/CGwacs/AcPowerSetPoint"
+
+    for watts in (100, 200, 300):
+        assert publisher.publish(setpoint, f'{{"value": {watts}}}', retain=True)
+    assert publisher.publish("W/x/vebus/276/Mode", '{"value": 3}')
+    assert client.sent == []
+    assert (publisher.stats()["held"], publisher.stats()["superseded"]) == (2, 2)
+
+    publisher._on_connect(client, None, {}, 0)
+    assert client.sent == [(setpoint, '{"value": 300}', 1, True), ("W/x/vebus/276/Mode", '{"value": 3}', 1, False)]
+    stats = publisher.stats()
+    assert (stats["held"], stats["in_flight"], stats["published"]) == (0, 2, 4)
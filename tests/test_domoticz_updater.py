@@ -0,0 +1,48 @@
+import types
+
+import lib.domoticz_updater as domoticz_updater
+
+
+class _Http:
+    def __init__(self, status=200, error=None):
+        self.status, self.error, self.urls = status, error, []
+
+    def request(self, method, url, **kwargs):
+        self.urls.append(url)
+        assert kwargs.get("timeout") is not None
+        if self.error:
+            raise self.error
+        return types.SimpleNamespace(status=self.status)
+
+
+def test_sink_keeps_latest_value_per_device_and_drops_beyond_capacity(monkeypatch):
+    http = _Http()
+    monkeypatch.setattr(domoticz_updater, "http", http)
+    sink = domoticz_updater.DomoticzSink(interval=3600, max_pending=2)
+    monkeypatch.setattr(sink, "_thread", object())  # flush by hand
+
+    for watts in (100, 200, 300):
+        sink.push("http://dz/json.htm?idx=1&svalue=", watts, "pv", "pv_power")
+    sink.push("http://dz/json.htm?idx=2&svalue=", 50, "batt", "batt_power")
+    sink.push("http://dz/json.htm?idx=3&svalue=", 7, "ac", "ac_in_power")
+    assert http.urls == []
+
+    sink.flush()
+
+    assert http.urls == ["http://dz/json.htm?idx=1&svalue=300", "http://dz/json.htm?idx=2&svalue=50"]
+    stats = sink.stats()
+    assert (stats["sent"], stats["merged"], stats["dropped"], stats["errors"], stats["pending"]) == (2, 2, 1, 0, 0)
+
+
+def test_sink_counts_errors_and_sends_inline_without_interval(monkeypatch):
+    http = _Http(error=OSError("connection refused"))
+    monkeypatch.setattr(domoticz_updater, "http", http)
+    sink = domoticz_updater.DomoticzSink(interval=0)
+
+    sink.push("http://dz/json.htm?idx=1&svalue=", 1, "pv", "pv_power")
+    monkeypatch.setattr(domoticz_updater, "http", _Http(status=500))
+    sink.push("http://dz/json.htm?idx=1&svalue=", 2, "pv", "pv_power")
+
+    assert http.urls == ["http://dz/json.htm?idx=1&svalue=1"]
+    assert sink.stats()["sent"] == 2
+    assert sink.stats()["errors"] == 2
@@ -10,7 +10,8 @@ stub_tibber_api = types.ModuleType("lib.tibber_api")
 stub_tibber_api.lowest_48h_prices = MagicMock(return_value=[])
 stub_tibber_api.lowest_24h_prices = MagicMock(return_value=[])
 stub_tibber_api.publish_pricing_data = MagicMock()
-stub_tibber_api.get_all_price_points = MagicMock(return_value=[])
+stub_tibber_api.get_price_horizon = MagicMock(return_value=[])
+stub_tibber_api.price_fetch_stats = MagicMock(return_value={})
 sys.modules.setdefault("lib.tibber_api", stub_tibber_api)
 
 stub_victron_integration = types.ModuleType("lib.victron_integration")
@@ -36,6 +37,8 @@ stub_config_retrieval.retrieve_setting = _stub_retrieve_setting
 sys.modules.setdefault("lib.config_retrieval", stub_config_retrieval)
 
 import lib.energy_broker as energy_broker  # noqa: E402
+from lib.price_horizon import PriceHorizon  # noqa: E402
+from lib.victron_schedule import ChargeScheduleSync  # noqa: E402
 
 
 class DummyState:
@@ -641,6 +644,9 @@ def test_settlement_writes_predicted_vs_actual(monkeypatch, tmp_path):
     assert abs(s["soc_delta"] - (-8.0)) < 1e-6
     # Cost-basis field is recorded (discharge slot -> basis present, may be 0).
     assert "cost_basis_eur_per_kwh" in s
+    # The day's slot profile covers the settlement too, so the next cycle need not rebuild it.
+    profile = json.loads((tmp_path / "profiles" / f"slots-{t2.strftime('%Y-%m-%d')}.json").read_text())
+    assert profile["source"] == [files[0].name, files[0].stat().st_size]
 
 
 def test_settlement_ignores_extra_cycle_within_same_slot(monkeypatch, tmp_path):
@@ -821,8 +827,8 @@ def test_ai_ess_override_stands_optimizer_down(monkeypatch):
     monkeypatch.setattr(energy_broker, "retrieve_setting",
                         lambda name: "1" if name == "AI_POWERED_ESS_ALGORITHM" else None)
     monkeypatch.setattr(energy_broker, "STATE", DummyState({"ai_ess_override_enabled": "True", "batt_soc": 57}))
-    prices = MagicMock(return_value=[{"start": "2026-06-29T09:00:00+02:00", "total": 0.2}])
-    monkeypatch.setattr(energy_broker, "get_all_price_points", prices)
+    prices = MagicMock(return_value=PriceHorizon.from_points([{"start": "2026-06-29T09:00:00+02:00", "total": 0.2}]))
+    monkeypatch.setattr(energy_broker, "get_price_horizon", prices)
     optimizer = MagicMock()
     monkeypatch.setattr(energy_broker, "optimize_schedule", optimizer)
 
@@ -852,8 +858,8 @@ def test_ai_optimizer_skips_when_soc_key_missing_but_voltage_exists(monkeypatch,
     monkeypatch.setattr(energy_broker, "retrieve_setting",
                         lambda name: "1" if name == "AI_POWERED_ESS_ALGORITHM" else None)
     monkeypatch.setattr(energy_broker, "STATE", DummyState({"batt_voltage": 53.4}))
-    prices = MagicMock(return_value=[{"start": "2026-06-28T09:15:00+02:00"}])
-    monkeypatch.setattr(energy_broker, "get_all_price_points", prices)
+    prices = MagicMock(return_value=PriceHorizon.from_points([{"start": "2026-06-28T09:15:00+02:00"}]))
+    monkeypatch.setattr(energy_broker, "get_price_horizon", prices)
 
     energy_broker.run_ai_optimizer()
 
@@ -865,8 +871,8 @@ def test_ai_optimizer_accepts_reported_zero_soc(monkeypatch):
     monkeypatch.setattr(energy_broker, "retrieve_setting",
                         lambda name: "1" if name == "AI_POWERED_ESS_ALGORITHM" else None)
     monkeypatch.setattr(energy_broker, "STATE", DummyState({"batt_soc": 0, "batt_voltage": 53.4}))
-    prices = MagicMock(return_value=[])
-    monkeypatch.setattr(energy_broker, "get_all_price_points", prices)
+    prices = MagicMock(return_value=PriceHorizon.from_points([]))
+    monkeypatch.setattr(energy_broker, "get_price_horizon", prices)
 
     energy_broker.run_ai_optimizer()
 
@@ -899,7 +905,7 @@ def test_ai_optimizer_applies_pv_nowcast_when_weather_unavailable(monkeypatch):
             "pv_projected_remaining": 8000,
         }),
     )
-    monkeypatch.setattr(energy_broker, "get_all_price_points", lambda: prices)
+    monkeypatch.setattr(energy_broker, "get_price_horizon", lambda: PriceHorizon.from_points(prices))
     monkeypatch.setattr(
         energy_broker,
         "_build_pv_forecast_by_slot",
@@ -941,7 +947,9 @@ def test_ai_optimizer_applies_pv_nowcast_when_weather_unavailable(monkeypatch):
     )
     monkeypatch.setattr(energy_broker, "_set_grid_assist", lambda enabled: None)
     monkeypatch.setattr(energy_broker, "ac_power_setpoint", lambda **kwargs: None)
-    monkeypatch.setattr(energy_broker, "clear_victron_schedules", lambda: None)
+    writes = []
+    schedule_sync = ChargeScheduleSync(publish=lambda *args: writes.append(args), seed=lambda: {})
+    monkeypatch.setattr(energy_broker, "get_schedule_sync", lambda: schedule_sync)
     monkeypatch.setattr(energy_broker, "get_today_energy_actuals", lambda: {})
     monkeypatch.setattr(energy_broker, "_append_history", lambda *args, **kwargs: None)
     monkeypatch.setattr(energy_broker, "_settle_prior_slot", lambda *args, **kwargs: None)
@@ -951,6 +959,7 @@ def test_ai_optimizer_applies_pv_nowcast_when_weather_unavailable(monkeypatch):
 
     nowcast.assert_called_once()
     assert nowcast.call_args.args[2]["available"] is False
+    assert schedule_sync.stats()["cycles"] == 1 and len(writes) == 5
 
 
 def test_low_soc_idle_retain_defers_to_cheaper_planned_buy(monkeypatch):
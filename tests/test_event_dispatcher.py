@@ -0,0 +1,153 @@
+import threading
+
+from lib.event_dispatcher import EventDispatcher
+
+
+def _wait_idle(dispatcher, submitted):
+    for _ in range(500):
+        stats = dispatcher.stats()
+        if stats["handled"] + stats["collapsed"] + stats["dropped"] + stats["rejected"] >= submitted and not stats["queued"]:
+            return stats
+        threading.Event().wait(0.01)
+    raise AssertionError(f"dispatcher did not drain: {dispatcher.stats()}")
+
+
+def _wait_picked_up(dispatcher):
+    while dispatcher.stats()["queued"]:
+        threading.Event().wait(0.005)
+
+
+def test_telemetry_collapses_to_latest_value_while_lane_is_busy():
+    dispatcher = EventDispatcher(workers=2)
+    release = threading.Event()
+    seen = []
+
+    def handler(value):
+        release.wait(5)
+        seen.append(value)
+
+    try:
+        dispatcher.submit("pv_power", handler, 0)
+        _wait_picked_up(dispatcher)
+        for value in range(1, 10):
+            dispatcher.submit("pv_power", handler, value)
+        release.set()
+        stats = _wait_idle(dispatcher, 10)
+    finally:
+        dispatcher.stop()
+
+    # the first value was already running; everything queued behind it collapsed to the newest
+    assert seen == [0, 9]
+    assert stats["collapsed"] == 8
+    assert stats["errors"] == 0
+
+
+def test_control_lane_runs_in_order_without_overlap_and_counts_errors():
+    dispatcher = EventDispatcher(workers=4)
+    running, order, overlaps = [], [], []
+
+    def handler(key, value):
+        if running:
+            overlaps.append(key)
+        running.append(key)
+        threading.Event().wait(0.002)
+        order.append((key, value))
+        running.pop()
+        if value == "boom":
+            raise ValueError("boom")
+
+    submitted = [("tibber_price_now", 0.21), ("grid_charging_enabled", "True"), ("tibber_price_now", 0.22),
+                 ("ess_net_metering_enabled", "boom"), ("tibber_price_now", 0.23)]
+    try:
+        for key, value in submitted:
+            dispatcher.submit(key, handler, key, value)
+        stats = _wait_idle(dispatcher, len(submitted))
+    finally:
+        dispatcher.stop()
+
+    assert order == submitted
+    assert overlaps == []
+    assert stats["errors"] == 1 and stats["collapsed"] == 0
+
+
+def test_full_lane_drops_telemetry_but_never_a_command():
+    dispatcher = EventDispatcher(workers=1, max_lane_depth=2, command_wait_s=0.05)
+    release = threading.Event()
+    seen = []
+
+    def handler(key):
+        release.wait(5)
+        seen.append(key)
+
+    try:
+        dispatcher.submit("dryer_state", handler, "dryer_state")
+        _wait_picked_up(dispatcher)
+        submitted = ["batt_soc", "ac_out_power", "system_shutdown", "tesla_power", "grid_charging_enabled"]
+        assert all(dispatcher.submit(key, handler, key) for key in submitted)
+        # The lane now holds two commands: telemetry is dropped, another command waits, then is rejected.
+        assert not dispatcher.submit("ac_in_power", handler, "ac_in_power")
+        assert not dispatcher.submit("clear_ess_charge_schedule", handler, "clear_ess_charge_schedule")
+        release.set()
+        stats = _wait_idle(dispatcher, 8)
+    finally:
+        dispatcher.stop()
+
+    assert seen == ["dryer_state", "system_shutdown", "grid_charging_enabled"]
+    assert (stats["dropped"], stats["rejected"], stats["max_queued"]) == (4, 1, 2)
+
+
+def test_command_waiting_for_room_is_queued_once_the_lane_drains():
+    dispatcher = EventDispatcher(workers=1, max_lane_depth=1, command_wait_s=5.0)
+    release = threading.Event()
+    seen = []
+
+    def handler(key):
+        release.wait(5)
+        seen.append(key)
+
+    try:
+        dispatcher.submit("dryer_state", handler, "dryer_state")
+        _wait_picked_up(dispatcher)
+        dispatcher.submit("system_shutdown", handler, "system_shutdown")
+        threading.Timer(0.05, release.set).start()
+        assert dispatcher.submit("grid_charging_enabled", handler, "grid_charging_enabled")
+        stats = _wait_idle(dispatcher, 3)
+    finally:
+        dispatcher.stop()
+
+    assert seen == ["dryer_state", "system_shutdown", "grid_charging_enabled"]
+    assert (stats["dropped"], stats["rejected"]) == (0, 0)
+
+
+def test_collapsed_telemetry_runs_after_messages_that_arrived_before_it():
+    dispatcher = EventDispatcher(workers=1)
+    release = threading.Event()
+    seen = []
+
+    def handler(key, value):
+        release.wait(5)
+        seen.append((key, value))
+
+    try:
+        dispatcher.submit("dryer_state", handler, "dryer_state", "running")
+        _wait_picked_up(dispatcher)
+        dispatcher.submit("batt_soc", handler, "batt_soc", 50.0)
+        dispatcher.submit("grid_charging_enabled", handler, "grid_charging_enabled", "True")
+        dispatcher.submit("batt_soc", handler, "batt_soc", 51.0)
+        release.set()
+        stats = _wait_idle(dispatcher, 4)
+    finally:
+        dispatcher.stop()
+
+    assert seen == [("dryer_state", "running"), ("grid_charging_enabled", "True"), ("batt_soc", 51.0)]
+    assert stats["collapsed"] == 1
+
+
+def test_zero_workers_runs_inline():
+    dispatcher = EventDispatcher(workers=0)
+    seen = []
+
+    dispatcher.submit("batt_soc", seen.append, 55.0)
+
+    assert seen == [55.0]
+    assert dispatcher.stats()["handled"] == 1
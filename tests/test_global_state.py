@@ -0,0 +1,141 @@
+import sqlite3
+
+import pytest
+
+import lib.global_state as global_state
+
+
+@pytest.fixture
+def published(monkeypatch):
+    calls = []
+    monkeypatch.setattr(global_state, "publish_message",
+                        lambda topic, message=None, retain=False: calls.append((topic, message, retain)))
+    return calls
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(global_state, "_STORE", global_state.StateStore())
+    monkeypatch.setattr(global_state, "_PUBLISHER", global_state.StatePublisher())
+    monkeypatch.setattr(global_state, "SNAPSHOT_INTERVAL_S", 3600.0)
+    db = global_state.GlobalStateDatabase(db_path=str(tmp_path / "state.db"))
+    yield db
+    db.close()
+
+
+def _snapshot_rows(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT key,value FROM data").fetchall())
+
+
+def test_get_keeps_type_coercion_and_set_mirrors_to_mqtt(store, published):
+    state = global_state.GlobalStateClient()
+    state.set("batt_soc", 61.23456)
+    state.set("grid_charging_enabled", True)
+    state.set("ai_grid_assist", "off")
+    state.set("ac_out_power", 1200)
+
+    assert state.get("batt_soc") == 61.2346
+    assert state.get("grid_charging_enabled") is True
+    assert state.get("ai_grid_assist") == "off"
+    assert state.get("ac_out_power") == 1200
+    assert state.get("missing") == 0
+    assert state.has("batt_soc") and not state.has("missing")
+    assert ("Cerbomoticzgx/GlobalState/batt_soc", "61.2346", True) in published
+    assert len(published) == 4
+
+
+def test_snapshot_writes_behind_for_other_processes(store, published):
+    state = global_state.GlobalStateClient()
+    state.set("batt_soc", 55.5)
+    assert _snapshot_rows(store.db_path) == {}
+
+    store.flush()
+    assert _snapshot_rows(store.db_path) == {"batt_soc": "55.5"}
+
+    # A process without its own store reads the snapshot with the same coercion.
+    global_state._STORE.primary = False
+    assert state.get("batt_soc") == 55.5
+
+
+def test_writes_from_another_process_reach_the_live_store(store, published):
+    state = global_state.GlobalStateClient()
+    state.set("ev_charge_requested", False)
+    store.flush()
+
+    # e.g. the dashboard running as a sidecar process
+    global_state._STORE.primary = False
+    state.set("ev_charge_requested", True)
+    global_state._STORE.primary = True
+    assert state.get("ev_charge_requested") is False
+
+    store.flush()
+    assert state.get("ev_charge_requested") is True
+    assert _snapshot_rows(store.db_path) == {"ev_charge_requested": "True"}
+
+
+def test_local_set_after_another_process_write_republishes_the_old_value(store, published):
+    state = global_state.GlobalStateClient()
+    state.set("ev_charge_requested", False)
+
+    global_state._STORE.primary = False
+    state.set("ev_charge_requested", True)
+    global_state._STORE.primary = True
+    store.flush()
+
+    state.set("ev_charge_requested", False)
+    assert [message for _, message, _ in published] == ["False", "True", "False"]
+    assert state.get("ev_charge_requested") is False
+
+
+def test_import_from_file_loads_the_in_process_store(store, published, tmp_path):
+    saved = str(tmp_path / "saved.db")
+    with sqlite3.connect(saved) as conn:
+        conn.execute("CREATE TABLE data (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO data VALUES ('ev_charge_requested', 'True')")
+
+    store.import_from_file(saved)
+
+    state = global_state.GlobalStateClient()
+    assert state.get("ev_charge_requested") is True
+
+    # The imported file has no inbox table; the snapshot writer must keep working.
+    state.set("batt_soc", 55.5)
+    store.flush()
+    assert _snapshot_rows(store.db_path) == {"ev_charge_requested": "True", "batt_soc": "55.5"}
+
+
+def test_set_publishes_only_changed_values(store, published):
+    state = global_state.GlobalStateClient()
+    for value in (1200, 1200, 1200, 1300):
+        state.set("ac_out_power", value)
+
+    assert [message for _, message, _ in published] == ["1200", "1300"]
+    stats = global_state.publish_stats()
+    assert (stats["sent"], stats["suppressed_unchanged"]) == (2, 2)
+
+
+def test_rapid_updates_coalesce_per_key_except_control_keys(store, published, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(global_state.time, "monotonic", lambda: clock[0])
+    store.configure_publishing(interval=5.0, overrides={"batt_power": 1.0})
+    state = global_state.GlobalStateClient()
+
+    for watts in (100, 200, 300):
+        state.set("pv_power", watts)
+        state.set("ai_mode", f"mode{watts}")
+    state.set("batt_power", -50)
+    state.set("batt_power", -60)
+    assert [m for t, m, _ in published if t.endswith("/pv_power")] == ["100"]
+    assert [m for t, m, _ in published if t.endswith("/ai_mode")] == ["mode100", "mode200", "mode300"]
+
+    clock[0] += 1.0
+    store.flush()
+    assert [m for t, m, _ in published if t.endswith("/batt_power")] == ["-50", "-60"]
+    assert [m for t, m, _ in published if t.endswith("/pv_power")] == ["100"]
+
+    clock[0] += 4.0
+    store.flush()
+    assert [m for t, m, _ in published if t.endswith("/pv_power")] == ["100", "300"]
+    stats = global_state.publish_stats()
+    assert (stats["suppressed_coalesced"], stats["pending"]) == (1, 0)
@@ -6,7 +6,7 @@ on an environment that hasn't installed it yet, which mirrors how the store degr
 in production (no DuckDB -> never compacts -> pure NDJSON, nothing lost).
 """
 import json
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 
 import pytest
@@ -56,6 +56,139 @@ def test_append_writes_ndjson_line(tmp_path):
     assert [r.get("kind") for r in recs] == ["cycle", "settlement"]
 
 
+def test_writer_keeps_one_handle_per_day_and_rolls_over(tmp_path):
+    w = hs.HistoryWriter(str(tmp_path), fsync_interval=0)
+    assert w.write({"ts": "a", "soc": 1.5}, date(2026, 6, 15)) == (0, len(hs._encode({"ts": "a", "soc": 1.5})))
+    before, after = w.write({"ts": "b"}, "2026-06-15")
+    assert after == (tmp_path / "ess-2026-06-15.ndjson").stat().st_size and after > before
+    w.write({"ts": "c"}, "2026-06-16")
+    w.close()
+    stats = w.stats()
+    assert (stats["opens"], stats["rollovers"], stats["fsyncs"], stats["records"]) == (2, 1, 3, 3)
+    assert [r["ts"] for r in hs.read_day("2026-06-15", str(tmp_path))] == ["a", "b"]
+    assert [r["ts"] for r in hs.read_day("2026-06-16", str(tmp_path))] == ["c"]
+
+
+def test_writer_fsync_interval_batches_syncs(tmp_path):
+    w = hs.HistoryWriter(str(tmp_path), fsync_interval=3600)
+    for i in range(5):
+        w.write({"ts": str(i)}, "2026-06-15")
+    assert w.stats()["fsyncs"] == 1         # first write; the rest wait for the interval
+    w.close()
+    assert w.stats()["fsyncs"] == 2         # close syncs what's pending
+    assert hs.HistoryWriter(str(tmp_path), fsync_interval=None).write({"ts": "x"}, "2026-06-15")[0] > 0
+
+
+def test_writer_reopens_a_day_file_replaced_underneath(tmp_path):
+    w = hs.HistoryWriter(str(tmp_path), fsync_interval=None)
+    w.write({"ts": "a"}, "2026-06-15")
+    (tmp_path / "ess-2026-06-15.ndjson").unlink()
+    w.write({"ts": "b"}, "2026-06-15")
+    w.close()
+    assert [r["ts"] for r in hs.read_day("2026-06-15", str(tmp_path))] == ["b"]
+    assert w.stats()["opens"] == 2
+
+
+def test_encoded_lines_read_back_like_json_dumps():
+    for rec in ({"ts": "t", "soc": 55.123456789, "n": 3, "ok": True, "none": None, "s": "é"},
+                {"ts": "t", "bad": float("nan")}, {"ts": "t", "nested": {"a": [1, 2.5]}},
+                {"ts": "t", "big": 2 ** 70}):
+        line = hs._encode(rec)
+        assert line.endswith(b"\n") and line.count(b"\n") == 1
+        assert json.dumps(json.loads(line)) == json.dumps(rec)
+
+    # Whichever encoder runs, a value json.dumps rejects is rejected.
+    for rec in ({"ts": datetime(2026, 6, 15, 12, 0)}, {"ts": "t", "when": date(2026, 6, 15)}):
+        with pytest.raises(TypeError):
+            hs._encode(rec)
+    assert json.loads(hs._encode({1: "a", "ts": "t"})) == {"1": "a", "ts": "t"}
+
+
+def test_read_day_serves_repeat_reads_from_cache_until_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(hs, "_DAY_CACHE", hs._DayCache())
+    parses = []
+    real_parse = hs._parse_ndjson
+    monkeypatch.setattr(hs, "_parse_ndjson", lambda path: parses.append(path) or real_parse(path))
+    p = _write_day(tmp_path, "2026-06-15", [{"kind": "cycle", "ts": "a"}])
+    with p.open("a", encoding="utf-8") as fh:
+        fh.write('{"kind": "cycle", "ts": "b"')                       # torn trailing line
+
+    assert [r["ts"] for r in hs.read_day("2026-06-15", str(tmp_path))] == ["a"]
+    first = hs.read_day("2026-06-15", str(tmp_path))
+    first.append({"ts": "caller-owned list"})
+    assert [r["ts"] for r in hs.read_day("2026-06-15", str(tmp_path))] == ["a"]
+    assert len(parses) == 1
+
+    with p.open("a", encoding="utf-8") as fh:
+        fh.write('}\n')                                                # the line completes
+    assert [r["ts"] for r in hs.read_day("2026-06-15", str(tmp_path))] == ["a", "b"]
+    assert len(parses) == 2
+    stats = hs.day_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["days"]) == (2, 2, 1)
+    assert stats["bytes"] == p.stat().st_size
+
+
+def test_day_cache_evicts_least_recently_used_day():
+    cache = hs._DayCache(max_days=2, max_bytes=100)
+    cache.put("a", 1, ["a"], 10)
+    cache.put("b", 1, ["b"], 10)
+    assert cache.get("a", 1) == ["a"]
+    cache.put("c", 1, ["c"], 10)
+    assert cache.get("b", 1) is None
+    cache.put("big", 1, ["big"], 95)
+    assert cache.stats()["days"] == 1 and cache.stats()["bytes"] == 95
+    assert cache.get("a", 2) is None                                    # stale stamp never served
+
+
+def test_ndjson_tail_parses_only_appended_lines_and_completes_torn_line(tmp_path, monkeypatch):
+    p = _write_day(tmp_path, "2026-06-15", [{"ts": "a"}, {"ts": "b"}])
+    tail = hs._NdjsonTail(str(p))
+    assert [r["ts"] for r in tail.read()] == ["a", "b"]
+
+    parsed = []
+    real_parse = hs._parse_lines
+    monkeypatch.setattr(hs, "_parse_lines", lambda data: parsed.append(data) or real_parse(data))
+    with p.open("a", encoding="utf-8") as fh:
+        fh.write('{"ts": "c"}\n{"ts": "d", "soc"')
+    assert [r["ts"] for r in tail.read()] == ["a", "b", "c"]
+    assert parsed == [b'{"ts": "c"}\n', b'{"ts": "d", "soc"']
+
+    with p.open("a", encoding="utf-8") as fh:
+        fh.write(': 1}\n')
+    assert [r["ts"] for r in tail.read()] == ["a", "b", "c", "d"]
+    assert tail.offset == p.stat().st_size
+
+
+def test_ndjson_tail_starts_over_when_file_is_truncated_or_replaced(tmp_path):
+    p = _write_day(tmp_path, "2026-06-15", [{"ts": "a"}, {"ts": "b"}])
+    tail = hs._NdjsonTail(str(p))
+    tail.read()
+
+    p.write_text('{"ts": "x"}\n', encoding="utf-8")                  # truncated in place
+    assert [r["ts"] for r in tail.read()] == ["x"]
+
+    p.write_text('{"ts": "y"}\n{"ts": "z"}\n{"ts": "zz"}\n', encoding="utf-8")   # rewritten, longer
+    assert [r["ts"] for r in tail.read()] == ["y", "z", "zz"]
+
+    fresh = tmp_path / "replacement"
+    fresh.write_text('{"ts": "new"}\n', encoding="utf-8")
+    fresh.replace(p)                                                   # atomically replaced
+    assert [r["ts"] for r in tail.read()] == ["new"]
+
+
+def test_read_day_reads_today_through_the_tail_cursor(tmp_path, monkeypatch):
+    monkeypatch.setattr(hs, "_DAY_CACHE", hs._DayCache())
+    monkeypatch.setattr(hs, "_TAILS", {})
+    today = date.today()
+    hs.append(today, {"kind": "cycle", "ts": "t1"}, str(tmp_path))
+    assert len(hs.read_day(today, str(tmp_path))) == 1
+    hs.append(today, {"kind": "settlement", "ts": "t2"}, str(tmp_path))
+
+    assert [r["ts"] for r in hs.read_day(today, str(tmp_path))] == ["t1", "t2"]
+    (tail,) = hs._TAILS.values()
+    assert tail.offset == Path(hs.day_ndjson_path(today, str(tmp_path))).stat().st_size
+
+
 # --- Parquet cold path + compaction (DuckDB) -------------------------------
 
 def test_compact_month_roundtrips_and_lists_days(tmp_path):
@@ -89,6 +222,197 @@ def test_read_day_prefers_ndjson_over_parquet(tmp_path):
     assert len(recs) == 1 and recs[0]["ts"] == "new" and recs[0]["soc"] == 0.9
 
 
+def test_parquet_day_is_cached_until_the_month_is_recompacted(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    monkeypatch.setattr(hs, "_DAY_CACHE", hs._DayCache())
+    _write_day(tmp_path, "2026-05-10", [{"kind": "cycle", "ts": "2026-05-10T00:00:00", "soc": 0.4}])
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+
+    for _ in range(3):
+        assert hs.read_day("2026-05-10", str(tmp_path))[0]["soc"] == 0.4
+    assert hs.day_cache_stats()["hits"] == 2
+
+    _write_day(tmp_path, "2026-05-10", [{"kind": "cycle", "ts": "2026-05-10T00:15:00", "soc": 0.5}])
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    assert [r["soc"] for r in hs.read_day("2026-05-10", str(tmp_path))] == [0.4, 0.5]
+
+
+def test_parquet_reads_reuse_pooled_connections_and_drop_them_on_recompaction(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    monkeypatch.setattr(hs, "_DAY_CACHE", hs._DayCache(max_days=0))
+    monkeypatch.setattr(hs, "_PARQUET_META", hs._ParquetMetaCache())
+    monkeypatch.setattr(hs, "_POOL", hs._ReadPool(size=2))
+    _write_day(tmp_path, "2026-05-11", [{"kind": "cycle", "ts": "2026-05-11T00:00:00", "soc": 0.4}])
+    _write_day(tmp_path, "2026-05-12", [{"kind": "cycle", "ts": "2026-05-12T00:00:00", "soc": 0.6}])
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+
+    for _ in range(3):
+        assert hs.read_day("2026-05-11", str(tmp_path))[0]["soc"] == 0.4
+    assert hs.available_days(str(tmp_path)) == hs.available_days(str(tmp_path)) == ["2026-05-11", "2026-05-12"]
+    stats = hs.duckdb_pool_stats()
+    assert stats["opened"] == 1 and stats["reused"] == 2 and stats["in_use"] == 0
+    assert stats["metadata_misses"] == 0        # days came from the month manifest
+
+    _write_day(tmp_path, "2026-05-13", [{"kind": "cycle", "ts": "2026-05-13T00:00:00", "soc": 0.8}])
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    assert hs.read_day("2026-05-13", str(tmp_path))[0]["soc"] == 0.8
+    assert hs.available_days(str(tmp_path))[-1] == "2026-05-13"
+    assert hs.duckdb_pool_stats()["recycles"] == 1
+
+
+def test_typed_parquet_roundtrips_awkward_records_and_exposes_typed_columns(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    recs = [
+        {"ts": "2026-05-04T10:00:00", "kind": "cycle", "soc": 55.5, "pv_w": 1800.0, "load_w": None,
+         "applied_setpoint_w": -1500, "limit_feed_in": True, "new_field": {"nested": [1, 2]}},
+        {"ts": "2026-05-04T10:00:05", "kind": "settlement", "slot_start": "2026-05-04T09:45:00",
+         "incomplete": False, "actual_pv_kwh": 0.45, "mode": 3},
+        {"slot_start": "2026-05-04T10:15:00", "kind": None},
+        # -0.0 must not dedupe into 0.0, and integers past 64 bits must stay integers.
+        {"ts": "2026-05-04T10:20:00", "kind": "cycle", "soc": 0.0, "grid_w": 2 ** 64, "big": 10 ** 30},
+        {"ts": "2026-05-04T10:20:00", "kind": "cycle", "soc": -0.0, "grid_w": 2 ** 64, "big": 10 ** 30},
+    ]
+    _write_day(tmp_path, "2026-05-04", recs)
+    path = hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+
+    day = hs.read_day("2026-05-04", str(tmp_path))
+    assert day == recs
+    assert [str(r.get("soc")) for r in day[3:]] == ["0.0", "-0.0"]
+    assert all(type(r["grid_w"]) is int and type(r["big"]) is int for r in day[3:])
+    assert hs.parquet_schema_version(path) == hs.PARQUET_SCHEMA_VERSION
+    con = duckdb.connect()
+    assert con.execute(f"SELECT pv_w, applied_setpoint_w, limit_feed_in FROM read_parquet('{path}') "
+                       "WHERE pv_w > 1000").fetchall() == [(1800.0, None, True)]
+
+
+def test_sql_encoder_matches_the_reference_row_encoder():
+    duckdb = pytest.importorskip("duckdb")
+    recs = [
+        {"ts": "2026-05-04T10:00:00", "kind": "cycle", "soc": 55.5, "pv_w": 1800, "load_w": None,
+         "limit_feed_in": True, "mode": 3, "new_field": {"nested": [1, 2]}},
+        {"slot_start": "2026-05-04T10:15:00", "kind": None, "actual_pv_kwh": -0.0, "soc_end": 1e-7},
+        {"ts": "", "grid_w": 2 ** 64 + 1, "batt_w": 18446744073709551615, "extra_big": -(10 ** 25)},
+    ]
+    con = duckdb.connect()
+    con.execute("CREATE TABLE lines(day VARCHAR, src INTEGER, n BIGINT, line VARCHAR)")
+    con.executemany("INSERT INTO lines VALUES ('2026-05-04', 1, ?, ?)",
+                    [(n, json.dumps(r)) for n, r in enumerate(recs)])
+    cur = con.execute(hs._compact_encode_sql("SELECT * FROM lines") + " ORDER BY n")
+    names = [d[0] for d in cur.description]
+    rows = [dict(zip(names, row)) for row in cur.fetchall()]
+    typed = [name for name, _t in hs.TYPED_FIELDS]
+
+    for rec, row in zip(recs, rows):
+        expected = hs._encode_row("2026-05-04", rec)
+        # Same typed columns (an explicit null may be carried in ``extra`` instead of the mask).
+        assert [str(row[name]) for name in ["day", "ts", "kind"] + typed] == [str(v) for v in expected[1:-2]]
+        assert json.dumps(hs._decode_row(row), sort_keys=True) == json.dumps(rec, sort_keys=True)
+
+
+def test_line_layout_parquet_is_read_and_migrated(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    recs = [{"ts": "2026-04-02T00:00:00", "kind": "cycle", "pv_w": 0.0, "soc": 41},
+            {"ts": "2026-04-02T00:00:05", "kind": "settlement", "actual_net_eur": None}]
+    path = hs.month_parquet_path(2026, 4, str(tmp_path))
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t(day VARCHAR, ts VARCHAR, kind VARCHAR, line VARCHAR)")
+    con.executemany("INSERT INTO t VALUES (?,?,?,?)",
+                    [("2026-04-02", r["ts"], r["kind"], json.dumps(r)) for r in recs])
+    con.execute(f"COPY t TO '{path}' (FORMAT PARQUET)")
+    con.close()
+
+    assert hs.parquet_schema_version(path) == 1
+    assert hs.read_day("2026-04-02", str(tmp_path)) == recs
+
+    assert hs.migrate_parquet_months(str(tmp_path)) == [path]
+    assert hs.parquet_schema_version(path) == hs.PARQUET_SCHEMA_VERSION
+    assert hs.read_day("2026-04-02", str(tmp_path)) == recs
+    assert hs.migrate_parquet_months(str(tmp_path)) == []
+
+
+def test_query_returns_columns_for_ndjson_days_in_range(tmp_path):
+    _write_day(tmp_path, "2026-06-01", [{"kind": "cycle", "ts": "2026-06-01T00:15:00", "pv_w": 1.0},
+                                        {"ts": "2026-06-01T00:00:00", "pv_w": 0.0}])
+    _write_day(tmp_path, "2026-06-02", [{"kind": "settlement", "ts": "2026-06-02T00:00:00", "pv_w": 9.0}])
+    _write_day(tmp_path, "2026-06-03", [{"kind": "cycle", "ts": "2026-06-03T00:00:00", "pv_w": 3.0}])
+
+    out = hs.query("2026-06-01", date(2026, 6, 2), kinds=("cycle",), columns=("pv_w", "mode"),
+                   hist_dir=str(tmp_path))
+    assert out == {"day": ["2026-06-01", "2026-06-01"],
+                   "ts": ["2026-06-01T00:00:00", "2026-06-01T00:15:00"],
+                   "kind": ["cycle", "cycle"], "pv_w": [0.0, 1.0], "mode": [None, None]}
+
+
+def test_query_spans_typed_and_line_parquet_months_and_hot_days(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    # April: the v1 line layout.
+    april = [{"ts": "2026-04-30T23:45:00", "kind": "cycle", "pv_w": 4.0, "mode": "idle"}]
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t(day VARCHAR, ts VARCHAR, kind VARCHAR, line VARCHAR)")
+    con.executemany("INSERT INTO t VALUES (?,?,?,?)",
+                    [("2026-04-30", r["ts"], r["kind"], json.dumps(r)) for r in april])
+    con.execute(f"COPY t TO '{hs.month_parquet_path(2026, 4, str(tmp_path))}' (FORMAT PARQUET)")
+    con.close()
+    # May: typed v2, with an int in a DOUBLE field and an untyped field (both land in extra).
+    _write_day(tmp_path, "2026-05-01", [{"ts": "2026-05-01T00:00:00", "kind": "cycle", "pv_w": 5, "mode": "charge"},
+                                        {"ts": "2026-05-01T00:00:05", "kind": "settlement", "pv_w": 9.0}])
+    _write_day(tmp_path, "2026-05-02", [{"ts": "2026-05-02T00:00:00", "kind": "cycle", "pv_w": 6.5}])
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    # A fresher hot file for May 2nd wins over its Parquet rows.
+    _write_day(tmp_path, "2026-05-02", [{"ts": "2026-05-02T00:00:00", "kind": "cycle", "pv_w": 7.5}])
+
+    out = hs.query("2026-04-01", "2026-05-31", kinds=["cycle"], columns=["pv_w", "mode"],
+                   hist_dir=str(tmp_path))
+    assert out["day"] == ["2026-04-30", "2026-05-01", "2026-05-02"]
+    assert out["pv_w"] == [4.0, 5, 7.5]
+    assert out["mode"] == ["idle", "charge", None]
+    assert hs.query("2026-05-01", "2026-05-01", hist_dir=str(tmp_path))["kind"] == ["cycle", "settlement"]
+
+
+def test_compact_month_writes_manifest_that_answers_day_and_latest_ts_lookups(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    _write_day(tmp_path, "2026-05-20", [
+        {"kind": "cycle", "ts": "2026-05-20T00:00:00", "day_import_cost": 3.1},    # yesterday's counter
+        {"kind": "cycle", "ts": "2026-05-20T23:45:00", "day_import_cost": 1.25, "day_export_kwh": 4},
+        {"kind": "settlement", "ts": "2026-05-20T23:59:00", "day_import_cost": 9.0},
+    ])
+    _write_day(tmp_path, "2026-05-21", [{"slot_start": "2026-05-21T00:15:00"}])
+    path = hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+
+    manifest = hs.month_manifest(path)
+    assert manifest["rows"] == 4 and manifest["parquet_bytes"] == Path(path).stat().st_size
+    day = manifest["days"]["2026-05-20"]
+    assert day["rows"] == 3 and day["kinds"] == {"cycle": 2, "settlement": 1}
+    assert (day["min_ts"], day["max_ts"]) == ("2026-05-20T00:00:00", "2026-05-20T23:59:00")
+    assert day["totals"] == {"day_import_cost": 1.25, "day_export_kwh": 4}
+
+    def _no_scan(*_a, **_k):
+        raise AssertionError("Parquet was scanned")
+    monkeypatch.setattr(hs, "_read_parquet_day", _no_scan)
+    monkeypatch.setattr(hs._ParquetMetaCache, "get", _no_scan)
+    assert hs.available_days(str(tmp_path)) == ["2026-05-20", "2026-05-21"]
+    assert hs.latest_ts(str(tmp_path)) == "2026-05-21T00:15:00"
+    assert hs.store_status(str(tmp_path))["months_without_manifest"] == []
+
+
+def test_stale_or_missing_manifest_falls_back_to_the_parquet(tmp_path):
+    pytest.importorskip("duckdb")
+    _write_day(tmp_path, "2026-05-22", [{"kind": "cycle", "ts": "2026-05-22T08:00:00"}])
+    path = hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    manifest_path = Path(hs.month_manifest_path(2026, 5, str(tmp_path)))
+    stale = json.loads(manifest_path.read_text())
+    stale["parquet_bytes"] += 1
+    manifest_path.write_text(json.dumps(stale))
+
+    assert hs.month_manifest(path) is None
+    assert hs.available_days(str(tmp_path)) == ["2026-05-22"]
+    assert hs.store_status(str(tmp_path))["months_without_manifest"] == ["2026-05"]
+
+    assert hs.write_month_manifests(str(tmp_path)) == [str(manifest_path)]
+    assert hs.month_manifest(path)["days"]["2026-05-22"]["max_ts"] == "2026-05-22T08:00:00"
+    assert hs.write_month_manifests(str(tmp_path)) == []
+
+
 def test_compact_month_no_files_returns_none(tmp_path):
     pytest.importorskip("duckdb")
     assert hs.compact_month(2020, 1, str(tmp_path)) is None
@@ -105,6 +429,41 @@ def test_compact_month_is_idempotent_and_preserves_prior_parquet(tmp_path):
     assert hs.read_day("2026-05-10", str(tmp_path))[0]["soc"] == 0.4
 
 
+def test_compact_month_skips_torn_lines_and_dedupes_in_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    recs = [{"kind": "cycle", "ts": "2026-05-12T00:01:00", "soc": 41.0, "mode": "idle"},
+            {"kind": "settlement", "ts": "2026-05-12T00:00:05", "slot_start": "2026-05-11T23:45:00",
+             "actual_net_eur": 3, "incomplete": None, "notes": {"a": [1, 2]}},
+            {"ts": 5, "soc": float("nan"), "pv_w": True, "load_w": "n/a"},
+            {"kind": "", "day_import_kwh": 1.5, "day_export_kwh": 2}]
+    p = _write_day(tmp_path, "2026-05-12", recs + [recs[0]])
+    p.write_text(p.read_text() + "\n   \n[1, 2]\n\"x\"\n" + json.dumps(recs[1]) + "\n{\"ts\": \"2026-05-")
+
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    got = hs.read_day("2026-05-12", str(tmp_path))
+    canon = lambda rows: sorted(json.dumps(r, sort_keys=True) for r in rows)  # noqa: E731
+    assert canon(got) == canon(recs)
+    # Sorted by (day, ts); a non-string ts is keyed on its JSON text.
+    assert hs.query("2026-05-12", "2026-05-12", columns=("soc",), hist_dir=str(tmp_path))["ts"] == [
+        "", "2026-05-12T00:00:05", "2026-05-12T00:01:00", "5"]
+    manifest = hs.month_manifest(hs.month_parquet_path(2026, 5, str(tmp_path)))
+    assert manifest["days"]["2026-05-12"]["rows"] == 4
+    assert manifest["days"]["2026-05-12"]["totals"] == {"day_import_kwh": 1.5, "day_export_kwh": 2}
+
+
+def test_compact_month_tolerates_a_line_torn_inside_a_multibyte_character(tmp_path):
+    pytest.importorskip("duckdb")
+    recs = [{"ts": "2026-05-12T00:01:00", "kind": "cycle", "reason_code": "prijs € laag"},
+            {"ts": "2026-05-12T00:02:00", "kind": "cycle", "soc": 40.0}]
+    _write_day(tmp_path, "2026-05-13", [recs[0]])
+    torn = _write_day(tmp_path, "2026-05-12", recs)
+    torn.write_bytes(torn.read_bytes() + '{"ts": "2026-05-12T00:03:00", "mode": "€'.encode("utf-8")[:-1])
+
+    assert hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True) is not None
+    assert hs.read_day("2026-05-12", str(tmp_path)) == recs
+    assert hs.read_day("2026-05-13", str(tmp_path)) == [recs[0]]
+
+
 def test_backfill_compacts_past_months_only(tmp_path):
     pytest.importorskip("duckdb")
     _write_day(tmp_path, "2026-04-10", [{"kind": "cycle", "ts": "2026-04-10T00:00:00"}])
@@ -0,0 +1,93 @@
+import importlib
+import json
+import sys
+import types
+
+import lib
+import lib.clients.mqtt_client_factory as mqtt_client_factory
+import lib.domoticz_updater as domoticz_updater
+from lib.constants import Topics, DzEndpoints, mqtt_msg_value_conversion
+from lib.event_dispatcher import EventDispatcher
+
+
+def _load_event_handler(monkeypatch):
+    """lib.event_handler with the control modules it imports stubbed out."""
+    stubs = {
+        "lib.victron_integration": ("regulate_battery_max_voltage", "ac_power_setpoint"),
+        "lib.energy_broker": ("manage_sale_of_stored_energy_to_the_grid", "set_charging_schedule",
+                              "clear_victron_schedules", "manage_grid_usage_based_on_current_price",
+                              "_apply_grid_assist_setpoint"),
+        "lib.event_handler_appliances": ("handle_dryer_event", "handle_dishwasher_event"),
+    }
+    for name, attrs in stubs.items():
+        module = types.ModuleType(name)
+        for attr in attrs:
+            setattr(module, attr, lambda *args, **kwargs: None)
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, "lib.event_handler", raising=False)
+    monkeypatch.setattr(lib, "event_handler", None, raising=False)   # undone after the test
+    module = importlib.import_module("lib.event_handler")
+    monkeypatch.delitem(sys.modules, "lib.event_handler")
+    return module
+
+
+def _routed_client(monkeypatch):
+    event_handler = _load_event_handler(monkeypatch)
+    handled, recorded, pushed = [], [], []
+    monkeypatch.setattr(event_handler.Event, "batt_soc", lambda self, value: handled.append(("batt_soc", value)))
+    monkeypatch.setattr(mqtt_client_factory, "domoticz_push",
+                        lambda endpoint, converter, value, logmsg, topic: pushed.append((endpoint, converter, topic)))
+
+    events = event_handler.Event()
+    events.gs_client = types.SimpleNamespace(set=lambda key, value: recorded.append((key, value)))
+    client = object.__new__(mqtt_client_factory.VictronClient)     # no broker connection
+    client.events, client.routes = events, events.routes()
+    client.dispatcher = EventDispatcher(workers=0)
+    return client, handled, recorded, pushed
+
+
+def _message(topic, value):
+    return types.SimpleNamespace(topic=topic, payload=json.dumps({"value": value}).encode("utf-8"))
+
+
+def test_topic_reaches_its_handler_domoticz_endpoint_and_converter(monkeypatch):
+    client, handled, recorded, pushed = _routed_client(monkeypatch)
+    topic = Topics["system0"]["batt_soc"]
+
+    client._on_message(None, None, _message(topic, 61.23456))
+
+    assert handled == [("batt_soc", 61.23456)]
+    assert recorded == [("batt_soc", 61.23456)]
+    assert pushed == [(DzEndpoints["system0"][topic], mqtt_msg_value_conversion["batt_soc"], topic)]
+
+
+def test_topic_without_handler_or_endpoint_is_only_recorded(monkeypatch):
+    client, handled, recorded, pushed = _routed_client(monkeypatch)
+    key, topic = next((key, topic) for key, topic in Topics["system0"].items()
+                      if not hasattr(client.events, key) and topic not in DzEndpoints["system0"])
+
+    client._on_message(None, None, _message(topic, 1))
+
+    assert client.routes[topic].handler is None
+    assert (handled, recorded, pushed) == ([], [(key, 1)], [])
+
+
+def test_unknown_topic_is_ignored(monkeypatch):
+    client, handled, recorded, pushed = _routed_client(monkeypatch)
+
+    client._on_message(None, None, _message("N/unknown/system/0/Nothing", 1))
+
+    assert (handled, recorded, pushed) == ([], [], [])
+    assert client.dispatcher.stats()["submitted"] == 0
+
+
+def test_domoticz_update_resolves_endpoint_and_converter_by_topic(monkeypatch):
+    pushed = []
+    monkeypatch.setattr(domoticz_updater, "domoticz_push",
+                        lambda endpoint, converter, value, logmsg, topic: pushed.append((endpoint, converter, value)))
+    topic = Topics["system0"]["pv_power"]
+
+    domoticz_updater.domoticz_update(topic, 1234.4, "pv: 1234.4")
+    domoticz_updater.domoticz_update("N/unknown/system/0/Nothing", 1, "unknown: 1")
+
+    assert pushed == [(DzEndpoints["system0"][topic], mqtt_msg_value_conversion["pv_power"], 1234.4)]
@@ -0,0 +1,67 @@
+"""Tests for the immutable, pre-indexed Tibber price horizon."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from lib.price_horizon import PriceHorizon
+
+CET = timezone(timedelta(hours=2))
+START = datetime(2026, 6, 13, 0, 0, tzinfo=CET)
+
+
+def _points(count=192, step_min=15):
+    return [{"start": (START + timedelta(minutes=step_min * i)).isoformat(),
+             "total": round(0.30 - 0.001 * ((i * 37) % 91), 4), "level": f"L{i % 3}"}
+            for i in range(count)]
+
+
+def test_horizon_parses_sorts_ranks_and_partitions_days():
+    points = _points()
+    shuffled = points[5:] + points[:5] + [{"start": "garbage", "total": 1.0}, {"total": 0.1}]
+    h = PriceHorizon.from_points(shuffled)
+
+    assert len(h) == 192 and h.slot_seconds == 900
+    assert h.to_points() == points
+    assert [h.totals[i] for i in h.rank] == sorted(p["total"] for p in points)
+    assert h.days == (date(2026, 6, 13), date(2026, 6, 14))
+    assert h.day_range(date(2026, 6, 14)) == (96, 192)
+    assert h.day_range(date(2026, 6, 20)) == (0, 0)
+    day = h.day_rank(date(2026, 6, 13))
+    assert sorted(day) == list(range(96)) and [h.totals[i] for i in day] == sorted(h.totals[:96])
+    assert PriceHorizon.from_points(h) is h
+
+    # Days follow the zone they are partitioned in.
+    utc = PriceHorizon.from_points(points, zone=timezone.utc)
+    assert utc.day_range(date(2026, 6, 12)) == (0, 8)
+
+
+def test_slot_lookup_on_regular_and_irregular_grids():
+    h = PriceHorizon.from_points(_points(8))
+    assert h.index_at(START) == 0
+    assert h.index_at(START + timedelta(minutes=44, seconds=59)) == 2
+    assert h.price_at(START + timedelta(minutes=16)) == h.totals[1]
+    assert h.index_at(START - timedelta(seconds=1)) is None
+    assert h.index_at(START + timedelta(hours=2)) is None
+
+    gappy = PriceHorizon.from_points([p for i, p in enumerate(_points(8)) if i not in (3, 4)])
+    assert gappy.index_at(START + timedelta(minutes=50)) is None      # inside the gap
+    assert gappy.index_at(START + timedelta(minutes=80)) == 3          # the 5th quarter
+    assert PriceHorizon.from_points([]).index_at(START) is None
+
+
+def test_hourly_view_averages_quarters_and_is_built_once():
+    h = PriceHorizon.from_points(_points(8))
+    hourly = h.hourly()
+    assert hourly is h.hourly()
+    assert len(hourly) == 2 and hourly.slot_seconds == 3600
+    assert hourly.totals[0] == pytest.approx(sum(h.totals[:4]) / 4)
+    assert hourly.levels == (h.levels[0], h.levels[4])
+    assert hourly.hourly() is hourly
+
+
+def test_horizon_is_immutable():
+    h = PriceHorizon.from_points(_points(4))
+    with pytest.raises(AttributeError):
+        h.totals = ()
+    with pytest.raises(TypeError):
+        h.totals[0] = 1.0
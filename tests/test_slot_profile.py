@@ -0,0 +1,121 @@
+"""Tests for the rolling per-day slot profiles behind the optimizer's load/PV models."""
+import json
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from lib import history_store as hs
+from lib import slot_profile
+
+TODAY = date(2026, 6, 10)
+DAYLIGHT = (5, 22)
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    slot_profile.clear()
+    yield
+    slot_profile.clear()
+
+
+def _scan(hist_dir, days, metric, today=TODAY):
+    """The per-cycle history scan the profiles replace (energy_broker before slot_profile)."""
+    buckets = {}
+    for i in range(max(1, days)):
+        for r in hs.read_day(today - timedelta(days=i), hist_dir):
+            if r.get('kind') == 'settlement':
+                continue
+            ts = r.get('ts')
+            try:
+                if metric == 'load':
+                    load, batt = r.get('load_w'), r.get('batt_w')
+                    if load is None or ts is None:
+                        continue
+                    if batt is not None and abs(float(batt)) > 4000:
+                        continue
+                    when = datetime.fromisoformat(ts)
+                    value = float(load) / 1000.0
+                else:
+                    pv = r.get('pv_w')
+                    if pv is None or ts is None:
+                        continue
+                    when = datetime.fromisoformat(ts)
+                    if not (DAYLIGHT[0] <= when.hour < DAYLIGHT[1]):
+                        continue
+                    value = max(0.0, float(pv)) / 1000.0
+                key = f"{when.hour:02d}:{(when.minute // 15) * 15:02d}"
+                buckets.setdefault(key, []).append(value)
+            except (TypeError, ValueError):
+                continue
+    return {k: sum(v) / len(v) for k, v in buckets.items() if v}
+
+
+def _records(day, rnd):
+    t = datetime.combine(day, datetime.min.time())
+    out = []
+    while t.date() == day:
+        out.append({"ts": t.isoformat(), "kind": "cycle", "load_w": rnd.uniform(100, 3000),
+                    "batt_w": rnd.choice([None, rnd.uniform(-6000, 6000), "bad"]),
+                    "pv_w": rnd.choice([None, -3.0, rnd.uniform(0, 4000), "n/a"])})
+        if rnd.random() < 0.3:
+            out.append({"ts": t.isoformat(), "kind": "settlement", "load_w": 9e9, "pv_w": 9e9})
+        t += timedelta(minutes=rnd.choice([1, 4, 5, 7]))
+    out.append({"kind": "cycle", "load_w": 500.0})      # no ts
+    return out
+
+
+def _append(hist_dir, day, rec):
+    path = hist_dir / f"ess-{day.isoformat()}.ndjson"
+    with open(path, "a") as fh:
+        before = fh.tell()
+        fh.write(json.dumps(rec) + "\n")
+        after = fh.tell()
+    slot_profile.add_record(str(hist_dir), day.isoformat(), rec, before, after, daylight=DAYLIGHT)
+
+
+def test_profiles_maintained_on_append_match_the_history_scan_exactly(tmp_path):
+    rnd = random.Random(3)
+    for i in range(4):
+        day = TODAY - timedelta(days=i)
+        for rec in _records(day, rnd):
+            _append(tmp_path, day, rec)
+
+    for days in (1, 3, 7):
+        for metric in ("load", "pv"):
+            got = slot_profile.slot_means(str(tmp_path), days, metric, daylight=DAYLIGHT, today=TODAY)
+            assert got == _scan(str(tmp_path), days, metric)
+    assert (tmp_path / "profiles" / f"slots-{TODAY.isoformat()}.json").exists()
+
+    # Served from the persisted profiles in a fresh process, without re-reading history.
+    slot_profile.clear()
+    hs._DAY_CACHE.clear()
+    misses = hs.day_cache_stats()["misses"]
+    slot_profile.slot_means(str(tmp_path), 3, "load", daylight=DAYLIGHT, today=TODAY)
+    assert hs.day_cache_stats()["misses"] == misses
+
+
+def test_profile_is_rebuilt_when_history_changes_behind_its_back(tmp_path):
+    rnd = random.Random(8)
+    for rec in _records(TODAY, rnd)[:50]:
+        _append(tmp_path, TODAY, rec)
+    # A record written without add_record (another writer, a restore, ...).
+    with open(tmp_path / f"ess-{TODAY.isoformat()}.ndjson", "a") as fh:
+        fh.write(json.dumps({"ts": f"{TODAY.isoformat()}T12:01:00", "load_w": 7000.0, "pv_w": 1.0}) + "\n")
+    assert (slot_profile.slot_means(str(tmp_path), 1, "load", daylight=DAYLIGHT, today=TODAY)
+            == _scan(str(tmp_path), 1, "load"))
+    _append(tmp_path, TODAY, {"ts": f"{TODAY.isoformat()}T12:02:00", "load_w": 1.0, "pv_w": 2.0})
+    assert (slot_profile.slot_means(str(tmp_path), 1, "pv", daylight=DAYLIGHT, today=TODAY)
+            == _scan(str(tmp_path), 1, "pv"))
+
+
+def test_compacted_day_is_served_from_a_rebuilt_profile(tmp_path):
+    pytest.importorskip("duckdb")
+    day = date(2026, 5, 31)
+    for rec in _records(day, random.Random(4))[:80]:
+        _append(tmp_path, day, rec)
+    hs.compact_month(2026, 5, str(tmp_path), remove_ndjson=True)
+    got = slot_profile.slot_means(str(tmp_path), 1, "load", daylight=DAYLIGHT, today=day)
+    assert got and got == _scan(str(tmp_path), 1, "load", today=day)
+    profile = json.loads((tmp_path / "profiles" / "slots-2026-05-31.json").read_text())
+    assert profile["source"][0] == "ess-2026-05.parquet"
@@ -4,6 +4,7 @@ import types
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import pytest
 import requests
 
 
@@ -124,7 +125,7 @@ def test_quarter_hour_fetch_retries_and_caches(monkeypatch, tmp_path):
             raise requests.Timeout("temporary timeout")
         return _Resp()
 
-    monkeypatch.setattr(module.requests, "post", _post)
+    monkeypatch.setattr(module, "_http_session", lambda: types.SimpleNamespace(post=_post))
 
     result = module.get_all_price_points()
 
@@ -216,3 +217,194 @@ def test_after_publish_today_only_result_logs_truthful_warning(monkeypatch, tmp_
     assert calls == ["QUARTER_HOURLY", "HOURLY"]
     assert result == today_only
     assert "next-day quarter-hourly prices still unavailable" in caplog.text
+
+
+def test_publish_pricing_data_publishes_every_topic_from_one_fetch(monkeypatch, tmp_path):
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    points = [
+        {"start": (today_start + timedelta(minutes=15 * i)).isoformat(),
+         "total": round(0.10 + 0.01 * ((i // 4 * 7) % 24) + 0.001 * (i % 4), 4), "level": "NORMAL"}
+        for i in range(192)
+    ]
+    fetches = []
+    monkeypatch.setattr(module, "get_all_price_points", lambda: fetches.append(1) or points)
+    published = {}
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(
+        publish=lambda topic, payload=None, **_kw: published.__setitem__(topic, payload)))
+
+    module.publish_pricing_data("test")
+
+    assert len(fetches) == 1
+    hourly = [sum(p["total"] for p in points[h * 4:h * 4 + 4]) / 4 for h in range(48)]
+    cheapest = min(range(24), key=hourly.__getitem__)
+    assert published["Tibber/home/price_info/today/lowest/0/hour"] == f'{{"value": "{cheapest:02d}:00:00"}}'
+    assert published["Tibber/home/price_info/today/lowest/0/cost"] == f'{{"value": "{hourly[cheapest]}"}}'
+    assert published["Tibber/home/price_info/tomorrow/highest/0/cost"] == f'{{"value": "{max(hourly[24:])}"}}'
+    assert len([t for t in published if "/highest/" in t or "/lowest/" in t]) == 40
+    now = datetime.now(timezone.utc)
+    current = points[(now - today_start) // timedelta(minutes=15)]["total"]
+    assert published["Tibber/home/price_info/now/total"] == f'{{"value": "{current}"}}'
+
+
+def test_tomorrow_topics_read_not_yet_published_until_its_prices_arrive(monkeypatch, tmp_path):
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    horizon = module.PriceHorizon.from_points(_points(start=today_start, count=96), zone=timezone.utc)
+    published = {}
+    monkeypatch.setattr(module, "client", types.SimpleNamespace(
+        publish=lambda topic, payload=None, **_kw: published.__setitem__(topic, payload)))
+
+    module.mqtt_publish_lowest_price_points(horizon)
+    module.mqtt_publish_highest_price_points(horizon)
+
+    tomorrow = {t: v for t, v in published.items() if "/tomorrow/" in t}
+    assert len(tomorrow) == 16
+    assert set(tomorrow.values()) == {'{"value": "not_yet_published"}'}
+    assert len([t for t in published if "/today/" in t]) == 24
+    assert published["Tibber/home/price_info/today/lowest/0/hour"] != '{"value": "not_yet_published"}'
+
+
+def test_price_fetcher_serves_held_horizon_until_stale(monkeypatch, tmp_path):
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    today = module.PriceHorizon.from_points(_points(start=today_start, count=96), zone=timezone.utc)
+    both = module.PriceHorizon.from_points(_points(start=today_start, count=192), zone=timezone.utc)
+    clock = [0.0]
+    fetched = []
+    fetcher = module.PriceFetchCoordinator(fetch=lambda: fetched.append(1) or (both if len(fetched) > 2 else today),
+                                           retry_s=300.0, max_age_s=21600.0, clock=lambda: clock[0])
+    expected = [False]
+    monkeypatch.setattr(module, "_next_day_prices_expected", lambda _now=None: expected[0])
+
+    assert fetcher.get() is today and fetcher.get() is today
+    assert len(fetched) == 1
+
+    # After 13:05 a today-only horizon is refetched, at most every retry_s.
+    expected[0] = True
+    clock[0] = 299.0
+    assert fetcher.get() is today and len(fetched) == 1
+    clock[0] = 300.0
+    assert fetcher.get() is today and len(fetched) == 2
+    clock[0] = 600.0
+    assert fetcher.get() is both and len(fetched) == 3
+    clock[0] = 5000.0
+    assert fetcher.get() is both and len(fetched) == 3
+
+    stats = fetcher.stats()
+    assert (stats["requests"], stats["hits"], stats["fetches"], stats["slots"]) == (6, 3, 3, 192)
+
+    # A horizon whose last slot has elapsed is refetched on the next call.
+    past = module.PriceHorizon.from_points(_points(start=today_start - timedelta(days=1), count=4))
+    stale = module.PriceFetchCoordinator(fetch=lambda: fetched.append(1) or today, clock=lambda: clock[0])
+    stale._horizon, stale._fetched_at, stale._attempted_at = past, clock[0], clock[0]
+    assert stale.get() is today
+
+
+def test_price_fetcher_collapses_concurrent_callers_into_one_fetch(monkeypatch, tmp_path):
+    import threading
+
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    horizon = module.PriceHorizon.from_points(_points(count=8))
+    release, fetched = threading.Event(), []
+
+    def _fetch():
+        fetched.append(1)
+        release.wait(5)
+        return horizon
+
+    fetcher = module.PriceFetchCoordinator(fetch=_fetch)
+    monkeypatch.setattr(module, "_next_day_prices_expected", lambda _now=None: False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get())) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while not fetched:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(fetched) == 1 and results == [horizon] * 5
+    assert fetcher.stats()["fetches"] == 1 and fetcher.stats()["hits"] == 4
+
+
+def test_price_fetcher_collapses_concurrent_callers_onto_a_failed_fetch(monkeypatch, tmp_path):
+    import threading
+
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    horizon = module.PriceHorizon.from_points(_points(count=8))
+    release, fetched, outcome = threading.Event(), [], [None]
+    now = [1000.0]
+
+    def _fetch():
+        fetched.append(1)
+        release.wait(5)
+        if outcome[0] is None:
+            raise RuntimeError("Tibber is down")
+        return outcome[0]
+
+    fetcher = module.PriceFetchCoordinator(fetch=_fetch, retry_s=300.0, clock=lambda: now[0])
+    monkeypatch.setattr(module, "_next_day_prices_expected", lambda _now=None: False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get())) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while not fetched:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(fetched) == 1 and len(results) == 5 and not any(results)
+    assert fetcher.stats()["errors"] == 1
+
+    now[0] += 299.0
+    assert not fetcher.get() and len(fetched) == 1
+    now[0] += 1.0
+    outcome[0] = horizon
+    assert fetcher.get() is horizon and len(fetched) == 2
+
+
+def test_price_fetcher_seeds_from_shm_cache_without_fetching(monkeypatch, tmp_path):
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    module._cache_price_points("QUARTER_HOURLY", _points(count=8))
+    module._PRICE_CACHE.clear()
+    monkeypatch.setattr(module, "_next_day_prices_expected", lambda _now=None: False)
+    monkeypatch.setattr(module, "get_all_price_points", lambda: pytest.fail("should serve the cache"))
+
+    horizon = module.get_price_horizon()
+
+    assert len(horizon) == 8 and module.get_price_horizon() is horizon
+    assert module.price_fetch_stats()["fetches"] == 0
+
+
+def test_price_reads_reuse_one_account_and_refresh_it_in_place(monkeypatch, tmp_path):
+    import threading
+
+    module, _cache_path = _load_tibber_api(monkeypatch, tmp_path)
+    for thread in threading.enumerate():
+        if thread.name == "tibber-account-init":
+            thread.join(5)
+    built, updates = [], []
+    price_info = types.SimpleNamespace(current=types.SimpleNamespace(total=0.31), today=[], tomorrow=[])
+    home = types.SimpleNamespace(current_subscription=types.SimpleNamespace(price_info=price_info))
+
+    def _account(token):
+        built.append(token)
+        return types.SimpleNamespace(homes=[home], update=lambda: updates.append(1))
+
+    monkeypatch.setattr(module.tibber, "Account", _account)
+    monkeypatch.setattr(module, "account", None)
+    clock = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+
+    assert module.get_home() is home
+    assert module._get_all_price_points_via_library() == []
+    clock[0] += 899.0
+    assert module.current_price(module.get_home()) == 0.31
+    assert (built, updates) == (["token"], [])
+    clock[0] += 1.0
+    module.get_account()
+    assert (built, updates) == (["token"], [1])
+    assert module._http_session() is module._http_session()
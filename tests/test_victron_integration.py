@@ -0,0 +1,48 @@
+import importlib
+import sys
+
+import lib
+
+
+def _load_victron_integration(monkeypatch, accepted):
+    monkeypatch.setattr("lib.config_retrieval.retrieve_setting", lambda _name: "54.0")
+    monkeypatch.delitem(sys.modules, "lib.victron_integration", raising=False)
+    monkeypatch.setattr(lib, "victron_integration", None, raising=False)   # undone after the test
+    module = importlib.import_module("lib.victron_integration")
+    monkeypatch.delitem(sys.modules, "lib.victron_integration")
+
+    state, writes = {}, []
+
+    class _State:
+        def get(self, key):
+            return state.get(key)
+
+        def set(self, key, value):
+            state[key] = value
+
+    def _publish(topic, payload, qos=1, retain=False):
+        writes.append(topic)
+        return accepted[0]
+
+    monkeypatch.setattr(module, "STATE", _State())
+    monkeypatch.setattr(module, "control_publish", _publish)
+    return module, state, writes
+
+
+def test_rejected_limit_writes_leave_the_applied_state_for_a_retry(monkeypatch):
+    accepted = [False]
+    module, state, writes = _load_victron_integration(monkeypatch, accepted)
+
+    module.limit_grid_feed_in(True, 0)
+    module.set_minimum_ess_soc(10)
+    assert len(writes) == 2 and state == {}
+
+    accepted[0] = True
+    module.limit_grid_feed_in(True, 0)
+    module.set_minimum_ess_soc(10)
+    assert len(writes) == 4
+    assert state == {"feed_in_limit_state": "limited:0", "max_feed_in_power": 0.0, "min_ess_soc_applied": 10}
+
+    module.limit_grid_feed_in(True, 0)
+    module.set_minimum_ess_soc(10)
+    assert len(writes) == 4
@@ -0,0 +1,144 @@
+from datetime import datetime
+
+from lib import victron_schedule
+from lib.victron_schedule import ChargeScheduleSync, charge_slot_fields
+
+
+def _sync(seed=None, reject=()):
+    writes = []
+
+    def _publish(topic, payload, retain):
+        field = topic.rsplit("/Charge/", 1)[1]
+        writes.append((field, payload, retain))
+        return field not in reject
+
+    return ChargeScheduleSync(publish=_publish, seed=lambda: seed or {}), writes
+
+
+def _programmed(*slots):
+    return {(i, field): value for i, fields in enumerate(slots) for field, value in fields.items()}
+
+
+SLOT_A = charge_slot_fields(datetime(2026, 6, 15, 2, 0), 3600)        # Monday 02:00
+SLOT_B = charge_slot_fields(datetime(2026, 6, 15, 4, 30), 5400, soc=80)
+
+
+def test_charge_slot_fields_match_the_victron_encoding():
+    assert SLOT_A == {"Duration": 3600, "Soc": 100, "Start": 7200, "Day": 1}
+    assert SLOT_B == {"Duration": 5400, "Soc": 80, "Start": 16200, "Day": 1}
+
+
+def test_unchanged_plan_costs_no_writes_and_changes_write_only_what_moved():
+    seed = _programmed(SLOT_A, SLOT_B, {"Day": -1}, {"Day": -1}, {"Day": -1})
+    sync, writes = _sync(seed)
+
+    assert sync.sync([SLOT_A, SLOT_B]) == 0 and writes == []
+
+    moved = dict(SLOT_B, Soc=90)
+    assert sync.sync([SLOT_A, moved]) == 1
+    assert writes == [("1/Soc", '{"value": 90}', True)]
+
+    # The first slot elapsed: the remaining one keeps its index, slot 0 is disabled.
+    writes.clear()
+    assert sync.sync([moved]) == 1
+    assert writes == [("0/Day", '{"value": -1}', False)]
+
+    stats = sync.stats()
+    assert (stats["cycles"], stats["last_cycle_writes"], stats["writes"], stats["enabled_slots"]) == (3, 1, 2, 1)
+
+
+def test_moved_window_is_disabled_while_it_is_rewritten():
+    sync, writes = _sync(_programmed(SLOT_A, SLOT_B, {"Day": -1}, {"Day": -1}, {"Day": -1}))
+
+    moved = dict(SLOT_B, Start=18000, Duration=3600)
+    assert sync.sync([SLOT_A, moved]) == 4
+    assert writes == [("1/Day", '{"value": -1}', False), ("1/Duration", '{"value": 3600}', True),
+                      ("1/Start", '{"value": 18000}', True), ("1/Day", '{"value": 1}', True)]
+
+
+def test_window_is_left_alone_when_it_cannot_be_disabled_first():
+    sync, writes = _sync(_programmed(SLOT_A, {"Day": -1}, {"Day": -1}, {"Day": -1}, {"Day": -1}), reject={"0/Day"})
+
+    assert sync.sync([dict(SLOT_A, Start=10800)]) == 0
+    assert writes == [("0/Day", '{"value": -1}', False)]
+    assert sync.stats()["failed"] == 1
+
+
+def test_unknown_state_is_written_in_full_once():
+    sync, writes = _sync()
+
+    # Slot 0 may be enabled with another window, so it is disabled before it is rewritten.
+    assert sync.sync([SLOT_A]) == 1 + 4 + 4
+    assert [w[0] for w in writes[:5]] == ["0/Day", "0/Duration", "0/Soc", "0/Start", "0/Day"]
+    assert [w[0] for w in writes[5:]] == [f"{i}/Day" for i in range(1, 5)]
+    writes.clear()
+    assert sync.sync([SLOT_A]) == 0
+
+
+def test_re_enabling_a_cleared_slot_writes_only_changed_fields_and_day():
+    sync, writes = _sync(_programmed(SLOT_A))
+    sync.clear()
+    assert writes == [(f"{i}/Day", '{"value": -1}', False) for i in range(5)]
+
+    writes.clear()
+    assert sync.sync([SLOT_A]) == 1
+    assert writes == [("0/Day", '{"value": 1}', True)]
+
+
+def test_rejected_write_is_retried_next_cycle():
+    sync, writes = _sync(_programmed(SLOT_A, {"Day": -1}, {"Day": -1}, {"Day": -1}, {"Day": -1}), reject={"1/Day"})
+
+    assert sync.sync([SLOT_A, SLOT_B]) == 3
+    assert sync.stats()["failed"] == 1
+    writes.clear()
+    assert sync.sync([SLOT_A, SLOT_B]) == 0
+    assert writes == [("1/Day", '{"value": 1}', True)]
+
+
+def test_seed_reads_the_retained_schedule_topics(monkeypatch):
+    monkeypatch.setattr(victron_schedule, "systemId0", "portal-123")
+    prefix = "N/portal-123/settings/0/Settings/CGwacs/BatteryLife/Schedule/Charge"
+    captured = {}
+
+    def _values(topic_filter, expected=0, timeout=2.0):
+        captured["filter"], captured["expected"] = topic_filter, expected
+        return {f"{prefix}/0/Start": 7200, f"{prefix}/0/Day": "1", f"{prefix}/3/Day": -1.0,
+                f"{prefix}/4/Soc": None}
+
+    monkeypatch.setattr("lib.helpers.get_current_values_from_mqtt", _values)
+
+    assert victron_schedule._read_retained_slots() == {(0, "Start"): 7200, (0, "Day"): 1, (3, "Day"): -1}
+    assert captured == {"filter": f"{prefix}/+/+", "expected": 20}
+
+
+def test_new_slot_takes_the_index_needing_fewest_writes():
+    stale_b = dict(SLOT_B, Day=-1)
+    sync, writes = _sync(_programmed(SLOT_A, {"Day": -1}, stale_b, {"Day": -1}, {"Day": -1}))
+
+    assert sync.sync([SLOT_B, SLOT_A]) == 1
+    assert writes == [("2/Day", '{"value": 1}', True)]
+
+
+def test_state_is_re_read_periodically_and_after_an_external_clear(monkeypatch):
+    retained = {"slots": _programmed(SLOT_A, {"Day": -1}, {"Day": -1}, {"Day": -1}, {"Day": -1})}
+    clock = [0.0]
+    writes = []
+    sync = ChargeScheduleSync(publish=lambda topic, payload, retain: writes.append(topic.rsplit("/Charge/", 1)[1]),
+                              seed=lambda: retained["slots"], resync_s=3600.0, clock=lambda: clock[0])
+
+    assert sync.sync([SLOT_A]) == 0
+
+    # Someone disabled slot 0 behind the synchronizer's back; noticed on the next re-read.
+    retained["slots"] = {(0, "Day"): -1}
+    clock[0] = 3599.0
+    assert sync.sync([SLOT_A]) == 0
+    clock[0] = 3600.0
+    assert sync.sync([SLOT_A]) == 1 and writes == ["0/Day"]
+
+    retained["slots"] = _programmed(dict(SLOT_A, Day=-1), *[{"Day": -1}] * 4)
+    monkeypatch.setattr(victron_schedule, "_SYNC", sync)
+    monkeypatch.setattr("lib.helpers.publish_message", lambda *args, **kwargs: None)
+    from lib import helpers
+    helpers.clear_victron_schedules()
+    writes.clear()
+    assert sync.sync([SLOT_A]) == 1 and writes == ["0/Day"]